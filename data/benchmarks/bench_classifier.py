@@ -0,0 +1,130 @@
+"""
+Micro-benchmark for the Ontario Laws element classifier.
+
+Replays the text of every node in data/Ontario_docs through the original
+linear-scan classifier and through ontario_law_scraper.classify_element,
+checks that both assign the same element types, and reports elements per
+second for each.
+
+Usage:
+    python benchmarks/bench_classifier.py [--repeat N]
+"""
+import os
+import re
+import sys
+import json
+import glob
+import time
+import argparse
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DATA_DIR)
+
+from ontario_law_scraper import ELEMENT_TYPE_MAP, classify_element
+
+# Class names seen on Ontario Laws pages, cycled per node type so the
+# benchmark exercises both the class table and the content patterns
+CLASSES_BY_TYPE = {
+    "section": [["section-e"], ["subsection-e"], ["clause-e"], ["Yparagraph"]],
+    "paragraph": [["paragraph-e"], ["clause-e"], []],
+    "subparagraph": [["subclause-e"], []],
+    "definition": [["definition-e"], []],
+    "headnote": [["headnote-e"], ["Yheadnote"]],
+    "part": [["partnum-e"], []],
+    "unknown": [[], ["Ysection"], ["footnote-e"]],
+}
+
+# The classifier as it was before the dispatch table: a linear scan of the
+# class map followed by a chain of separate pattern checks
+section_number_pattern = re.compile(r'^(\d+\.(\d+)?)$')
+paragraph_pattern = re.compile(r'^[(]([a-z])[)]\s+')
+roman_numeral_pattern = re.compile(r'^[(]([ivxlcdm]+)[)]\s+', re.IGNORECASE)
+part_pattern = re.compile(r'^PART\s+([IVXLCDM]+)', re.IGNORECASE)
+
+def legacy_classify(text, class_attr, previous_type):
+    elm_type = "unknown"
+    if class_attr:
+        class_str = ' '.join(class_attr)
+        for class_name, type_name in ELEMENT_TYPE_MAP.items():
+            if class_name in class_str:
+                elm_type = type_name
+                break
+    if elm_type == "unknown":
+        if section_number_pattern.match(text):
+            elm_type = "section_number"
+        elif part_pattern.match(text) or (text.startswith("PART ") and any(numeral in text for numeral in ["I", "V", "X"])):
+            elm_type = "part"
+        elif text.isupper() and len(text) > 3:
+            elm_type = "part_title" if "PART" in text else "section_title"
+        elif previous_type == "section_number":
+            elm_type = "section_title"
+        elif text.startswith('"') and '"' in text[1:] and "means" in text:
+            elm_type = "definition"
+        elif paragraph_pattern.match(text):
+            elm_type = "paragraph"
+        elif roman_numeral_pattern.match(text):
+            elm_type = "subparagraph"
+    return elm_type
+
+def load_elements():
+    """Build (class_attr, text) pairs from the scraped Ontario documents."""
+    elements = []
+    counters = {}
+
+    def visit(node):
+        node_type = node.get("type", "unknown")
+        choices = CLASSES_BY_TYPE.get(node_type, CLASSES_BY_TYPE["unknown"])
+        counters[node_type] = counters.get(node_type, 0) + 1
+        class_attr = choices[counters[node_type] % len(choices)]
+        if node_type in ("section", "part") and "number" in node:
+            # Section and Part numbers appear as their own elements on the page
+            label = f"{node['number']}." if node_type == "section" else f"PART {node['number']}"
+            elements.append(([], label))
+            if node.get("title"):
+                elements.append(([], node["title"]))
+        if node.get("text"):
+            elements.append((class_attr, node["text"]))
+        for child in node.get("content", []):
+            visit(child)
+
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, "Ontario_docs", "*.json"))):
+        with open(path, 'r', encoding='utf-8') as f:
+            for node in json.load(f)["structure"]:
+                visit(node)
+    return elements
+
+def run(classify, elements):
+    types = []
+    previous_type = None
+    for class_attr, text in elements:
+        previous_type = classify(text, class_attr, previous_type)
+        types.append(previous_type)
+    return types
+
+def time_classifier(classify, elements, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run(classify, elements)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per classifier (best is reported)")
+    args = parser.parse_args()
+
+    elements = load_elements()
+    if run(legacy_classify, elements) != run(classify_element, elements):
+        print("Classifier outputs differ from the legacy classifier")
+        sys.exit(1)
+
+    legacy_seconds = time_classifier(legacy_classify, elements, args.repeat)
+    current_seconds = time_classifier(classify_element, elements, args.repeat)
+    print(f"{len(elements)} elements, identical element types")
+    print(f"  before: {len(elements) / legacy_seconds:12,.0f} elements/s")
+    print(f"  after:  {len(elements) / current_seconds:12,.0f} elements/s")
+    print(f"  speed-up: {legacy_seconds / current_seconds:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Benchmark suite for the scraper parsing stages.
+
+Each stage of both scrapers is timed on its own against the checked-in
+fixtures, and its peak memory is recorded with tracemalloc:
+
+    pdf_extract_text        extract_text_from_pdf on fixtures/fsra_underwriting_rules.pdf
+    pdf_parse_structure     parse_pdf_structure on the extracted pages
+    pdf_extract_metadata    extract_metadata on the extracted pages
+    pdf_serialize_json      json.dumps(indent=4) of the FSRA document
+    html_parse              iter_act_elements on fixtures/compulsory_automobile_insurance_act.html
+    html_classify           build_raw_elements over the parsed elements
+    html_build_structure    process_to_structured_format over the raw elements
+    html_serialize_json     json.dumps(indent=2) of the Ontario document
+
+The HTML fixture was rebuilt from the scraped Compulsory Automobile Insurance
+Act using the Ontario Laws class names. The PDF fixture lays out the FSRA
+underwriting rules guideline with "Section N - Title" headings.
+
+Before timing, fixtures/mixed_child_lists.json (nodes carrying both
+"subsections" and "content", or both "content" and "paragraphs") is written
+in every record-per-node output format and read back; the run fails unless
+each copy loads equal to the original. The cross-reference list parser of
+xref_graph.py is also run on REFERENCE_CHECKS, phrases it once got wrong.
+
+Times are also expressed relative to a fixed pure-Python calibration loop
+measured next to each stage, so the stored baseline carries over between
+machines and is less sensitive to a busy CPU. Results are compared with
+baseline.json. The run fails when a stage's relative time exceeds its
+baseline by more than --tolerance, or its peak memory by more than
+--memory-tolerance. Re-record the baseline with --update-baseline after an
+intended change.
+
+Usage:
+    python benchmarks/bench_parsers.py [--update-baseline] [--tolerance 0.5]
+"""
+import io
+import os
+import sys
+import json
+import timeit
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.dirname(BENCH_DIR)
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+sys.path.insert(0, DATA_DIR)
+
+from fsrao_pdf_scraper import extract_text_from_pdf, parse_pdf_structure, extract_metadata
+from ontario_law_scraper import iter_act_elements, build_raw_elements, process_to_structured_format
+from json_stream import OUTPUT_FORMATS, write_document, load_document, zstandard
+from xref_graph import REFERENCE_PATTERN, _reference_numbers
+
+PDF_FIXTURE = os.path.join(FIXTURES_DIR, "fsra_underwriting_rules.pdf")
+HTML_FIXTURE = os.path.join(FIXTURES_DIR, "compulsory_automobile_insurance_act.html")
+ROUND_TRIP_FIXTURE = os.path.join(FIXTURES_DIR, "mixed_child_lists.json")
+
+# Reference phrase -> section numbers it names
+REFERENCE_CHECKS = {
+    # Multi-digit subsections in a list once matched as partial section numbers ("1")
+    "subsections 256 (1), (12) and (13) of the Act": ["256"],
+    "sections 237 and 238 of the Insurance Act": ["237", "238"],
+    "Sections 410 to 413 of the Act": ["410", "411", "412", "413"],
+    "sections 12.1, 12.2 and 14": ["12.1", "12.2", "14"],
+}
+PDF_URL = "https://www.fsrao.ca/media/7726/download"
+HTML_URL = "https://www.ontario.ca/laws/statute/90c25"
+HTML_TITLE = "Compulsory Automobile Insurance Act, R.S.O. 1990, c. C.25"
+HTML_CITATION = "R.S.O. 1990, c. C.25"
+
+def quiet(func, *args):
+    """Call func with the scrapers' progress output suppressed."""
+    with redirect_stdout(io.StringIO()):
+        return func(*args)
+
+def build_stages():
+    """Prepare each stage's input once and return (name, callable) pairs."""
+    pages = quiet(extract_text_from_pdf, PDF_FIXTURE, 1)
+    structure = parse_pdf_structure(pages)
+    pdf_data = {"metadata": extract_metadata(pages), "structure": structure}
+
+    with open(HTML_FIXTURE, 'r', encoding='utf-8') as f:
+        page_source = f.read()
+    elements = [(class_attr, text) for _, class_attr, text in iter_act_elements(page_source)]
+    raw_elements = quiet(build_raw_elements, elements)
+    html_data = process_to_structured_format(raw_elements, HTML_TITLE, HTML_CITATION, HTML_URL)
+
+    return [
+        ("pdf_extract_text", lambda: quiet(extract_text_from_pdf, PDF_FIXTURE, 1)),
+        ("pdf_parse_structure", lambda: parse_pdf_structure(pages)),
+        ("pdf_extract_metadata", lambda: extract_metadata(pages)),
+        ("pdf_serialize_json", lambda: json.dumps(pdf_data, ensure_ascii=False, indent=4)),
+        ("html_parse", lambda: list(iter_act_elements(page_source))),
+        ("html_classify", lambda: quiet(build_raw_elements, elements)),
+        ("html_build_structure", lambda: process_to_structured_format(raw_elements, HTML_TITLE, HTML_CITATION, HTML_URL)),
+        ("html_serialize_json", lambda: json.dumps(html_data, ensure_ascii=False, indent=2)),
+    ]
+
+def check_round_trips():
+    """Return the output formats that do not load the round-trip fixture back unchanged."""
+    with open(ROUND_TRIP_FIXTURE, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    formats = [name for name in OUTPUT_FORMATS if name != "json" and (name != "binary" or zstandard is not None)]
+    failed = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for output_format in formats:
+            path = write_document(data, os.path.join(tmp_dir, "mixed_child_lists.json"), output_format)
+            if load_document(path) != data:
+                failed.append(output_format)
+    return failed
+
+def check_references():
+    """Return the REFERENCE_CHECKS phrases whose section numbers are parsed wrongly."""
+    failed = []
+    for phrase, expected in REFERENCE_CHECKS.items():
+        match = REFERENCE_PATTERN.search(phrase)
+        if match is None or _reference_numbers(match) != expected:
+            failed.append(phrase)
+    return failed
+
+def calibration():
+    """A fixed mix of string formatting, dict and sort work, used as the unit of time."""
+    counts = {}
+    for i in range(2000):
+        word = f"section {i % 97}. paragraph ({chr(97 + i % 26)})"
+        counts[word] = counts.get(word, 0) + len(word.split())
+    return sorted(counts.items())
+
+def best_time(func, repeat):
+    """Return the best seconds per call of func over `repeat` timed runs."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+def measure(stage, repeat):
+    """Return (best seconds per call, time relative to calibration, peak traced KiB)."""
+    seconds = best_time(stage, repeat)
+    relative = seconds / best_time(calibration, repeat)
+
+    tracemalloc.start()
+    stage()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, relative, peak / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scraper parsing stages.")
+    parser.add_argument("--repeat", type=int, default=5, help="timed repeats per stage (best is kept)")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown vs. baseline, as a fraction")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25, help="allowed peak memory growth vs. baseline, as a fraction")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file to compare with or update")
+    parser.add_argument("--update-baseline", action="store_true", help="record this run as the new baseline")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)["stages"]
+
+    results = {}
+    failures = [f"{name} does not round-trip {os.path.basename(ROUND_TRIP_FIXTURE)}" for name in check_round_trips()]
+    failures += [f"xref_graph parses {phrase!r} wrongly" for phrase in check_references()]
+    print(f"{'stage':<24}{'time':>12}{'relative':>10}{'baseline':>10}{'peak KiB':>12}{'baseline':>10}")
+    for name, stage in build_stages():
+        seconds, relative, peak_kib = measure(stage, args.repeat)
+        results[name] = {"seconds": seconds, "relative": round(relative, 4), "peak_kib": round(peak_kib, 1)}
+
+        expected = baseline.get(name)
+        if expected is None:
+            print(f"{name:<24}{seconds * 1000:>10.3f}ms{relative:>10.3f}{'-':>10}{peak_kib:>12.1f}{'-':>10}")
+            continue
+        print(f"{name:<24}{seconds * 1000:>10.3f}ms{relative:>10.3f}{expected['relative']:>10.3f}"
+              f"{peak_kib:>12.1f}{expected['peak_kib']:>10.1f}")
+        if relative > expected["relative"] * (1 + args.tolerance):
+            failures.append(f"{name} took {relative / expected['relative']:.2f}x its baseline time")
+        if peak_kib > expected["peak_kib"] * (1 + args.memory_tolerance):
+            failures.append(f"{name} used {peak_kib / expected['peak_kib']:.2f}x its baseline peak memory")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({"python": platform.python_version(), "stages": results}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if failures:
+        print("\nRegressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nNo regressions against the baseline.")
+
+if __name__ == "__main__":
+    main()
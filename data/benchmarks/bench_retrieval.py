@@ -0,0 +1,147 @@
+"""
+Load test for the local retrieval service.
+
+Replays a mix of search, citation and section requests from many
+concurrent clients and reports throughput, latency percentiles per endpoint
+and the cache hit rates from /health. Queries are drawn from the corpus
+itself: section titles become search queries and citation paths become
+citation and section lookups. A small set of "hot" requests is repeated
+(--hot-share of all requests) to show the effect of the LRU caches.
+
+Without --url, the service is started in-process on a free port.
+
+Usage:
+    python benchmarks/bench_retrieval.py [--url http://127.0.0.1:8765] [--requests 2000] [--concurrency 16]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import http.client
+from urllib.parse import urlsplit, urlencode
+from concurrent.futures import ThreadPoolExecutor
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DATA_DIR)
+
+from corpus_store import load_corpus
+from retrieval_server import RetrievalService, make_server
+
+def build_requests(store, count, hot_share, seed=1):
+    """
+    Return a shuffled list of request paths drawn from the corpus.
+
+    Args:
+        store (CorpusStore): Corpus the queries are taken from
+        count (int): Number of requests
+        hot_share (float): Share of requests repeating one of a few hot paths
+
+    Returns:
+        list: Request paths such as "/search?q=..."
+    """
+    rng = random.Random(seed)
+    titled = [node for node in store.iter_nodes() if store.title(node)]
+    cited = [node for node in store.iter_nodes() if store.citation_path(node)]
+
+    def random_path():
+        kind = rng.random()
+        if kind < 0.5:
+            return "/search?" + urlencode({"q": store.title(rng.choice(titled)), "k": 10})
+        node = rng.choice(cited)
+        params = {"document": store.doc[node]}
+        if kind < 0.75:
+            params["c"] = store.citation_path(node)
+            return "/citation?" + urlencode(params)
+        params["citation"] = store.citation_path(node)
+        return "/section?" + urlencode(params)
+
+    hot = [random_path() for _ in range(20)]
+    paths = [rng.choice(hot) if rng.random() < hot_share else random_path() for _ in range(count)]
+    rng.shuffle(paths)
+    return paths
+
+def run_load(url, paths, concurrency):
+    """
+    Send the requests from concurrent keep-alive connections.
+
+    Returns:
+        tuple: (elapsed seconds, list of (endpoint, status, latency seconds))
+    """
+    parts = urlsplit(url)
+    local = threading.local()
+
+    def fetch(path):
+        if not hasattr(local, "connection"):
+            local.connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        start = time.perf_counter()
+        try:
+            local.connection.request("GET", path)
+            response = local.connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            local.connection.close()
+            del local.connection
+            status = 0
+        return path.split("?")[0], status, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(fetch, paths))
+    return time.perf_counter() - start, results
+
+def percentile(values, fraction):
+    """Return a percentile of sorted values (nearest rank)."""
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def report(elapsed, results):
+    """Print throughput, error count and latency percentiles per endpoint."""
+    errors = sum(1 for _, status, _ in results if status == 0 or status >= 500)
+    print(f"{len(results)} requests in {elapsed:.2f}s: {len(results) / elapsed:,.0f} requests/s, {errors} errors")
+    print(f"  {'endpoint':<10} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    endpoints = sorted({endpoint for endpoint, _, _ in results})
+    for endpoint in endpoints + ["all"]:
+        latencies = sorted(latency * 1000 for name, _, latency in results if endpoint in ("all", name))
+        print(f"  {endpoint:<10} {len(latencies):>6} {percentile(latencies, 0.5):>8.2f} "
+              f"{percentile(latencies, 0.95):>8.2f} {percentile(latencies, 0.99):>8.2f} {latencies[-1]:>8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="running service to test (default: start one in-process)")
+    parser.add_argument("--requests", type=int, default=2000, help="number of requests")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--hot-share", type=float, default=0.3, help="share of requests repeating hot paths")
+    parser.add_argument("--cache-size", type=int, default=1024, help="cache entries of the in-process service")
+    args = parser.parse_args()
+
+    store = load_corpus()
+    server = None
+    url = args.url
+    if url is None:
+        server = make_server(RetrievalService(store, cache_size=args.cache_size), port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    paths = build_requests(store, args.requests, args.hot_share)
+    elapsed, results = run_load(url, paths, args.concurrency)
+    report(elapsed, results)
+
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    connection.request("GET", "/health")
+    health = json.loads(connection.getresponse().read())
+    for name in ("search_cache", "section_cache"):
+        cache = health[name]
+        lookups = cache["hits"] + cache["misses"]
+        rate = cache["hits"] / lookups if lookups else 0
+        print(f"  {name}: {cache['hits']}/{lookups} hits ({rate:.0%}), {cache['size']}/{cache['max_size']} entries")
+
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
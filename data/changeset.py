@@ -0,0 +1,298 @@
+"""
+Section-level diffs between successive scrapes of a document.
+
+A re-scrape rewrites the whole document file even when an amendment only
+touches one section. The diff engine splits a document into the same
+section units as the chunker (Parts are walked into), keys them by node id
+and compares their content hashes with the previous version. The result is
+a compact changeset: the added and changed sections with their new content,
+the keys of removed sections, and a count of unchanged ones. For a changed
+section, the nodes inside it that were added, removed or edited are listed
+by id as well.
+
+ChangeTracker keeps the hashes of the last version of every document in
+section_state.json, so the previous file does not have to be kept around.
+Each run appends its changesets to changesets.ndjson, numbered with a
+sequence that keeps growing across runs. A consumer remembers the last
+sequence it applied and reads on from there with iter_changesets(after=...),
+so a run it skipped is picked up the next time: `chunker.py --changesets`
+re-chunks only the sections they add or change (see Rechunker.apply), and
+`publish.py --changesets` re-uploads only the documents they name. The
+search and vector indexes are still rebuilt whole when the corpus changes:
+their node numbers are positions in the whole corpus and their weights
+(BM25 document frequencies, the SVD basis) are corpus-wide.
+
+Usage:
+    python changeset.py [--output changesets.ndjson]    # append the changes since the last run
+    python changeset.py --diff OLD_FILE NEW_FILE        # compare two versions
+"""
+import os
+import json
+import hashlib
+import argparse
+from corpus_store import DATA_DIR, iter_corpus_files
+from json_stream import iter_document_records, iter_sections
+from citation_index import document_key
+from chunker import iter_keyed_sections, section_hash
+
+SECTION_STATE_PATH = os.path.join(DATA_DIR, "section_state.json")
+CHANGESETS_PATH = os.path.join(DATA_DIR, "changesets.ndjson")
+
+# Node hashes only have to tell versions of one node apart, so they are kept short
+NODE_HASH_LENGTH = 16
+
+def iter_section_nodes(section):
+    """Yield (node_key, node) for a section and every node under it, keys unique within the section."""
+    seen = {}
+    stack = [section]
+    while stack:
+        node = stack.pop()
+        node_id = node.get("id", "")
+        occurrence = seen[node_id] = seen.get(node_id, 0) + 1
+        yield node_id + (f"#{occurrence}" if occurrence > 1 else ""), node
+        children = node.get("content") or node.get("paragraphs") or []
+        stack.extend(reversed(children))
+
+def node_hashes(section):
+    """Return the short hash of every node's own fields (children excluded) in a section, by node key."""
+    hashes = {}
+    for node_key, node in iter_section_nodes(section):
+        fields = {key: value for key, value in node.items() if key not in ("content", "paragraphs")}
+        encoded = json.dumps(fields, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        hashes[node_key] = hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:NODE_HASH_LENGTH]
+    return hashes
+
+def document_digest(section_state):
+    """Return one hash over the section keys and hashes of a document, in order."""
+    digest = hashlib.sha256()
+    for section_key, entry in section_state.items():
+        digest.update(f"{section_key}\0{entry['hash']}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+def diff_nodes(previous, current):
+    """Compare two node-hash maps of one section. Returns the added, removed and changed node keys."""
+    return {
+        "added": [key for key in current if key not in previous],
+        "removed": [key for key in previous if key not in current],
+        "changed": [key for key, value in current.items() if key in previous and previous[key] != value]
+    }
+
+def diff_sections(previous, sections, doc_key, metadata):
+    """
+    Compare a document's sections with the state of its previous version.
+
+    Sections are read one at a time; only added and changed ones are kept.
+
+    Args:
+        previous (dict): Section state of the previous version, section key ->
+            {"hash", "citation_path", "nodes"}; empty for a new document
+        sections (iterable): Top-level structure nodes of the new version
+        doc_key (str): Stable document key (see citation_index.document_key)
+        metadata (dict): Metadata of the new version
+
+    Returns:
+        tuple: (changeset, state) where state is the section state of the new version
+    """
+    changeset = {
+        "document": doc_key,
+        "metadata": metadata,
+        "previous_digest": document_digest(previous) if previous else None,
+        "digest": None,
+        "added": [],
+        "changed": [],
+        "removed": [],
+        "unchanged": 0
+    }
+    state = {}
+    for section_key, headings, section in iter_keyed_sections(sections, doc_key):
+        content_hash = section_hash(section)
+        old = previous.get(section_key)
+        if old is not None and old["hash"] == content_hash:
+            state[section_key] = old
+            changeset["unchanged"] += 1
+            continue
+
+        nodes = node_hashes(section)
+        state[section_key] = {"hash": content_hash, "citation_path": section.get("citation_path", ""), "nodes": nodes}
+        entry = {
+            "section_key": section_key,
+            "hash": content_hash,
+            "citation_path": section.get("citation_path", ""),
+            "headings": list(headings),
+            "section": section
+        }
+        if old is None:
+            changeset["added"].append(entry)
+        else:
+            entry["previous_hash"] = old["hash"]
+            entry["nodes"] = diff_nodes(old["nodes"], nodes)
+            changeset["changed"].append(entry)
+
+    for section_key, old in previous.items():
+        if section_key not in state:
+            changeset["removed"].append({"section_key": section_key, "hash": old["hash"],
+                                         "citation_path": old["citation_path"]})
+    changeset["digest"] = document_digest(state)
+    return changeset, state
+
+def is_empty(changeset):
+    """Return True if a changeset adds, changes and removes nothing."""
+    return not (changeset["added"] or changeset["changed"] or changeset["removed"])
+
+def summarize(changeset):
+    """Return a one-line description of a changeset."""
+    return (f"{changeset['document']}: {len(changeset['added'])} added, {len(changeset['changed'])} changed, "
+            f"{len(changeset['removed'])} removed, {changeset['unchanged']} unchanged")
+
+def iter_changesets(path=CHANGESETS_PATH, after=None):
+    """
+    Yield the changesets of an NDJSON file written by this module, in order.
+
+    Args:
+        path (str): Changesets file; a missing file has no changesets
+        after (int, optional): Only yield changesets with a higher sequence,
+            i.e. the ones a consumer that applied up to `after` has not seen
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            changeset = json.loads(line)
+            if after is None or changeset.get("sequence", 0) > after:
+                yield changeset
+
+def append_changesets(changesets, first_sequence, path=CHANGESETS_PATH):
+    """
+    Number changesets from first_sequence on and append them to an NDJSON file.
+
+    Returns:
+        int: The last sequence number used (first_sequence - 1 if there were none)
+    """
+    sequence = first_sequence - 1
+    with open(path, 'a', encoding='utf-8') as f:
+        for changeset in changesets:
+            sequence += 1
+            changeset["sequence"] = sequence
+            f.write(json.dumps(changeset, ensure_ascii=False) + "\n")
+    return sequence
+
+def section_state(sections, doc_key):
+    """Return the section state of a document version, for comparing another version against it."""
+    _, state = diff_sections({}, sections, doc_key, {})
+    return state
+
+def diff_documents(old_path, new_path, doc_key=None):
+    """
+    Compare two document files section by section (any output format).
+
+    Args:
+        old_path (str): Previous version
+        new_path (str): New version
+        doc_key (str, optional): Document key; derived from new_path by default
+
+    Returns:
+        dict: The changeset
+    """
+    doc_key = doc_key or document_key({"filename": os.path.basename(new_path)})
+    _, old_records = iter_document_records(old_path)
+    previous = section_state(iter_sections(old_records), doc_key)
+    metadata, records = iter_document_records(new_path)
+    changeset, _ = diff_sections(previous, iter_sections(records), doc_key, metadata)
+    return changeset
+
+class ChangeTracker:
+    """
+    Section hashes of the last seen version of every document, kept across runs.
+
+    update() diffs a new version against them and remembers the new state;
+    save() writes the state back. The state also holds the sequence number
+    of the last changeset written.
+
+    Args:
+        state_path (str): JSON file holding the section state, or None for a fresh start
+    """
+
+    def __init__(self, state_path=SECTION_STATE_PATH):
+        self.state_path = state_path
+        self.documents = {}
+        self.sequence = 0
+        if state_path and os.path.exists(state_path):
+            with open(state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self.documents = state["documents"]
+            self.sequence = state.get("sequence", 0)
+
+    def save(self):
+        """Write the section state to the state file."""
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"sequence": self.sequence, "documents": self.documents}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def update(self, doc_key, sections, metadata):
+        """Diff a new version of a document against its last state and remember it. Returns the changeset."""
+        changeset, state = diff_sections(self.documents.get(doc_key, {}), sections, doc_key, metadata)
+        self.documents[doc_key] = state
+        return changeset
+
+    def update_file(self, path):
+        """Diff a saved document file (any output format). Returns the changeset."""
+        metadata, records = iter_document_records(path)
+        return self.update(document_key({"filename": os.path.basename(path)}), iter_sections(records), metadata)
+
+    def removed_documents(self, doc_keys):
+        """
+        Forget documents that no longer exist.
+
+        Args:
+            doc_keys (iterable): Keys of the documents that still exist
+
+        Returns:
+            list: Changesets removing every section of each missing document
+        """
+        doc_keys = set(doc_keys)
+        changesets = []
+        for doc_key in [key for key in self.documents if key not in doc_keys]:
+            changeset, _ = diff_sections(self.documents.pop(doc_key), (), doc_key, {})
+            changesets.append(changeset)
+        return changesets
+
+def main():
+    parser = argparse.ArgumentParser(description="List the sections that changed since the last run.")
+    parser.add_argument("--output", default=CHANGESETS_PATH, help="NDJSON file the changesets are appended to")
+    parser.add_argument("--diff", nargs=2, metavar=("OLD", "NEW"), help="compare two versions of a document")
+    args = parser.parse_args()
+
+    if args.diff:
+        changeset = diff_documents(*args.diff)
+        print(summarize(changeset))
+        for kind in ("added", "changed", "removed"):
+            for entry in changeset[kind]:
+                detail = f" nodes {entry['nodes']}" if kind == "changed" else ""
+                print(f"  {kind:<8} {entry['citation_path']:<16} {entry['section_key']}{detail}")
+        return
+
+    tracker = ChangeTracker()
+    changesets = []
+    doc_keys = []
+    for _, path in iter_corpus_files():
+        changeset = tracker.update_file(path)
+        doc_keys.append(changeset["document"])
+        if not is_empty(changeset):
+            changesets.append(changeset)
+    changesets.extend(tracker.removed_documents(doc_keys))
+
+    if not tracker.sequence:
+        # A fresh state keeps numbering after the changesets already in the file
+        tracker.sequence = max((changeset.get("sequence", 0) for changeset in iter_changesets(args.output)), default=0)
+    for changeset in changesets:
+        print(summarize(changeset))
+    # Written before the state, so an interrupted run repeats changes rather than losing them
+    tracker.sequence = append_changesets(changesets, tracker.sequence + 1, args.output)
+    tracker.save()
+    print(f"{len(changesets)} changed documents appended to {args.output} (last sequence {tracker.sequence})")
+
+if __name__ == "__main__":
+    main()
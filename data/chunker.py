@@ -0,0 +1,354 @@
+"""
+Split structured documents into retrieval chunks that follow the section hierarchy.
+
+Parts are walked into, and every section (or other top-level unit) becomes
+one chunk when it fits in the token budget. Longer sections are split
+between their paragraphs, and a single paragraph is only split between words
+when it exceeds the budget on its own. Each chunk carries the section's
+citation_path and the titles of the Part and section it belongs to.
+
+Chunks are produced by a generator, one top-level section at a time, so
+documents in any output format can be chunked without loading them whole.
+Every section also gets a content hash. Rechunker keeps those hashes
+between runs and only re-emits the chunks of sections whose content changed
+after a re-scrape, deleting the chunk IDs those sections had before.
+
+With --changesets, the corpus is not read at all: the sections added,
+changed or removed by the changesets from changeset.py are applied instead.
+The state remembers the sequence of the last changeset applied, so each run
+picks up exactly the changesets appended since.
+
+Usage:
+    python chunker.py [--max-tokens 512] [--output chunks.ndjson] [--full]
+    python chunker.py --changesets changesets.ndjson
+"""
+import os
+import re
+import json
+import hashlib
+import argparse
+from corpus_store import DATA_DIR, iter_corpus_files
+from json_stream import iter_document_records, iter_sections
+from citation_index import document_key
+
+CHUNK_STATE_PATH = os.path.join(DATA_DIR, "chunk_state.json")
+
+# Nodes that only group sections; they are walked into instead of chunked
+CONTAINER_TYPES = ("part",)
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+def count_tokens(text):
+    """Estimate the number of model tokens in text: words and punctuation marks."""
+    return len(TOKEN_PATTERN.findall(text))
+
+def section_hash(section):
+    """Return a content hash of a section and everything under it."""
+    encoded = json.dumps(section, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+def _section_lines(section):
+    """Yield (node, text) for the lines of a section, in document order."""
+    stack = [(section, True)]
+    while stack:
+        node, is_root = stack.pop()
+        if not is_root and node.get("title"):
+            yield node, node["title"]
+        if node.get("text"):
+            yield node, node["text"]
+        children = node.get("content") or node.get("paragraphs") or []
+        stack.extend((child, False) for child in reversed(children))
+
+def _split_long_line(text, max_tokens, counter):
+    """Split one over-long line between words into pieces within the budget."""
+    piece = []
+    piece_tokens = 0
+    for word in text.split():
+        tokens = counter(word)
+        if piece and piece_tokens + tokens > max_tokens:
+            yield " ".join(piece)
+            piece = []
+            piece_tokens = 0
+        piece.append(word)
+        piece_tokens += tokens
+    if piece:
+        yield " ".join(piece)
+
+def iter_section_units(sections, headings=()):
+    """
+    Yield (headings, section) for every chunkable unit, walking into Parts.
+
+    Args:
+        sections (iterable): Top-level structure nodes
+        headings (tuple): Titles of the enclosing nodes
+    """
+    for node in sections:
+        if node.get("type") in CONTAINER_TYPES and not node.get("text"):
+            yield from iter_section_units(node.get("content") or [], headings + (node.get("title", ""),))
+        else:
+            yield headings, node
+
+def iter_keyed_sections(sections, doc_key=""):
+    """
+    Yield (section_key, headings, section) for every chunkable unit of a document.
+
+    Section keys are "<doc_key>:<node id>"; node ids repeat within some Acts,
+    so repeated ids get a "#<occurrence>" suffix.
+    """
+    seen = {}
+    for headings, section in iter_section_units(sections):
+        node_id = section.get("id", "")
+        occurrence = seen[node_id] = seen.get(node_id, 0) + 1
+        yield f"{doc_key}:{node_id}" + (f"#{occurrence}" if occurrence > 1 else ""), headings, section
+
+def chunk_section(section, headings, metadata, section_key, max_tokens=512, counter=count_tokens, content_hash=None):
+    """
+    Split one section into chunks within the token budget.
+
+    Args:
+        section (dict): Section node with its subtree
+        headings (tuple): Titles of the enclosing Parts
+        metadata (dict): Document metadata
+        section_key (str): Unique key of the section within its document
+        max_tokens (int): Token budget of a chunk's text
+        counter (callable): Token counter, count_tokens by default
+        content_hash (str, optional): Precomputed section_hash(section)
+
+    Returns:
+        list: Chunk dicts (empty for a section with no text)
+    """
+    headings = tuple(title for title in headings + (section.get("title", ""),) if title)
+    content_hash = content_hash or section_hash(section)
+
+    groups = []
+    lines, tokens = [], 0
+    for node, text in _section_lines(section):
+        line_tokens = counter(text)
+        pieces = [text] if line_tokens <= max_tokens else list(_split_long_line(text, max_tokens, counter))
+        for piece in pieces:
+            piece_tokens = line_tokens if len(pieces) == 1 else counter(piece)
+            if lines and tokens + piece_tokens > max_tokens:
+                groups.append(lines)
+                lines, tokens = [], 0
+            lines.append((node, piece))
+            tokens += piece_tokens
+    if lines:
+        groups.append(lines)
+
+    chunks = []
+    for number, lines in enumerate(groups):
+        text = "\n".join(piece for _, piece in lines)
+        citation_paths = []
+        for node, _ in lines:
+            if node.get("citation_path") and node["citation_path"] not in citation_paths:
+                citation_paths.append(node["citation_path"])
+        chunks.append({
+            "chunk_id": f"{section_key}:{number}",
+            "section_key": section_key,
+            "section_hash": content_hash,
+            "document": metadata.get("title", ""),
+            "source_url": metadata.get("source_url", ""),
+            "citation_path": section.get("citation_path", ""),
+            "citation_paths": citation_paths,
+            "headings": list(headings),
+            "node_ids": [lines[0][0].get("id"), lines[-1][0].get("id")],
+            "text": text,
+            "tokens": counter(text),
+            "hash": hashlib.sha256("\n".join(headings + (text,)).encode('utf-8')).hexdigest()
+        })
+    return chunks
+
+def iter_document_chunks(sections, metadata, doc_key="", max_tokens=512, counter=count_tokens, skip=None):
+    """
+    Chunk a document's sections as they are read.
+
+    Args:
+        sections (iterable): Top-level structure nodes, e.g. from iter_sections()
+        metadata (dict): Document metadata
+        doc_key (str): Prefix that makes section keys unique across documents
+        max_tokens (int): Token budget of a chunk's text
+        counter (callable): Token counter
+        skip (callable, optional): skip(section_key, section_hash) returns True
+            for sections that do not need to be chunked again
+
+    Yields:
+        tuple: (section_key, section_hash, chunks) for each section; chunks
+            is None for skipped sections
+    """
+    for section_key, headings, section in iter_keyed_sections(sections, doc_key):
+        content_hash = section_hash(section)
+        if skip is not None and skip(section_key, content_hash):
+            yield section_key, content_hash, None
+            continue
+        yield section_key, content_hash, chunk_section(section, headings, metadata, section_key,
+                                                       max_tokens, counter, content_hash)
+
+class Rechunker:
+    """
+    Incremental chunking across runs.
+
+    The section hashes and chunk counts of the last run are kept in a state
+    file. update() re-chunks only new or changed sections; every chunk ID the
+    previous run emitted for a changed or removed section is deleted first,
+    so an index or uploader only has to apply the difference and never keeps
+    stale chunks when a section shrinks or disappears.
+
+    Args:
+        state_path (str): JSON file holding the section state
+        max_tokens (int): Token budget; changing it re-chunks everything
+        counter (callable): Token counter, count_tokens by default
+        fresh (bool): Ignore the state of the last run (it is still saved to state_path)
+    """
+
+    STATE_VERSION = 2
+
+    def __init__(self, state_path=CHUNK_STATE_PATH, max_tokens=512, counter=count_tokens, fresh=False):
+        self.state_path = state_path
+        self.max_tokens = max_tokens
+        self.counter = counter
+        # doc_key -> section_key -> {"hash", "chunks"}
+        self.documents = {}
+        # Sequence of the last changeset applied (see changeset.iter_changesets)
+        self.changeset_sequence = 0
+        if not fresh and state_path and os.path.exists(state_path):
+            with open(state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get("version") == self.STATE_VERSION and state.get("max_tokens") == max_tokens:
+                self.documents = state["documents"]
+                self.changeset_sequence = state.get("changeset_sequence", 0)
+
+    def save(self):
+        """Write the section state to the state file."""
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": self.STATE_VERSION, "max_tokens": self.max_tokens,
+                       "changeset_sequence": self.changeset_sequence, "documents": self.documents}, f)
+        os.replace(tmp_path, self.state_path)
+
+    @staticmethod
+    def _deletes(section_key, entry):
+        """Yield a delete for every chunk ID the previous run emitted for a section."""
+        if entry is not None:
+            for number in range(entry["chunks"]):
+                yield "delete", f"{section_key}:{number}"
+
+    def update(self, doc_key, sections, metadata):
+        """
+        Chunk the changed sections of one document.
+
+        Args:
+            doc_key (str): Stable document key (see citation_index.document_key)
+            sections (iterable): Top-level structure nodes
+            metadata (dict): Document metadata
+
+        Yields:
+            tuple: ("delete", chunk_id) for every previous chunk of a changed
+                section followed by ("upsert", chunk) for each of its new
+                chunks, then ("delete", chunk_id) for the chunks of sections
+                that no longer exist
+        """
+        previous = self.documents.get(doc_key, {})
+        current = {}
+
+        def unchanged(section_key, content_hash):
+            entry = previous.get(section_key)
+            return entry is not None and entry["hash"] == content_hash
+
+        for section_key, content_hash, chunks in iter_document_chunks(
+                sections, metadata, doc_key, self.max_tokens, self.counter, skip=unchanged):
+            if chunks is None:
+                current[section_key] = previous[section_key]
+                continue
+            yield from self._deletes(section_key, previous.get(section_key))
+            for chunk in chunks:
+                yield "upsert", chunk
+            current[section_key] = {"hash": content_hash, "chunks": len(chunks)}
+
+        for section_key, entry in previous.items():
+            if section_key not in current:
+                yield from self._deletes(section_key, entry)
+        self.documents[doc_key] = current
+
+    def apply(self, changeset):
+        """
+        Chunk the sections a changeset adds or changes, without reading the rest of the document.
+
+        Args:
+            changeset (dict): Changeset from changeset.ChangeTracker or changeset.diff_documents()
+
+        Yields:
+            tuple: ("delete", chunk_id) and ("upsert", chunk), as update() does
+        """
+        doc_key = changeset["document"]
+        current = dict(self.documents.get(doc_key, {}))
+        for entry in changeset["added"] + changeset["changed"]:
+            section_key = entry["section_key"]
+            old = current.get(section_key)
+            if old is not None and old["hash"] == entry["hash"]:
+                continue
+            chunks = chunk_section(entry["section"], tuple(entry["headings"]), changeset["metadata"], section_key,
+                                   self.max_tokens, self.counter, entry["hash"])
+            yield from self._deletes(section_key, old)
+            for chunk in chunks:
+                yield "upsert", chunk
+            current[section_key] = {"hash": entry["hash"], "chunks": len(chunks)}
+        for entry in changeset["removed"]:
+            yield from self._deletes(entry["section_key"], current.pop(entry["section_key"], None))
+        if current:
+            self.documents[doc_key] = current
+        else:
+            self.documents.pop(doc_key, None)
+        self.changeset_sequence = changeset.get("sequence", self.changeset_sequence)
+
+    def removed_documents(self, doc_keys):
+        """
+        Forget documents that are no longer in the corpus.
+
+        Args:
+            doc_keys (iterable): Keys of the documents that still exist
+
+        Yields:
+            tuple: ("delete", chunk_id) for every chunk of each missing document
+        """
+        doc_keys = set(doc_keys)
+        for doc_key in [key for key in self.documents if key not in doc_keys]:
+            for section_key, entry in self.documents.pop(doc_key).items():
+                yield from self._deletes(section_key, entry)
+
+def write_changes(f, changes, counts):
+    """Write ("upsert", chunk) / ("delete", chunk_id) changes as NDJSON records, counting them."""
+    for action, value in changes:
+        counts[action] += 1
+        record = {"action": action, "chunk": value} if action == "upsert" else {"action": action, "chunk_id": value}
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunk the structured documents for retrieval.")
+    parser.add_argument("--max-tokens", type=int, default=512, help="token budget of a chunk")
+    parser.add_argument("--output", default=os.path.join(DATA_DIR, "chunks.ndjson"), help="NDJSON file of chunk changes")
+    parser.add_argument("--full", action="store_true", help="ignore the previous run and emit every chunk")
+    parser.add_argument("--changesets", help="apply the changesets in this NDJSON file not applied yet, "
+                                             "instead of scanning the corpus")
+    args = parser.parse_args()
+
+    rechunker = Rechunker(CHUNK_STATE_PATH, args.max_tokens, fresh=args.full)
+    counts = {"upsert": 0, "delete": 0}
+    with open(args.output, 'w', encoding='utf-8') as f:
+        if args.changesets:
+            # changeset.py builds on this module, so it is only imported here
+            from changeset import iter_changesets
+            for changeset in iter_changesets(args.changesets, after=rechunker.changeset_sequence):
+                write_changes(f, rechunker.apply(changeset), counts)
+        else:
+            doc_keys = []
+            for _, path in iter_corpus_files():
+                metadata, records = iter_document_records(path)
+                doc_key = document_key({"filename": os.path.basename(path)})
+                doc_keys.append(doc_key)
+                write_changes(f, rechunker.update(doc_key, iter_sections(records), metadata), counts)
+            write_changes(f, rechunker.removed_documents(doc_keys), counts)
+    rechunker.save()
+    print(f"{counts['upsert']} chunks emitted, {counts['delete']} chunks deleted, written to {args.output}")
+
+if __name__ == "__main__":
+    main()
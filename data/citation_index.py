@@ -0,0 +1,180 @@
+"""
+Citation resolver for the citation_path strings of the scraped corpus.
+
+process_to_structured_format and the PDF parser cite nodes as "s. 263",
+"s. 263, para. (a)", "s. 1, \"automobile\"" or "Part IV". CitationIndex
+maps the normalized form of every citation to the node it names, so turning
+a citation back into its text is a dictionary lookup instead of a tree walk.
+
+Normalization is lenient: "section 263(a)", "s.263 (a)", "S. 263, para. (a)"
+and "263(a)" all resolve to the same key. Several nodes share a citation
+path (a section and the text lines under it); the index points at the
+topmost of them, the one whose subtree holds the cited text.
+
+Usage:
+    python citation_index.py "section 263(a)" "s. 1" [--document "R.S.O. 1990, c. I.8"]
+"""
+import re
+import argparse
+from corpus_store import load_corpus
+from json_stream import OUTPUT_FORMATS
+
+PART_CITATION = re.compile(r"part\s+([ivxlcdm]+|\d+)\b")
+SECTION_CITATION = re.compile(r"(?:(?:ss?|secs?|sections?)\b\.?\s*)?(\d+(?:\.\d+)*)")
+SUBDIVISION = re.compile(r"\(\s*([a-z]{1,5}|\d+(?:\.\d+)?)\s*\)")
+QUOTED_TERM = re.compile(r'"([^"]+)"')
+QUOTES = str.maketrans({"“": '"', "”": '"', "„": '"', "″": '"'})
+
+def normalize_citation(citation):
+    """
+    Return the lookup key for a citation, tolerating spacing, case and abbreviation differences.
+
+    Args:
+        citation (str): e.g. "s. 263, para. (a)", "section 263(a)" or "Part IV"
+
+    Returns:
+        str: Normalized key, e.g. "s263(a)" or "part iv"
+    """
+    text = " ".join(citation.translate(QUOTES).lower().split())
+
+    part = PART_CITATION.match(text)
+    if part:
+        return f"part {part.group(1)}"
+
+    section = SECTION_CITATION.match(text)
+    if not section:
+        return text
+
+    rest = text[section.end():]
+    key = f"s{section.group(1)}"
+    key += "".join(f"({label})" for label in SUBDIVISION.findall(rest))
+    term = QUOTED_TERM.search(rest)
+    if term:
+        key += f'"{term.group(1).strip()}"'
+    return key
+
+def document_key(document):
+    """Return the stable key of a store document: its file name without extension."""
+    filename = document["filename"]
+    for extension in OUTPUT_FORMATS.values():
+        if filename.endswith(extension):
+            return filename[:-len(extension)]
+    return filename
+
+class CitationIndex:
+    """
+    Map normalized citations to corpus nodes.
+
+    Args:
+        store (CorpusStore): Corpus to index
+    """
+
+    def __init__(self, store):
+        self.store = store
+        # (document index, key) -> node, for resolution within one document
+        self.by_document = {}
+        # key -> nodes in every document that has the citation
+        self.by_key = {}
+        # document key, title and citation (lowercase) -> document indexes
+        self.documents = {}
+
+        for doc_index, document in enumerate(store.documents):
+            for name in (document_key(document), document["title"], document["citation"]):
+                if name:
+                    indexes = self.documents.setdefault(name.lower(), [])
+                    if doc_index not in indexes:
+                        indexes.append(doc_index)
+
+        # The citation key of each interned citation path is computed once
+        keys = [normalize_citation(citation) if citation else "" for citation in store.citations]
+        parent = store.parent
+        citation = store.citation
+        doc = store.doc
+        for node in store.iter_nodes():
+            citation_id = citation[node]
+            # Only the topmost node carrying a citation path is its anchor
+            if not keys[citation_id] or (parent[node] != -1 and citation[parent[node]] == citation_id):
+                continue
+            location = (doc[node], keys[citation_id])
+            if location in self.by_document:
+                # A repeated section number in one document keeps its first occurrence
+                continue
+            self.by_document[location] = node
+            self.by_key.setdefault(keys[citation_id], []).append(node)
+
+    def find_documents(self, document):
+        """
+        Return the indexes of the documents matching a reference.
+
+        Args:
+            document (int or str): Document index, file name, title or citation
+                (e.g. "R.S.O. 1990, c. I.8")
+
+        Returns:
+            list: Matching document indexes (empty if none)
+        """
+        if isinstance(document, int):
+            return [document] if 0 <= document < len(self.store.documents) else []
+        return self.documents.get(document_key({"filename": document.strip()}).lower(), [])
+
+    def _hit(self, node):
+        store = self.store
+        return {
+            "node": node,
+            "id": store.node_id(node),
+            "citation_path": store.citation_path(node),
+            "title": store.document(node)["title"],
+            "type": store.node_type(node)
+        }
+
+    def resolve(self, citation, document=None):
+        """
+        Resolve a citation to the nodes it names.
+
+        Args:
+            citation (str): Citation in any lenient form
+            document (int or str, optional): Restrict to one document (see find_documents)
+
+        Returns:
+            list: Hits as dicts with node, id, citation_path, title (the
+                document title) and type; one per matching document
+        """
+        key = normalize_citation(citation)
+        if document is None:
+            return [self._hit(node) for node in self.by_key.get(key, ())]
+        nodes = (self.by_document.get((doc_index, key)) for doc_index in self.find_documents(document))
+        return [self._hit(node) for node in nodes if node is not None]
+
+    def resolve_many(self, citations, document=None):
+        """
+        Resolve several citations at once.
+
+        Args:
+            citations (iterable): Citations in any lenient form
+            document (int or str, optional): Restrict to one document
+
+        Returns:
+            dict: Hits for each distinct citation (see resolve())
+        """
+        results = {}
+        for citation in citations:
+            if citation not in results:
+                results[citation] = self.resolve(citation, document)
+        return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve citations to nodes of the scraped documents.")
+    parser.add_argument("citations", nargs="+", help='citations such as "s. 263, para. (a)" or "section 263(a)"')
+    parser.add_argument("--document", help="file name, title or citation of the document to look in")
+    args = parser.parse_args()
+
+    index = CitationIndex(load_corpus())
+    for citation, hits in index.resolve_many(args.citations, args.document).items():
+        print(f"{citation} -> {normalize_citation(citation)}")
+        if not hits:
+            print("  not found")
+        for hit in hits:
+            print(f"  {hit['citation_path']:<20} {hit['id']:<28} {hit['title']}")
+
+if __name__ == "__main__":
+    main()
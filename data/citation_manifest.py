@@ -0,0 +1,205 @@
+"""
+Generated citation lookup manifest for the chat front end.
+
+public/citation_mappings.json maps the file names the assistant cites to a
+display name and source URL. The scrapers' save steps keep it in sync: every
+document written updates its entry from metadata.title, metadata.source_url
+and the output file name. A display name that was edited by hand (it no
+longer matches the entry's title) is kept, since the titles extracted from
+FSRA PDFs are often a stray first line.
+
+Besides the entries, the manifest holds an alias table: the file name,
+title, citation, display name and source URL of every document, each
+normalized with alias_key(), point to the document's entry. The front end
+normalizes a cited file name the same way and resolves it with one hash
+lookup. Aliases shared by several documents (e.g. the common title of the
+FSRA enforcement-action forms) are left out rather than pointing at the
+wrong one.
+
+Usage:
+    python citation_manifest.py [--output ../public/citation_mappings.json]   # rebuild from the corpus
+"""
+import os
+import re
+import json
+import argparse
+import threading
+from contextlib import contextmanager
+from corpus_store import DATA_DIR, iter_corpus_files
+from json_stream import OUTPUT_FORMATS, iter_document_records
+from citation_index import document_key
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+CITATION_MAPPINGS_PATH = os.path.join(os.path.dirname(DATA_DIR), "public", "citation_mappings.json")
+# Kept out of public/, which is deployed as is
+CITATION_MAPPINGS_LOCK_PATH = os.path.join(DATA_DIR, "citation_mappings.lock")
+
+# Extensions stripped before normalizing: the document formats, plus the
+# formats a document may have been uploaded to the assistant in. Longest
+# first, so ".bin.zst" wins over a shorter suffix.
+ALIAS_EXTENSIONS = sorted(set(OUTPUT_FORMATS.values()) | {".pdf", ".txt", ".md"}, key=len, reverse=True)
+
+NON_ALPHANUMERIC = re.compile(r"[^a-z0-9]+")
+
+# Entry fields that aliases are made from
+ALIAS_FIELDS = ("filename", "title", "citation", "display_name", "source_url")
+
+_manifest_lock = threading.Lock()
+
+def alias_key(name):
+    """
+    Normalize a file name, title, citation or URL into an alias key.
+
+    The key is lowercased, loses a known extension and keeps only letters
+    and digits, so "Insurance_Act_R.S.O._1990_c._I.8.json" and
+    "Insurance Act, R.S.O. 1990, c. I.8" share the key "insuranceactrso1990ci8".
+    index.html applies the same steps (citationKey) to cited file names.
+    """
+    key = name.strip().lower()
+    for extension in ALIAS_EXTENSIONS:
+        if key.endswith(extension):
+            key = key[:-len(extension)]
+            break
+    return NON_ALPHANUMERIC.sub("", key)
+
+def mapping_entry(path, metadata, previous=None):
+    """
+    Return the manifest entry of a saved document.
+
+    Args:
+        path (str): Document file written by a scraper
+        metadata (dict): The document's metadata
+        previous (dict, optional): The document's current entry, whose
+            hand-edited display name is kept
+
+    Returns:
+        dict: filename, display_name, source_url, title and citation
+    """
+    title = metadata.get("title", "")
+    display_name = title
+    # Entries without a title predate the generated manifest and were written by hand
+    if previous and previous.get("display_name") and previous.get("display_name") != previous.get("title"):
+        display_name = previous["display_name"]
+    return {
+        "filename": os.path.basename(path),
+        "display_name": display_name,
+        "source_url": metadata.get("source_url", ""),
+        "title": title,
+        "citation": metadata.get("citation", "")
+    }
+
+def index_aliases(mappings):
+    """
+    Return the alias table of a list of entries: alias key -> entry index.
+
+    File name keys always point at their own entry; other aliases claimed
+    by more than one document are dropped.
+    """
+    aliases = {}
+    ambiguous = set()
+    for index, entry in enumerate(mappings):
+        for field in ALIAS_FIELDS[1:]:
+            key = alias_key(entry.get(field) or "")
+            if not key:
+                continue
+            if aliases.get(key, index) != index:
+                ambiguous.add(key)
+            aliases[key] = index
+    for key in ambiguous:
+        del aliases[key]
+    for index, entry in enumerate(mappings):
+        aliases[alias_key(entry["filename"])] = index
+    return dict(sorted(aliases.items()))
+
+def load_citation_mappings(path=CITATION_MAPPINGS_PATH):
+    """Return the manifest entries, or an empty list when there is no manifest yet."""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)["mappings"]
+
+def save_citation_mappings(mappings, path=CITATION_MAPPINGS_PATH):
+    """Write the entries with their alias table, replacing the manifest atomically."""
+    manifest = {
+        "extensions": ALIAS_EXTENSIONS,
+        "mappings": mappings,
+        "aliases": index_aliases(mappings)
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+@contextmanager
+def _locked():
+    with _manifest_lock, open(CITATION_MAPPINGS_LOCK_PATH, 'w') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+def _upsert(mappings, path, metadata):
+    stem = document_key({"filename": os.path.basename(path)})
+    for index, entry in enumerate(mappings):
+        # A document re-saved in another output format keeps its entry
+        if document_key(entry) == stem:
+            mappings[index] = mapping_entry(path, metadata, entry)
+            return
+    mappings.append(mapping_entry(path, metadata))
+
+def update_citation_mappings(path, metadata, manifest_path=CITATION_MAPPINGS_PATH):
+    """
+    Add or refresh the entry of a document that was just saved.
+
+    Called from the scrapers' save steps. The manifest is locked while it is
+    rewritten, so parallel saves (threads, or the orchestrator's parse
+    processes where fcntl is available) do not drop each other's entries.
+
+    Args:
+        path (str): Document file written
+        metadata (dict): The document's metadata
+        manifest_path (str): Manifest to update
+    """
+    if not os.path.isdir(os.path.dirname(manifest_path)):
+        return
+    with _locked():
+        mappings = load_citation_mappings(manifest_path)
+        _upsert(mappings, path, metadata)
+        save_citation_mappings(mappings, manifest_path)
+
+def rebuild_citation_mappings(data_dir=DATA_DIR, manifest_path=CITATION_MAPPINGS_PATH):
+    """
+    Regenerate the manifest from every document in the corpus.
+
+    Entries of documents that no longer exist are dropped; hand-edited
+    display names of the others are kept.
+
+    Returns:
+        list: The manifest entries
+    """
+    with _locked():
+        previous = {document_key(entry): entry for entry in load_citation_mappings(manifest_path)}
+        mappings = []
+        for _, path in iter_corpus_files(data_dir):
+            metadata, _ = iter_document_records(path)
+            stem = document_key({"filename": os.path.basename(path)})
+            mappings.append(mapping_entry(path, metadata, previous.get(stem)))
+        save_citation_mappings(mappings, manifest_path)
+    return mappings
+
+def main():
+    parser = argparse.ArgumentParser(description="Regenerate the citation lookup manifest from the scraped documents.")
+    parser.add_argument("--output", default=CITATION_MAPPINGS_PATH, help="manifest file to write")
+    args = parser.parse_args()
+
+    mappings = rebuild_citation_mappings(manifest_path=args.output)
+    with open(args.output, 'r', encoding='utf-8') as f:
+        aliases = json.load(f)["aliases"]
+    print(f"{len(mappings)} documents, {len(aliases)} aliases written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""
+Compact in-memory model of the scraped corpus.
+
+json.load on every file in FSRAO_docs and Ontario_docs creates a dict per
+structure node, each repeating the same keys. CorpusStore keeps the whole
+corpus in a handful of flat arrays instead:
+
+- node types and citation paths are interned into small string tables
+- the tree is kept as parent / first-child / next-sibling integer arrays,
+  with nodes numbered in document (pre-)order
+- ids, texts, titles and labels (number / letter / term) live in one UTF-8
+  buffer and are addressed by offset and length
+
+Documents are read in whichever output format they were saved in (JSON,
+NDJSON or binary, see json_stream). The store is saved as a single binary file (corpus.bin) and reloaded from it
+while the source JSON files are unchanged, so startup only reads a few large
+arrays instead of parsing megabytes of JSON. The text buffer is memory-mapped
+from that file rather than copied onto the heap.
+
+Usage:
+    python corpus_store.py    # build or refresh corpus.bin and print its stats
+"""
+import os
+import sys
+import json
+import glob
+import time
+import mmap
+import struct
+from array import array
+from json_stream import OUTPUT_FORMATS, load_document
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+COLLECTIONS = ("FSRAO_docs", "Ontario_docs")
+CORPUS_CACHE_PATH = os.path.join(DATA_DIR, "corpus.bin")
+
+MAGIC = b"LEXICORPUS1\n"
+
+# Bits of the per-node flags column
+HAS_TEXT = 1
+HAS_TITLE = 2
+HAS_CONTENT = 4
+HAS_PARAGRAPHS = 8
+LABEL_SHIFT = 4
+
+# Optional identifier stored in the label field, by the key it came from
+LABEL_KEYS = (None, "number", "letter", "term")
+
+# Integer columns, all indexed by node number
+COLUMNS = (
+    ("doc", "i"), ("type", "H"), ("citation", "i"), ("flags", "B"),
+    ("parent", "i"), ("first_child", "i"), ("next_sibling", "i"),
+    ("id_start", "I"), ("id_len", "I"),
+    ("text_start", "I"), ("text_len", "I"),
+    ("title_start", "I"), ("title_len", "I"),
+    ("label_start", "I"), ("label_len", "I"),
+)
+
+def iter_corpus_files(data_dir=DATA_DIR):
+    """
+    Yield (collection, path) for every structured document, in a stable order.
+
+    Documents may be saved in any of the output formats. When one document
+    exists in several formats, the most recently written file is used.
+    """
+    for collection in COLLECTIONS:
+        latest = {}
+        for extension in OUTPUT_FORMATS.values():
+            for path in glob.glob(os.path.join(data_dir, collection, f"*{extension}")):
+                stem = path[:-len(extension)]
+                if stem not in latest or os.path.getmtime(path) > os.path.getmtime(latest[stem]):
+                    latest[stem] = path
+        for stem in sorted(latest):
+            yield collection, latest[stem]
+
+def _source_signature(data_dir):
+    return {
+        os.path.relpath(path, data_dir): [os.path.getsize(path), os.stat(path).st_mtime_ns]
+        for _, path in iter_corpus_files(data_dir)
+    }
+
+class CorpusStore:
+    """
+    Array-backed store of every structure node in the corpus.
+
+    Nodes are integers. Use the accessor methods (node_type, text,
+    citation_path, children, ...) to read them, or to_dict() to rebuild the
+    original JSON object of a subtree.
+    """
+
+    def __init__(self):
+        self.documents = []
+        self.types = []
+        self.citations = []
+        self.buffer = b""
+        self.sources = {}
+        for name, typecode in COLUMNS:
+            setattr(self, name, array(typecode))
+
+    def __len__(self):
+        return len(self.doc)
+
+    # Building
+
+    @classmethod
+    def build(cls, data_dir=DATA_DIR):
+        """Build a store by reading every JSON document under data_dir."""
+        store = cls()
+        type_index = {}
+        citation_index = {}
+        chunks = []
+        offset = 0
+
+        def intern(table, index, value):
+            position = index.get(value)
+            if position is None:
+                position = index[value] = len(table)
+                table.append(value)
+            return position
+
+        def add_string(value):
+            nonlocal offset
+            encoded = value.encode('utf-8')
+            start = offset
+            chunks.append(encoded)
+            offset += len(encoded)
+            return start, len(encoded)
+
+        def add_node(node, doc_index, parent):
+            index = len(store.doc)
+            flags = 0
+            label = ""
+            for kind, key in enumerate(LABEL_KEYS):
+                if key and key in node:
+                    flags |= kind << LABEL_SHIFT
+                    label = node[key]
+                    break
+            if "text" in node:
+                flags |= HAS_TEXT
+            if "title" in node:
+                flags |= HAS_TITLE
+            children = node.get("content")
+            if children is not None:
+                flags |= HAS_CONTENT
+            elif "paragraphs" in node:
+                children = node["paragraphs"]
+                flags |= HAS_PARAGRAPHS
+
+            store.doc.append(doc_index)
+            store.type.append(intern(store.types, type_index, node.get("type", "")))
+            store.citation.append(intern(store.citations, citation_index, node.get("citation_path", "")))
+            store.flags.append(flags)
+            store.parent.append(parent)
+            store.first_child.append(-1)
+            store.next_sibling.append(-1)
+            for field, value in (("id", node.get("id", "")), ("text", node.get("text", "")),
+                                 ("title", node.get("title", "")), ("label", label)):
+                start, length = add_string(value)
+                getattr(store, f"{field}_start").append(start)
+                getattr(store, f"{field}_len").append(length)
+
+            previous = -1
+            for child in children or ():
+                child_index = add_node(child, doc_index, index)
+                if previous == -1:
+                    store.first_child[index] = child_index
+                else:
+                    store.next_sibling[previous] = child_index
+                previous = child_index
+            return index
+
+        for collection, path in iter_corpus_files(data_dir):
+            data = load_document(path)
+            doc_index = len(store.documents)
+            first_node = len(store.doc)
+            previous = -1
+            for node in data.get("structure", []):
+                root = add_node(node, doc_index, -1)
+                if previous != -1:
+                    store.next_sibling[previous] = root
+                previous = root
+            metadata = data.get("metadata", {})
+            store.documents.append({
+                "collection": collection,
+                "filename": os.path.basename(path),
+                "title": metadata.get("title", ""),
+                "citation": metadata.get("citation", ""),
+                "source_url": metadata.get("source_url", ""),
+                "last_updated": metadata.get("last_updated", ""),
+                "first_node": first_node,
+                "node_count": len(store.doc) - first_node
+            })
+
+        store.buffer = b"".join(chunks)
+        store.sources = _source_signature(data_dir)
+        return store
+
+    # Persistence
+
+    def save(self, path=CORPUS_CACHE_PATH):
+        """Write the store to a single binary file."""
+        header = {
+            "byteorder": sys.byteorder,
+            "documents": self.documents,
+            "types": self.types,
+            "citations": self.citations,
+            "sources": self.sources,
+            "columns": [[name, typecode, len(getattr(self, name))] for name, typecode in COLUMNS],
+            "buffer_len": len(self.buffer)
+        }
+        header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header_bytes)))
+            f.write(header_bytes)
+            for name, _ in COLUMNS:
+                getattr(self, name).tofile(f)
+            f.write(self.buffer)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=CORPUS_CACHE_PATH, use_mmap=True):
+        """
+        Read a store written by save().
+
+        Args:
+            path (str): Store file
+            use_mmap (bool): Map the text buffer from the file instead of reading it into memory
+
+        Returns:
+            CorpusStore: The loaded store
+        """
+        store = cls()
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a corpus store file")
+            header_len, = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_len).decode('utf-8'))
+            for name, typecode, length in header["columns"]:
+                column = array(typecode)
+                column.fromfile(f, length)
+                if header["byteorder"] != sys.byteorder:
+                    column.byteswap()
+                setattr(store, name, column)
+            if use_mmap and header["buffer_len"]:
+                base = f.tell()
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                store.buffer = memoryview(mapped)[base:base + header["buffer_len"]]
+            else:
+                store.buffer = f.read(header["buffer_len"])
+        store.documents = header["documents"]
+        store.types = header["types"]
+        store.citations = header["citations"]
+        store.sources = header["sources"]
+        return store
+
+    def is_fresh(self, data_dir=DATA_DIR):
+        """Return True if no source JSON file was added, removed or modified since the build."""
+        return self.sources == _source_signature(data_dir)
+
+    # Node accessors
+
+    def _string(self, field, node):
+        start = getattr(self, f"{field}_start")[node]
+        return str(self.buffer[start:start + getattr(self, f"{field}_len")[node]], 'utf-8')
+
+    def node_id(self, node):
+        return self._string("id", node)
+
+    def node_type(self, node):
+        return self.types[self.type[node]]
+
+    def citation_path(self, node):
+        return self.citations[self.citation[node]]
+
+    def text(self, node):
+        return self._string("text", node)
+
+    def title(self, node):
+        return self._string("title", node)
+
+    def label(self, node):
+        """Return the node's number, letter or term (empty if it has none)."""
+        return self._string("label", node)
+
+    def label_key(self, node):
+        """Return which key the label came from: "number", "letter", "term" or None."""
+        return LABEL_KEYS[self.flags[node] >> LABEL_SHIFT]
+
+    def document(self, node):
+        """Return the metadata dict of the document a node belongs to."""
+        return self.documents[self.doc[node]]
+
+    # Tree walking
+
+    def roots(self, doc_index):
+        """Yield the top-level structure nodes of a document (Parts or sections)."""
+        document = self.documents[doc_index]
+        node = document["first_node"] if document["node_count"] else -1
+        while node != -1:
+            yield node
+            node = self.next_sibling[node]
+
+    def children(self, node):
+        """Yield the direct children of a node."""
+        child = self.first_child[node]
+        while child != -1:
+            yield child
+            child = self.next_sibling[child]
+
+    def ancestors(self, node):
+        """Yield the parent, grandparent, ... of a node up to its top-level node."""
+        node = self.parent[node]
+        while node != -1:
+            yield node
+            node = self.parent[node]
+
+    def subtree(self, node):
+        """Return the range of node numbers of a node and all its descendants."""
+        end = node
+        while end != -1 and self.next_sibling[end] == -1:
+            end = self.parent[end]
+        if end == -1:
+            document = self.documents[self.doc[node]]
+            return range(node, document["first_node"] + document["node_count"])
+        return range(node, self.next_sibling[end])
+
+    def iter_nodes(self, doc_index=None):
+        """
+        Yield node numbers in document order.
+
+        Nodes are numbered in pre-order, so a document is a contiguous range.
+        """
+        if doc_index is None:
+            return iter(range(len(self.doc)))
+        document = self.documents[doc_index]
+        return iter(range(document["first_node"], document["first_node"] + document["node_count"]))
+
+    def to_dict(self, node):
+        """Rebuild the original JSON object for a node and its subtree."""
+        flags = self.flags[node]
+        result = {"id": self.node_id(node), "type": self.node_type(node)}
+        label_key = LABEL_KEYS[flags >> LABEL_SHIFT]
+        if label_key:
+            result[label_key] = self.label(node)
+        if flags & HAS_TITLE:
+            result["title"] = self.title(node)
+        if flags & HAS_TEXT:
+            result["text"] = self.text(node)
+        result["citation_path"] = self.citation_path(node)
+        if flags & (HAS_CONTENT | HAS_PARAGRAPHS):
+            key = "content" if flags & HAS_CONTENT else "paragraphs"
+            result[key] = [self.to_dict(child) for child in self.children(node)]
+        return result
+
+def load_corpus(data_dir=DATA_DIR, cache_path=CORPUS_CACHE_PATH):
+    """
+    Return the corpus store, reusing the binary cache when it is up to date.
+
+    Args:
+        data_dir (str): Directory containing FSRAO_docs and Ontario_docs
+        cache_path (str): Location of the binary cache, or None to always rebuild
+
+    Returns:
+        CorpusStore: The loaded store
+    """
+    if cache_path and os.path.exists(cache_path):
+        try:
+            store = CorpusStore.load(cache_path)
+            if store.is_fresh(data_dir):
+                return store
+        except (ValueError, OSError, KeyError) as e:
+            print(f"Ignoring unreadable corpus cache {cache_path}: {e}")
+
+    store = CorpusStore.build(data_dir)
+    if cache_path:
+        store.save(cache_path)
+    return store
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    corpus = load_corpus()
+    print(f"Loaded {len(corpus.documents)} documents, {len(corpus)} nodes, "
+          f"{len(corpus.types)} node types, {len(corpus.citations)} citation paths, "
+          f"{len(corpus.buffer) / 1024:.0f} KiB of text in {time.perf_counter() - started:.3f}s")
@@ -0,0 +1,337 @@
+"""
+Near-duplicate detection across the corpus with MinHash and LSH banding.
+
+Several FSRA documents overlap heavily (the "about automobile insurance
+enforcement actions" set) and the Ontario Automobile Policy repeats a lot of
+boilerplate. Every unit of text (a section with its subtree, or a single
+node) is cut into overlapping word shingles, and a MinHash signature is
+computed for all units at once with NumPy. Units that agree on every row of
+at least one signature band land in the same LSH bucket, so only those are
+compared, instead of every pair. Pairs whose estimated Jaccard similarity
+reaches the threshold are merged into clusters.
+
+Each cluster keeps one canonical node (the first in corpus order) and
+back-references to the duplicates. Index builders can leave the duplicates
+out, and collapse_hits() folds duplicate hits into their canonical hit.
+
+Usage:
+    python dedup.py [--level section|node] [--threshold 0.8]
+"""
+import os
+import json
+import zlib
+import hashlib
+import argparse
+import numpy as np
+from corpus_store import DATA_DIR, load_corpus
+
+DEDUP_PATH = os.path.join(DATA_DIR, "dedup.json")
+
+# Permutations are (a * x + b) mod p over 32-bit a, b and shingle hashes x,
+# so every intermediate value fits in uint64
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+def section_units(store):
+    """Return the section-level nodes: top-level nodes other than Parts, and the children of Parts."""
+    units = []
+    for node in store.iter_nodes():
+        parent = store.parent[node]
+        if parent == -1:
+            if store.node_type(node) != "part":
+                units.append(node)
+        elif store.node_type(parent) == "part":
+            units.append(node)
+    return units
+
+def unit_text(store, node, level):
+    """Return the text of a unit: the whole subtree for sections, the node's own text otherwise."""
+    if level == "section":
+        return " ".join(store.text(child) for child in store.subtree(node) if store.text(child))
+    return store.text(node)
+
+def shingles(text, size=5):
+    """Return the distinct 32-bit hashes of the word n-grams of a text."""
+    words = text.lower().split()
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode('utf-8'))} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + size]).encode('utf-8')) for i in range(len(words) - size + 1)}
+
+def minhash_signatures(shingle_sets, num_perm=128, seed=1, chunk_size=1 << 15):
+    """
+    Compute MinHash signatures for many shingle sets in one batch.
+
+    All shingles are laid out in one flat array; each permutation
+    (a * x + b) mod p is applied to chunks of it and the minimum per set is
+    taken with np.minimum.reduceat.
+
+    Args:
+        shingle_sets (list): Sets of shingle hashes (non-empty)
+        num_perm (int): Signature length
+
+    Returns:
+        ndarray: (sets, num_perm) uint32 signatures
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    lengths = np.array([len(s) for s in shingle_sets], dtype=np.int64)
+    flat = np.fromiter((h for s in shingle_sets for h in s), dtype=np.uint64, count=int(lengths.sum()))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    signatures = np.empty((len(shingle_sets), num_perm), dtype=np.uint32)
+
+    # Chunks are cut at set boundaries so every reduceat run lies within one chunk
+    first = 0
+    while first < len(shingle_sets):
+        last = int(np.searchsorted(starts, starts[first] + chunk_size, side='right'))
+        last = max(last, first + 1)
+        begin = starts[first]
+        end = starts[last] if last < len(starts) else len(flat)
+        hashed = (flat[begin:end, None] * a + b) % MERSENNE_PRIME & MAX_HASH
+        signatures[first:last] = np.minimum.reduceat(hashed, starts[first:last] - begin, axis=0)
+        first = last
+    return signatures
+
+def lsh_candidates(signatures, bands=16):
+    """
+    Yield groups of set indexes that share all rows of some signature band.
+
+    Args:
+        signatures (ndarray): (sets, num_perm) MinHash signatures
+        bands (int): Number of bands; num_perm must be divisible by it
+
+    Yields:
+        ndarray: Indexes of the sets in one bucket (two or more)
+    """
+    rows = signatures.shape[1] // bands
+    for band in range(bands):
+        block = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        keys = block.view(np.dtype((np.void, block.dtype.itemsize * rows))).ravel()
+        _, bucket, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        shared = np.flatnonzero(counts[bucket] > 1)
+        if not len(shared):
+            continue
+        order = shared[np.argsort(bucket[shared], kind='stable')]
+        boundaries = np.flatnonzero(np.diff(bucket[order])) + 1
+        yield from np.split(order, boundaries)
+
+def resolve_build_options(level="section", threshold=0.8, num_perm=128, bands=16, shingle_size=5, min_words=8):
+    """Return the full set of DuplicateIndex.build() parameters, defaults filled in, as saved with the clusters."""
+    return {"level": level, "threshold": threshold, "num_perm": num_perm, "bands": bands,
+            "shingle_size": shingle_size, "min_words": min_words}
+
+class DuplicateIndex:
+    """
+    Clusters of near-duplicate units, each with a canonical node.
+
+    Args:
+        store (CorpusStore): Corpus the node numbers refer to
+        clusters (list): Lists of node numbers, canonical node first
+        level (str): "section" or "node"
+        options (dict, optional): Build parameters (see resolve_build_options())
+    """
+
+    def __init__(self, store, clusters, level="section", sources=None, options=None):
+        self.store = store
+        self.clusters = clusters
+        self.level = level
+        self.options = options if options is not None else resolve_build_options(level)
+        self.sources = sources if sources is not None else store.sources
+        # Duplicate -> canonical node, and canonical node -> its duplicates
+        self.canonical = {}
+        self.copies = {}
+        for cluster in clusters:
+            self.copies[cluster[0]] = cluster[1:]
+            for node in cluster[1:]:
+                self.canonical[node] = cluster[0]
+
+    @classmethod
+    def build(cls, store, level="section", threshold=0.8, num_perm=128, bands=16, shingle_size=5, min_words=8):
+        """
+        Find near-duplicate units in the corpus.
+
+        Args:
+            store (CorpusStore): Corpus to scan
+            level (str): "section" compares whole sections, "node" single nodes
+            threshold (float): Minimum estimated Jaccard similarity of duplicates
+            num_perm (int): MinHash signature length
+            bands (int): LSH bands (with 128/16, pairs above ~0.7 become candidates)
+            shingle_size (int): Words per shingle
+            min_words (int): Shorter units are ignored
+
+        Returns:
+            DuplicateIndex: The clusters
+        """
+        options = resolve_build_options(level, threshold, num_perm, bands, shingle_size, min_words)
+        candidates = section_units(store) if level == "section" else list(store.iter_nodes())
+        units, shingle_sets = [], []
+        for node in candidates:
+            text = unit_text(store, node, level)
+            if len(text.split()) < min_words:
+                continue
+            units.append(node)
+            shingle_sets.append(shingles(text, shingle_size))
+        if not units:
+            return cls(store, [], level, options=options)
+
+        signatures = minhash_signatures(shingle_sets, num_perm)
+
+        # Union-find over the verified pairs; bucket members are checked
+        # against the bucket's first member, so large buckets stay linear
+        parent = list(range(len(units)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for bucket in lsh_candidates(signatures, bands):
+            head = bucket[0]
+            similarity = (signatures[bucket[1:]] == signatures[head]).mean(axis=1)
+            for member in bucket[1:][similarity >= threshold]:
+                root_a, root_b = find(head), find(int(member))
+                if root_a != root_b:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        groups = {}
+        for i in range(len(units)):
+            groups.setdefault(find(i), []).append(units[i])
+        clusters = sorted(sorted(group) for group in groups.values() if len(group) > 1)
+        return cls(store, clusters, level, options=options)
+
+    def save(self, path=DEDUP_PATH):
+        """Write the clusters to a JSON file."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"level": self.level, "options": self.options, "sources": self.sources,
+                       "clusters": self.clusters}, f)
+
+    @classmethod
+    def load(cls, store, path=DEDUP_PATH):
+        """Read clusters written by save()."""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        # Clusters saved without their build parameters never match, so they are rebuilt
+        return cls(store, data["clusters"], data["level"], data["sources"], data.get("options", {}))
+
+    def signature(self):
+        """Return a short hash of the clusters, saved by the indexes built without the duplicates."""
+        encoded = json.dumps([self.level, self.clusters], separators=(",", ":"))
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:16]
+
+    def canonical_node(self, node):
+        """Return the canonical node of a unit (the node itself if it is not a duplicate)."""
+        return self.canonical.get(node, node)
+
+    def duplicates_of(self, node):
+        """Return the back-references of a canonical node: the units that duplicate it."""
+        return self.copies.get(node, [])
+
+    def duplicate_nodes(self):
+        """
+        Return every node that an index can leave out.
+
+        For section-level clusters this is the whole subtree of each duplicate section.
+        """
+        excluded = set()
+        for node in self.canonical:
+            excluded.update(self.store.subtree(node) if self.level == "section" else (node,))
+        return excluded
+
+    def collapse_hits(self, hits):
+        """
+        Fold hits on duplicate units into the hit on their canonical unit.
+
+        Args:
+            hits (list): Hit dicts with a "node" key, best first
+
+        Returns:
+            list: Hits with at most one per cluster; each has "duplicates",
+                the (citation_path, title) of the other copies
+        """
+        store = self.store
+        unit_of = self._unit_of
+        collapsed = set()
+        result = []
+        for hit in hits:
+            unit = unit_of(hit["node"])
+            canonical = self.canonical_node(unit)
+            if canonical in collapsed:
+                continue
+            collapsed.add(canonical)
+            copies = [canonical] + self.duplicates_of(canonical)
+            hit = dict(hit)
+            hit["duplicates"] = [
+                {"citation_path": store.citation_path(copy), "title": store.document(copy)["title"]}
+                for copy in copies if copy != unit
+            ]
+            result.append(hit)
+        return result
+
+    def _unit_of(self, node):
+        if self.level != "section":
+            return node
+        for ancestor in (node, *self.store.ancestors(node)):
+            if ancestor in self.canonical or ancestor in self.copies:
+                return ancestor
+        return node
+
+def load_duplicate_index(path=DEDUP_PATH, store=None, **build_options):
+    """
+    Return the duplicate clusters, rebuilding them when missing, when the corpus has changed
+    or when they were built with other parameters.
+
+    Args:
+        path (str): JSON file holding the clusters
+        store (CorpusStore, optional): Corpus; loaded with load_corpus() by default
+        **build_options: Passed to DuplicateIndex.build() when rebuilding
+    """
+    if store is None:
+        store = load_corpus()
+    if os.path.exists(path):
+        index = DuplicateIndex.load(store, path)
+        if index.sources == store.sources and index.options == resolve_build_options(**build_options):
+            return index
+
+    index = DuplicateIndex.build(store, **build_options)
+    index.save(path)
+    return index
+
+def dedup_exclusion(store, enabled=True):
+    """
+    Return the nodes an index build leaves out, and the signature of that set.
+
+    Args:
+        store (CorpusStore): Corpus being indexed
+        enabled (bool): False indexes every node
+
+    Returns:
+        tuple: (excluded node set or None, DuplicateIndex.signature() or None)
+    """
+    if not enabled:
+        return None, None
+    duplicates = load_duplicate_index(store=store)
+    return duplicates.duplicate_nodes(), duplicates.signature()
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate sections across the scraped documents.")
+    parser.add_argument("--level", choices=["section", "node"], default="section", help="unit of comparison")
+    parser.add_argument("--threshold", type=float, default=0.8, help="minimum estimated Jaccard similarity")
+    args = parser.parse_args()
+
+    store = load_corpus()
+    index = DuplicateIndex.build(store, level=args.level, threshold=args.threshold)
+    index.save()
+
+    duplicates = sum(len(cluster) - 1 for cluster in index.clusters)
+    saved = sum(len(unit_text(store, node, args.level)) for node in index.canonical)
+    print(f"{len(index.clusters)} clusters, {duplicates} duplicate {args.level}s, "
+          f"{saved / 1024:.0f} KiB of repeated text")
+    for cluster in sorted(index.clusters, key=len, reverse=True)[:10]:
+        canonical = cluster[0]
+        print(f"  {len(cluster)}x {store.citation_path(canonical):<12} {store.document(canonical)['title'][:50]!r}: "
+              f"{unit_text(store, canonical, args.level)[:60]!r}")
+
+if __name__ == "__main__":
+    main()
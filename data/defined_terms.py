@@ -0,0 +1,219 @@
+"""
+Dictionary of the terms defined in the corpus and a matcher that links them in text.
+
+Every definition node ("“motor vehicle” includes a street car ...") gives one
+or more defined terms. The terms are compiled into a single Aho-Corasick
+automaton over word tokens, so finding every occurrence of every term in a
+section is one pass over its words, however many terms are defined. Matches
+are linked to the defining node, preferring the definition in the same
+document.
+
+Usage:
+    python defined_terms.py "s. 1" --document "R.S.O. 1990, c. H.8"
+    python defined_terms.py --text "The driver of a motor vehicle on a highway ..."
+"""
+import re
+import time
+import argparse
+from collections import deque
+from corpus_store import load_corpus
+
+WORD_PATTERN = re.compile(r"\w+(?:-\w+)*")
+
+# Definitions open with the quoted term(s) followed by "means", "includes", ...;
+# French equivalents in parentheses at the end are not followed by a verb
+LEADING_TERMS = re.compile(r'^\s*((?:[“"][^”"]{1,80}[”"]\s*(?:,|\bor\b|\band\b)?\s*)+)(?=means|includes|has\b|have\b|does\b)')
+INLINE_TERM = re.compile(r'(?:^|\s)[“"]([^”"]{1,80})[”"]\s+(?:means|includes)\b')
+QUOTED = re.compile(r'[“"]([^”"]+)[”"]')
+
+def term_tokens(text):
+    """Return the lowercase word tokens of a term or text."""
+    return WORD_PATTERN.findall(text.lower())
+
+def definition_terms(text):
+    """
+    Return the terms a definition's text defines, in order.
+
+    Handles curly and straight quotes, several terms sharing a definition
+    ("“x” or “y” means ...") and a second definition in the same sentence
+    ("“driver” includes ... and “vehicle” includes ...").
+    """
+    terms = []
+    head = LEADING_TERMS.match(text)
+    if head:
+        terms.extend(QUOTED.findall(head.group(1)))
+    for term in INLINE_TERM.findall(text):
+        if term not in terms:
+            terms.append(term)
+    return [term.strip() for term in terms if term.strip()]
+
+class TermAutomaton:
+    """
+    Aho-Corasick automaton over word tokens.
+
+    Patterns are token tuples. find() reports every occurrence of every
+    pattern in one left-to-right pass over a token sequence.
+    """
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        # (pattern length, pattern key) for every pattern ending in a state
+        self.output = [[]]
+
+        for key, tokens in patterns:
+            state = 0
+            for token in tokens:
+                next_state = self.goto[state].get(token)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][token] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = next_state
+            self.output[state].append((len(tokens), key))
+
+        # Breadth-first: a state's failure link is the longest proper suffix
+        # that is also a path from the root
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(token, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def find(self, tokens):
+        """Yield (first token index, last token index, key) for every pattern occurrence."""
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        state = 0
+        for i, token in enumerate(tokens):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for length, key in output[state]:
+                yield i - length + 1, i, key
+
+class TermDictionary:
+    """
+    The defined terms of a corpus and the nodes that define them.
+
+    Args:
+        store (CorpusStore): Corpus to read definitions from
+        plurals (bool): Also match the plural of each term ("automobiles")
+    """
+
+    def __init__(self, store, plurals=True):
+        self.store = store
+        # Lowercase term -> defining nodes, in corpus order
+        self.terms = {}
+        for node in store.iter_nodes():
+            if store.node_type(node) != "definition":
+                continue
+            terms = [store.label(node)] if store.label_key(node) == "term" else definition_terms(store.text(node))
+            for term in terms:
+                self.terms.setdefault(term.lower(), []).append(node)
+
+        patterns = []
+        for term in self.terms:
+            tokens = tuple(term_tokens(term))
+            if not tokens:
+                continue
+            patterns.append((term, tokens))
+            if plurals and not tokens[-1].endswith("s"):
+                patterns.append((term, tokens[:-1] + (tokens[-1] + "s",)))
+        self.automaton = TermAutomaton(patterns)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def definition_node(self, term, doc_index=None):
+        """Return the node defining a term, preferring the definition in doc_index."""
+        nodes = self.terms.get(term.lower())
+        if not nodes:
+            return None
+        if doc_index is not None:
+            for node in nodes:
+                if self.store.doc[node] == doc_index:
+                    return node
+        return nodes[0]
+
+    def find_terms(self, text, doc_index=None):
+        """
+        Find the defined terms used in a text.
+
+        Overlapping matches are resolved leftmost-longest, so "motor vehicle"
+        is reported rather than "vehicle" inside it.
+
+        Args:
+            text (str): Text to scan
+            doc_index (int, optional): Document the text comes from, whose
+                own definitions take precedence
+
+        Returns:
+            list: Matches as dicts with start and end (character offsets in
+                text), term, node (the defining node) and citation_path
+        """
+        words = list(WORD_PATTERN.finditer(text.lower()))
+        if not words:
+            return []
+        candidates = sorted(
+            self.automaton.find([word.group() for word in words]),
+            key=lambda match: (match[0], -match[1])
+        )
+
+        matches = []
+        next_free = 0
+        for first, last, term in candidates:
+            if first < next_free:
+                continue
+            node = self.definition_node(term, doc_index)
+            matches.append({
+                "start": words[first].start(),
+                "end": words[last].end(),
+                "term": term,
+                "node": node,
+                "citation_path": self.store.citation_path(node)
+            })
+            next_free = last + 1
+        return matches
+
+    def link_node(self, node):
+        """Find the defined terms used in a node's text, with its own document's definitions first."""
+        return self.find_terms(self.store.text(node), self.store.doc[node])
+
+def main():
+    parser = argparse.ArgumentParser(description="Find defined terms in a section or a piece of text.")
+    parser.add_argument("citation", nargs="?", help='section to scan, e.g. "s. 1"')
+    parser.add_argument("--document", help="file name, title or citation of the section's document")
+    parser.add_argument("--text", help="scan this text instead of a section")
+    args = parser.parse_args()
+
+    store = load_corpus()
+    started = time.perf_counter()
+    dictionary = TermDictionary(store)
+    print(f"{len(dictionary)} defined terms compiled in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    if args.text:
+        sources = [(args.text, None)]
+    elif args.citation:
+        from citation_index import CitationIndex
+        sources = []
+        for hit in CitationIndex(store).resolve(args.citation, args.document):
+            sources.extend((store.text(node), store.doc[node]) for node in store.subtree(hit["node"]))
+    else:
+        parser.error("give a citation or --text")
+
+    for text, doc_index in sources:
+        for match in dictionary.find_terms(text, doc_index):
+            print(f"  {text[match['start']:match['end']]!r:<32} -> {match['term']!r} ({match['citation_path']})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+def resolve_driver_path():
+    """Resolve the chromedriver binary once per process and reuse the path."""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+    return _driver_path
+
+def headless_chrome_options():
+    """Return the headless Chrome options used for scraping Ontario Laws pages."""
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")  # Run in headless mode
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument(f"--user-agent={USER_AGENT}")
+    return chrome_options
+
+def new_chrome_driver(chrome_options=None):
+    """Start a Chrome webdriver using the cached driver binary path."""
+    if chrome_options is None:
+        chrome_options = headless_chrome_options()
+    return webdriver.Chrome(
+        service=Service(resolve_driver_path()),
+        options=chrome_options
+    )
+
+def driver_is_alive(driver):
+    """Return True if the browser behind the driver still answers commands."""
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+class DriverPool:
+    """
+    A fixed-size pool of long-lived Chrome drivers.
+
+    Drivers are started lazily, handed out one task at a time and recycled
+    (quit and replaced) after `recycle_after` pages or as soon as a task
+    leaves the browser unresponsive, so memory stays bounded on long runs.
+
+    Args:
+        size (int): Number of drivers (and worker threads) in the pool
+        recycle_after (int): Pages a driver may load before it is replaced
+        options_factory (callable): Called with the slot index, returns the
+            Chrome options for that slot. Defaults to headless options.
+    """
+
+    def __init__(self, size=3, recycle_after=25, options_factory=None):
+        self.size = max(1, size)
+        self.recycle_after = recycle_after
+        self.options_factory = options_factory or (lambda slot: headless_chrome_options())
+        self._slots = queue.Queue()
+        self._drivers = [None] * self.size
+        self._pages = [0] * self.size
+        for slot in range(self.size):
+            self._slots.put(slot)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _driver_for(self, slot):
+        if self._drivers[slot] is None:
+            self._drivers[slot] = new_chrome_driver(self.options_factory(slot))
+            self._pages[slot] = 0
+        return self._drivers[slot]
+
+    def _recycle(self, slot):
+        driver = self._drivers[slot]
+        self._drivers[slot] = None
+        self._pages[slot] = 0
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def run_task(self, task, item):
+        """
+        Run `task(driver, slot, item)` on a free driver from the pool.
+
+        Args:
+            task (callable): Function taking (driver, slot, item)
+            item: The work item, e.g. a URL
+
+        Returns:
+            Whatever `task` returns
+        """
+        slot = self._slots.get()
+        try:
+            driver = self._driver_for(slot)
+            try:
+                result = task(driver, slot, item)
+            except WebDriverException:
+                self._recycle(slot)
+                raise
+            except Exception:
+                # The task failed on its own terms, but the browser may have died with it
+                if not driver_is_alive(driver):
+                    print(f"Driver {slot} crashed, recycling")
+                    self._recycle(slot)
+                raise
+            self._pages[slot] += 1
+            if self._pages[slot] >= self.recycle_after:
+                print(f"Recycling driver {slot} after {self._pages[slot]} pages")
+                self._recycle(slot)
+            elif not driver_is_alive(driver):
+                # A task can return a result and still leave a crashed browser behind
+                print(f"Driver {slot} crashed, recycling")
+                self._recycle(slot)
+            return result
+        finally:
+            self._slots.put(slot)
+
+    def map(self, task, items):
+        """
+        Run `task` over all items concurrently, one item per driver at a time.
+
+        Args:
+            task (callable): Function taking (driver, slot, item)
+            items (list): Work items, e.g. URLs
+
+        Returns:
+            list: Results in the same order as `items` (None for failed items)
+        """
+        def run_one(item):
+            try:
+                return self.run_task(task, item)
+            except Exception as e:
+                print(f"Task for {item} failed: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            return list(executor.map(run_one, items))
+
+    def close(self):
+        """Quit every driver in the pool."""
+        for slot in range(self.size):
+            self._recycle(slot)
@@ -1,20 +1,25 @@
 import os
-import json
 import time
-import requests
 import re
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 import PyPDF2
 import uuid
+from collections import deque
+from itertools import chain, islice
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from driver_pool import DriverPool
+from json_stream import open_document_writer, write_document
+from scrape_manifest import ScrapeManifest, get_session, sha256_file, unique_urls
+from snapshot_cache import SnapshotCache
+from citation_manifest import update_citation_mappings
 
-def setup_driver():
-    """Set up and return a configured Chrome webdriver."""
-    download_dir = os.path.join(os.getcwd(), "downloads")
-    os.makedirs(download_dir, exist_ok=True)
-    
+DOWNLOAD_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "downloads")
+
+# Suffixes Chrome uses for downloads that are still in progress
+PARTIAL_DOWNLOAD_SUFFIXES = ('.crdownload', '.tmp', '.part')
+
+def download_chrome_options(download_dir):
+    """Return Chrome options that save PDFs straight into download_dir."""
     chrome_options = Options()
     prefs = {
         "download.default_directory": download_dir,
@@ -22,57 +27,184 @@ def setup_driver():
         "plugins.always_open_pdf_externally": True
     }
     chrome_options.add_experimental_option("prefs", prefs)
+    return chrome_options
+
+def worker_download_dir(slot):
+    """Return (and create) the private download directory for a worker slot."""
+    download_dir = os.path.join(DOWNLOAD_ROOT, f"worker_{slot}")
+    os.makedirs(download_dir, exist_ok=True)
+    return download_dir
+
+def wait_for_download(download_dir, known_files=(), timeout=60, poll_interval=0.2):
+    """
+    Wait until a new PDF in download_dir has finished downloading.
+    
+    A download counts as finished once no partial (.crdownload) file is left
+    and the PDF's size has stayed the same across two consecutive polls.
+    
+    Args:
+        download_dir (str): Directory Chrome is downloading into
+        known_files (iterable): File names that existed before the download started
+        timeout (float): Seconds to wait before giving up
+        poll_interval (float): Seconds between directory checks
+        
+    Returns:
+        str: Path to the completed PDF
+        
+    Raises:
+        TimeoutError: If no completed PDF appears within the timeout
+    """
+    known_files = set(known_files)
+    deadline = time.monotonic() + timeout
+    last_size = None
     
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+    while time.monotonic() < deadline:
+        new_files = [f for f in os.listdir(download_dir) if f not in known_files]
+        in_progress = any(f.endswith(PARTIAL_DOWNLOAD_SUFFIXES) for f in new_files)
+        pdfs = [f for f in new_files if f.endswith('.pdf')]
+        
+        if pdfs and not in_progress:
+            path = os.path.join(download_dir, pdfs[0])
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                size = None
+            if size and size == last_size:
+                return path
+            last_size = size
+        else:
+            last_size = None
+        
+        time.sleep(poll_interval)
     
-    return driver, download_dir
+    raise TimeoutError(f"Download in {download_dir} did not finish within {timeout}s")
 
-def download_pdf(driver, url, download_dir):
+def download_pdf(driver, url, download_dir, timeout=60):
     """Download PDF from the URL using Selenium."""
+    known_files = set(os.listdir(download_dir))
     driver.get(url)
     
     # Generate a unique filename based on URL
     filename = f"{uuid.uuid4().hex}.pdf"
     filepath = os.path.join(download_dir, filename)
     
-    # Wait for download to complete
-    time.sleep(5)  # Simple wait
-    
-    # If Selenium download doesn't work, try direct download
-    if not any(file.endswith('.pdf') for file in os.listdir(download_dir)):
+    # Wait for this download to complete
+    try:
+        downloaded = wait_for_download(download_dir, known_files, timeout=timeout)
+        os.rename(downloaded, filepath)
+    except TimeoutError:
+        # If Selenium download doesn't work, try direct download
         print(f"Selenium download failed for {url}, trying direct download")
-        response = requests.get(url)
-        with open(filepath, 'wb') as f:
-            f.write(response.content)
-    else:
-        # Rename the downloaded file
-        for file in os.listdir(download_dir):
-            if file.endswith('.pdf'):
-                os.rename(os.path.join(download_dir, file), filepath)
-                break
+        response = get_session().get(url, timeout=timeout)
+        response.raise_for_status()
+        try:
+            with open(filepath, 'wb') as f:
+                f.write(response.content)
+        except Exception:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            raise
     
     return filepath
 
-def extract_text_from_pdf(pdf_path):
-    """Extract text from a PDF file with page separation."""
-    pages = []
-    try:
+# Below this many pages, starting a process pool costs more than it saves
+PARALLEL_EXTRACTION_MIN_PAGES = 24
+
+def _extract_page_range(pdf_path, start, stop):
+    """Extract text for pages [start, stop). Returns (page_num, text, seconds) tuples."""
+    results = []
+    with open(pdf_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        for page_num in range(start, stop):
+            started = time.perf_counter()
+            page_text = reader.pages[page_num].extract_text()
+            results.append((page_num, page_text, time.perf_counter() - started))
+    return results
+
+def page_ranges(page_count, parts):
+    """Split page_count pages into at most `parts` contiguous (start, stop) ranges."""
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for part in range(parts):
+        stop = start + size + (1 if part < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+def iter_page_results(pdf_path, workers=None, min_parallel_pages=PARALLEL_EXTRACTION_MIN_PAGES):
+    """
+    Yield (page_num, text, seconds) for every page of a PDF, in page order.
+    
+    Small files are extracted serially. Larger ones are cut into a few ranges
+    per worker so slow pages do not hold up a whole worker. Only a bounded
+    window of ranges is in flight at a time, so pages are produced lazily
+    instead of all being held in memory.
+    
+    Args:
+        pdf_path (str): Path to the PDF
+        workers (int, optional): Process count, defaults to the CPU count
+        min_parallel_pages (int): Page count below which extraction stays serial
+    """
+    with open(pdf_path, 'rb') as file:
+        page_count = len(PyPDF2.PdfReader(file).pages)
+    
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or page_count < min_parallel_pages:
         with open(pdf_path, 'rb') as file:
             reader = PyPDF2.PdfReader(file)
-            for page_num in range(len(reader.pages)):
+            for page_num in range(page_count):
+                started = time.perf_counter()
                 page_text = reader.pages[page_num].extract_text()
-                pages.append(page_text)
+                yield page_num, page_text, time.perf_counter() - started
+        return
+    
+    ranges = deque(page_ranges(page_count, workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        while ranges or in_flight:
+            while ranges and len(in_flight) < workers * 2:
+                start, stop = ranges.popleft()
+                in_flight.append(executor.submit(_extract_page_range, pdf_path, start, stop))
+            yield from in_flight.popleft().result()
+
+def iter_pdf_pages(pdf_path, workers=None):
+    """
+    Lazily yield the text of each PDF page, in order.
+    
+    A page that fails to extract is logged and ends the iteration, so the
+    pages before it are still parsed and saved. Once the pages run out, the
+    total time, the average time per page and the slowest page are printed.
+    """
+    timings = []
+    started = time.perf_counter()
+    try:
+        for _, page_text, seconds in iter_page_results(pdf_path, workers):
+            timings.append(seconds)
+            yield page_text
     except Exception as e:
-        print(f"Error extracting text from PDF: {e}")
+        # Pages arrive in order, so the first one missing is where extraction failed
+        print(f"Error extracting text from PDF at page {len(timings) + 1}: {e}")
     
-    return pages
+    if timings:
+        slowest = max(range(len(timings)), key=timings.__getitem__)
+        print(f"Extracted {len(timings)} pages in {time.perf_counter() - started:.2f}s "
+              f"(avg {sum(timings) / len(timings) * 1000:.1f} ms/page, "
+              f"slowest page {slowest + 1}: {timings[slowest] * 1000:.1f} ms)")
 
-def parse_pdf_structure(pages):
-    """Parse PDF pages into a structured format with sections and content."""
-    # Initialize the structure
-    structure = []
+def extract_text_from_pdf(pdf_path, workers=None):
+    """Extract text from a PDF file with page separation."""
+    return list(iter_pdf_pages(pdf_path, workers))
+
+def iter_pdf_sections(pages):
+    """
+    Parse PDF pages into sections, yielding each section as soon as the next
+    heading (or the end of the document) closes it.
     
+    Args:
+        pages (iterable): Page texts, e.g. a lazy iter_pdf_pages() generator
+    """
     # Regular expressions for section identification
     section_pattern = re.compile(r'^Section\s+(\d+(?:\.\d+)?)\s*[-–:]\s*(.+?)$', re.MULTILINE)
     subsection_pattern = re.compile(r'^(\d+(?:\.\d+)?)\s+(.+?)$', re.MULTILINE)
@@ -91,16 +223,16 @@ def parse_pdf_structure(pages):
             # Check if this is a new section
             section_match = section_pattern.match(line)
             if section_match:
-                # If we were building a section, add it to the structure
+                # If we were building a section, emit it
                 if current_section:
-                    structure.append({
+                    yield {
                         "id": f"section_{current_section['number'].replace('.', '_')}",
                         "type": "section",
                         "number": current_section['number'],
                         "title": current_section['title'],
                         "citation_path": f"s. {current_section['number']}",
                         "content": section_content
-                    })
+                    }
                     section_content = []
                 
                 # Start a new section
@@ -150,16 +282,18 @@ def parse_pdf_structure(pages):
     
     # Add the last section if there is one
     if current_section:
-        structure.append({
+        yield {
             "id": f"section_{current_section['number'].replace('.', '_')}",
             "type": "section",
             "number": current_section['number'],
             "title": current_section['title'],
             "citation_path": f"s. {current_section['number']}",
             "content": section_content
-        })
-    
-    return structure
+        }
+
+def parse_pdf_structure(pages):
+    """Parse PDF pages into a structured format with sections and content."""
+    return list(iter_pdf_sections(pages))
 
 def extract_metadata(pages):
     """Extract metadata from the PDF pages with improved title detection."""
@@ -295,6 +429,37 @@ def extract_metadata(pages):
         "source_url": ""  # To be filled later
     }
 
+def fallback_section(pages):
+    """
+    Build a single section holding every non-blank line of the document.
+    
+    Used when no "Section N - Title" headings were found. Pages are consumed
+    one at a time, so they can come from a lazy generator.
+    """
+    title = None
+    content = []
+    for page_text in pages:
+        for line in page_text.split('\n'):
+            # The first line of the document doubles as the section title
+            if title is None:
+                title = line
+            if line.strip():
+                content.append({
+                    "id": f"section_1_text_{len(content)}",
+                    "type": "paragraph" if len(line) < 300 else "section",
+                    "text": line,
+                    "citation_path": "s. 1"
+                })
+    
+    return {
+        "id": "section_1",
+        "type": "section",
+        "number": "1",
+        "title": (title or "")[:100],  # Truncate if too long
+        "citation_path": "s. 1",
+        "content": content
+    }
+
 def process_pdf_to_structured_json(pdf_path, url):
     """Process PDF into a structured JSON format similar to Ontario law documents."""
     pages = extract_text_from_pdf(pdf_path)
@@ -305,32 +470,7 @@ def process_pdf_to_structured_json(pdf_path, url):
     # If no sections were found or structure is too small, try a simpler approach
     if not structure or len(structure) <= 1:
         # Create a single section containing all content
-        combined_text = "\n".join(pages)
-        
-        # Try to find a title or use first few words
-        title_match = re.search(r'^(.*?)$', combined_text, re.MULTILINE)
-        title = title_match.group(1) if title_match else "Document Content"
-        
-        # Split into paragraphs
-        paragraphs = [p for p in combined_text.split('\n') if p.strip()]
-        
-        content = []
-        for i, para in enumerate(paragraphs):
-            content.append({
-                "id": f"section_1_text_{i}",
-                "type": "paragraph" if len(para) < 300 else "section",
-                "text": para,
-                "citation_path": "s. 1"
-            })
-        
-        structure = [{
-            "id": "section_1",
-            "type": "section",
-            "number": "1",
-            "title": title[:100],  # Truncate if too long
-            "citation_path": "s. 1",
-            "content": content
-        }]
+        structure = [fallback_section(pages)]
     
     # Extract metadata
     metadata = extract_metadata(pages)
@@ -344,11 +484,8 @@ def process_pdf_to_structured_json(pdf_path, url):
     
     return data
 
-def save_json_for_url(data, url):
-    """Save data to a JSON file in the FSRAO_docs subfolder using the document title."""
-    # Get the document title from metadata
-    title = data["metadata"]["title"]
-    
+def output_path_for_url(title, url):
+    """Return the FSRAO_docs JSON path for a document title and its source URL."""
     # Create a safe filename from the title
     safe_title = re.sub(r'[^\w\s-]', '', title).strip().lower()
     safe_title = re.sub(r'[-\s]+', '_', safe_title)
@@ -371,60 +508,245 @@ def save_json_for_url(data, url):
     url_id = url.split('/')[-2]
     
     # Create full path for the output file
-    filename = os.path.join(output_dir, f"{safe_title}_{url_id}.json")
+    return os.path.join(output_dir, f"{safe_title}_{url_id}.json")
+
+def save_json_for_url(data, url, output_format="json"):
+    """Save data in the FSRAO_docs subfolder using the document title, as JSON by default, and update the citation manifest."""
+    # Get the document title from metadata
+    filename = output_path_for_url(data["metadata"]["title"], url)
+    path = write_document(data, filename, output_format, indent=4)
+    update_citation_mappings(path, data["metadata"])
+    return path
+
+def stream_pdf_to_json_file(pdf_path, url, workers=None, output_format="json"):
+    """
+    Parse a PDF and write its structured JSON without holding the whole document.
+    
+    Pages are extracted lazily and each section is written to disk as soon as
+    the next heading closes it, so peak memory depends on the largest section
+    rather than the whole document. The output is identical to
+    save_json_for_url(process_pdf_to_structured_json(pdf_path, url), url).
+    
+    Args:
+        pdf_path (str): Path to the downloaded PDF
+        url (str): Source URL
+        workers (int, optional): Processes used for page extraction
+        output_format (str): "json", "ndjson" or "binary" (see json_stream.OUTPUT_FORMATS)
+        
+    Returns:
+        str: Path of the document file written
+    """
+    pages = iter_pdf_pages(pdf_path, workers)
+    
+    # Metadata only looks at the first two pages
+    head = list(islice(pages, 2))
+    metadata = extract_metadata(head)
+    metadata["source_url"] = url
     
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+    filename = output_path_for_url(metadata["title"], url)
     
-    return filename
+    # Pages read before the second section are kept for the fallback below,
+    # so the PDF is never extracted twice
+    buffered = list(head)
+    buffering = True
+    
+    def buffer_pages(pages):
+        for page_text in pages:
+            if buffering:
+                buffered.append(page_text)
+            yield page_text
+    
+    sections = iter_pdf_sections(chain(head, buffer_pages(pages)))
+    
+    # A document with at most one section falls back to a single section of
+    # all its lines, so the first section is held until a second one arrives
+    first_section = next(sections, None)
+    second_section = next(sections, None)
+    buffering = False
+    
+    with open_document_writer(filename, metadata, output_format, indent=4) as writer:
+        if second_section is None:
+            first_section = None
+            writer.write_section(fallback_section(buffered))
+        else:
+            buffered.clear()
+            writer.write_section(first_section)
+            writer.write_section(second_section)
+            first_section = second_section = None
+            for section in sections:
+                writer.write_section(section)
+    
+    update_citation_mappings(writer.path, metadata)
+    return writer.path
 
-def main():
-    urls = [
-        "https://www.fsrao.ca/media/7726/download",
-        "https://www.fsrao.ca/media/14931/download",
-        "https://www.fsrao.ca/media/7351/download",
-        "https://www.fsrao.ca/media/7371/download",
-        "https://www.fsrao.ca/media/6941/download",
-        "https://www.fsrao.ca/media/7081/download",
-        "https://www.fsrao.ca/media/7091/download",
-        "https://www.fsrao.ca/media/7211/download",
-        "https://www.fsrao.ca/media/7681/download",
-        "https://www.fsrao.ca/media/7686/download",
-        "https://www.fsrao.ca/media/7716/download",
-        "https://www.fsrao.ca/media/7721/download",
-        "https://www.fsrao.ca/media/7726/download",
-        "https://www.fsrao.ca/media/7731/download",
-        "https://www.fsrao.ca/media/1606/download",
-        "https://www.fsrao.ca/media/15261/download",
-        "https://www.fsrao.ca/media/26021/download",
-        "https://www.fsrao.ca/media/2551/download",
-        "https://www.fsrao.ca/media/26096/download",
-        "https://www.fsrao.ca/media/23566/download",
-        "https://www.fsrao.ca/media/24721/download",
-    ]
-    
-    driver, download_dir = setup_driver()
+def process_pdf_file(pdf_path, url, manifest=None, response=None, cache=None, output_format="json"):
+    """
+    Parse and save a downloaded FSRA PDF, then delete it.
     
+    When a manifest is given, a PDF whose SHA-256 matches the previous run is
+    not parsed again, and the result is recorded for the next run. When a
+    snapshot cache is given, the PDF is kept there for offline reparsing.
+    
+    Returns:
+        str: Path of the structured JSON file for this URL
+    """
     try:
-        for url in urls:
-            print(f"Processing {url}")
-            pdf_path = download_pdf(driver, url, download_dir)
-            
-            # Process PDF into structured JSON
-            data = process_pdf_to_structured_json(pdf_path, url)
-            
-            # Save data to a JSON file specific to this URL
-            output_file = save_json_for_url(data, url)
-            print(f"Data for {url} saved to {output_file}")
-            
-            # Delete the PDF after processing
+        sha256 = None
+        if manifest is not None or cache is not None:
+            sha256 = sha256_file(pdf_path)
+        if cache is not None:
+            cache.store_file(url, pdf_path, "pdf", sha256=sha256)
+        if manifest is not None:
+            if manifest.is_unchanged(url, sha256):
+                output_file = manifest.entry(url)["output_path"]
+                manifest.record(url, sha256, output_file, response)
+                print(f"Content unchanged for {url}, keeping {output_file}")
+                return output_file
+        
+        # Stream the PDF into a structured JSON file specific to this URL
+        output_file = stream_pdf_to_json_file(pdf_path, url, output_format=output_format)
+        print(f"Data for {url} saved to {output_file}")
+        
+        if manifest is not None:
+            manifest.record(url, sha256, output_file, response)
+    finally:
+        # Delete the PDF after processing
+        os.remove(pdf_path)
+        print(f"Processed and deleted {pdf_path}")
+    
+    return output_file
+
+def process_url(driver, url, download_dir, manifest=None, response=None, cache=None, output_format="json"):
+    """Download, parse and save a single FSRA PDF. Returns the output document path."""
+    print(f"Processing {url}")
+    pdf_path = download_pdf(driver, url, download_dir)
+    return process_pdf_file(pdf_path, url, manifest, response, cache, output_format)
+
+def fetch_pdf_direct(url, manifest):
+    """
+    Conditionally fetch a PDF over the pooled HTTP session.
+    
+    Returns:
+        tuple: (status, pdf_path, response) where status is "unchanged" (304),
+        "downloaded" (pdf_path holds the PDF) or "browser" (the server did not
+        return a PDF, so it has to be downloaded with Selenium)
+    """
+    response = manifest.conditional_get(url)
+    if response is None:
+        return "unchanged", None, None
+    if not response.content.startswith(b'%PDF'):
+        return "browser", None, response
+    
+    os.makedirs(DOWNLOAD_ROOT, exist_ok=True)
+    pdf_path = os.path.join(DOWNLOAD_ROOT, f"{uuid.uuid4().hex}.pdf")
+    try:
+        with open(pdf_path, 'wb') as f:
+            f.write(response.content)
+    except Exception:
+        # Never leave a truncated PDF behind
+        if os.path.exists(pdf_path):
             os.remove(pdf_path)
-            print(f"Processed and deleted {pdf_path}")
+        raise
+    return "downloaded", pdf_path, response
+
+def process_urls(urls, workers=4, recycle_after=25, manifest=None, cache=None, output_format="json"):
+    """
+    Download and process FSRA PDFs in parallel, skipping unchanged sources.
     
-    finally:
-        # Clean up
-        driver.quit()
-        print("Processing complete. Results saved to individual JSON files.")
+    Every URL is first fetched once over a pooled HTTP session with conditional
+    headers from the scrape manifest. Sources answering 304 Not Modified are
+    skipped entirely. PDFs that can only be downloaded through a browser go to
+    a pool of Chrome workers, each with a private download directory, so every
+    finished file is matched to the URL that produced it.
+    
+    Args:
+        urls (list): PDF download URLs (duplicates are fetched once)
+        workers (int): Number of parallel downloads/browsers
+        recycle_after (int): Downloads each browser handles before restarting
+        manifest (ScrapeManifest, optional): Manifest to use; loaded from disk by default
+        cache (SnapshotCache, optional): Raw snapshot cache; opened from disk by default
+        output_format (str): "json", "ndjson" or "binary" (see json_stream.OUTPUT_FORMATS)
+        
+    Returns:
+        list: Output document paths for the de-duplicated URLs, in input order
+            (None where processing failed)
+    """
+    urls = unique_urls(urls)
+    if manifest is None:
+        manifest = ScrapeManifest()
+    if cache is None:
+        cache = SnapshotCache()
+    
+    def direct_task(url):
+        try:
+            status, pdf_path, response = fetch_pdf_direct(url, manifest)
+        except Exception as e:
+            print(f"Direct fetch failed for {url}: {e}")
+            return "browser", None
+        if status == "unchanged":
+            print(f"Not modified, skipping {url}")
+            return status, manifest.entry(url).get("output_path")
+        if status == "browser":
+            # The response is the HTML page, not the PDF, so its validators say nothing about the PDF
+            manifest.forget_validators(url)
+            return status, None
+        try:
+            return status, process_pdf_file(pdf_path, url, manifest, response, cache, output_format)
+        except Exception as e:
+            print(f"Processing failed for {url}: {e}")
+            return "failed", None
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        direct_results = dict(zip(urls, executor.map(direct_task, urls)))
+    
+    results = {url: value for url, (status, value) in direct_results.items() if status != "browser"}
+    browser_urls = [url for url, (status, _) in direct_results.items() if status == "browser"]
+    
+    if browser_urls:
+        def options_for_slot(slot):
+            return download_chrome_options(worker_download_dir(slot))
+        
+        def process_task(driver, slot, url):
+            return process_url(driver, url, worker_download_dir(slot), manifest,
+                               cache=cache, output_format=output_format)
+        
+        pool = DriverPool(size=min(workers, len(browser_urls)), recycle_after=recycle_after,
+                          options_factory=options_for_slot)
+        try:
+            results.update(zip(browser_urls, pool.map(process_task, browser_urls)))
+        finally:
+            # Clean up
+            pool.close()
+    
+    print("Processing complete. Results saved to individual JSON files.")
+    return [results.get(url) for url in urls]
+
+FSRAO_URLS = [
+    "https://www.fsrao.ca/media/7726/download",
+    "https://www.fsrao.ca/media/14931/download",
+    "https://www.fsrao.ca/media/7351/download",
+    "https://www.fsrao.ca/media/7371/download",
+    "https://www.fsrao.ca/media/6941/download",
+    "https://www.fsrao.ca/media/7081/download",
+    "https://www.fsrao.ca/media/7091/download",
+    "https://www.fsrao.ca/media/7211/download",
+    "https://www.fsrao.ca/media/7681/download",
+    "https://www.fsrao.ca/media/7686/download",
+    "https://www.fsrao.ca/media/7716/download",
+    "https://www.fsrao.ca/media/7721/download",
+    "https://www.fsrao.ca/media/7726/download",
+    "https://www.fsrao.ca/media/7731/download",
+    "https://www.fsrao.ca/media/1606/download",
+    "https://www.fsrao.ca/media/15261/download",
+    "https://www.fsrao.ca/media/26021/download",
+    "https://www.fsrao.ca/media/2551/download",
+    "https://www.fsrao.ca/media/26096/download",
+    "https://www.fsrao.ca/media/23566/download",
+    "https://www.fsrao.ca/media/24721/download",
+]
+
+def main():
+    process_urls(FSRAO_URLS)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,442 @@
+import os
+import json
+import struct
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+class StructuredJSONWriter:
+    """
+    Write a {"metadata": ..., "structure": [...]} document one section at a time.
+
+    Sections are serialized and written as soon as they arrive, so only the
+    section being written has to be in memory. The file is written to a
+    temporary path and moved into place on close, and its bytes are the same
+    as json.dump(data, f, indent=indent, ensure_ascii=False) would produce.
+
+    Args:
+        path (str): Final output path
+        metadata (dict): Document metadata, written first
+        indent (int): JSON indentation, matching the scraper's existing output
+    """
+
+    def __init__(self, path, metadata, indent=4):
+        self.path = path
+        self.indent = indent
+        self.count = 0
+        # Child counts of the nodes opened with begin_section(), outermost first
+        self._containers = []
+        self._tmp_path = f"{path}.tmp"
+        self._file = open(self._tmp_path, 'w', encoding='utf-8')
+        pad = " " * indent
+        metadata_json = self._nested_dumps(metadata, 1)
+        self._file.write(f'{{\n{pad}"metadata": {metadata_json},\n{pad}"structure": [')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _nested_dumps(self, obj, depth):
+        text = json.dumps(obj, indent=self.indent, ensure_ascii=False)
+        return text.replace("\n", "\n" + " " * (self.indent * depth))
+
+    def _next_item(self):
+        """Return the separator and depth of the next item of the innermost open list."""
+        if self._containers:
+            separator = "," if self._containers[-1] else ""
+            self._containers[-1] += 1
+        else:
+            separator = "," if self.count else ""
+            self.count += 1
+        return separator, 2 + 2 * len(self._containers)
+
+    def write_section(self, section):
+        """Serialize one structure node and append it to the file, inside the node opened last if any."""
+        separator, depth = self._next_item()
+        pad = " " * (self.indent * depth)
+        self._file.write(f"{separator}\n{pad}{self._nested_dumps(section, depth)}")
+
+    def begin_section(self, node, key="content"):
+        """
+        Start a structure node whose children are written one by one.
+
+        The node's other fields are written now; its `key` list is filled by
+        the write_section() and begin_section() calls up to end_section().
+        `key` must be the node's last key for the output to match json.dump.
+        """
+        separator, depth = self._next_item()
+        pad = " " * (self.indent * depth)
+        inner_pad = " " * (self.indent * (depth + 1))
+        head = {name: value for name, value in node.items() if name != key}
+        # Drop the closing brace so the child list can follow the other fields
+        opening = self._nested_dumps(head, depth)[:-(len(pad) + 2)] + "," if head else "{"
+        self._file.write(f"{separator}\n{pad}{opening}\n{inner_pad}{json.dumps(key, ensure_ascii=False)}: [")
+        self._containers.append(0)
+
+    def end_section(self):
+        """Close the node opened by the last begin_section()."""
+        count = self._containers.pop()
+        depth = 2 + 2 * len(self._containers)
+        pad = " " * (self.indent * depth)
+        inner_pad = " " * (self.indent * (depth + 1))
+        self._file.write(f"\n{inner_pad}]\n{pad}}}" if count else f"]\n{pad}}}")
+
+    def close(self):
+        """Finish the document, closing any open nodes, and move it to its final path."""
+        if self._file is None:
+            return
+        while self._containers:
+            self.end_section()
+        pad = " " * self.indent
+        closing = f"\n{pad}]\n}}" if self.count else "]\n}"
+        self._file.write(closing)
+        self._file.close()
+        self._file = None
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Discard the partially written document."""
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        os.remove(self._tmp_path)
+
+# Output formats: the pretty-printed JSON the scrapers have always written,
+# one node per line (NDJSON), or length-prefixed records in a zstd stream
+OUTPUT_FORMATS = {
+    "json": ".json",
+    "ndjson": ".ndjson",
+    "binary": ".bin.zst"
+}
+
+BINARY_MAGIC = b"LEXIDOC1"
+
+def document_path(json_path, output_format="json"):
+    """Return the path a document is written to in the given format, from its .json path."""
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {output_format!r}, expected one of {', '.join(OUTPUT_FORMATS)}")
+    base, _ = os.path.splitext(json_path)
+    return base + OUTPUT_FORMATS[output_format]
+
+def document_format(path):
+    """Return the output format of a document file from its extension."""
+    for output_format, extension in OUTPUT_FORMATS.items():
+        if output_format != "json" and path.endswith(extension):
+            return output_format
+    return "json"
+
+def flatten_section(section, first_index=0, parent=None):
+    """
+    Yield the flat records of one section in document order.
+
+    Each record is the node without its child list, plus "parent" (the record
+    number of its parent within the document, or None for a top-level node;
+    the section's own parent is the `parent` argument)
+    and, for nodes that had a child list, "children" naming its key
+    ("content" or "paragraphs"). Record numbers are used because node ids are
+    not unique within an Ontario act. Only the first child list of a node is
+    flattened; any other list (a second child list, or e.g. "subsections")
+    stays in the record as it is, so iter_sections() restores both.
+    """
+    index = first_index
+    stack = [(section, parent)]
+    while stack:
+        node, parent = stack.pop()
+        record = {"parent": parent}
+        children = None
+        for key, value in node.items():
+            if key in ("content", "paragraphs") and isinstance(value, list) and children is None:
+                record["children"] = key
+                children = value
+            else:
+                record[key] = value
+        yield record
+        if children:
+            stack.extend((child, index) for child in reversed(children))
+        index += 1
+
+def iter_sections(records):
+    """Rebuild top-level sections, one at a time, from flat records."""
+    # Child lists of the nodes in the current section, by record number
+    child_lists = {}
+    section = None
+    for index, record in enumerate(records):
+        parent = record.pop("parent")
+        key = record.pop("children", None)
+        if key is not None:
+            record[key] = child_lists[index] = []
+        if parent is None:
+            if section is not None:
+                yield section
+            section = record
+            child_lists = {index: child_lists[index]} if key is not None else {}
+        else:
+            child_lists[parent].append(record)
+    if section is not None:
+        yield section
+
+class _FlatDocumentWriter:
+    """Shared bookkeeping for the record-per-node writers."""
+
+    def __init__(self, path, metadata):
+        self.path = path
+        self.count = 0
+        self.records = 0
+        # Record numbers of the nodes opened with begin_section(), outermost first
+        self._containers = []
+        self._tmp_path = f"{path}.tmp"
+        self._file = None
+        self._open()
+        self._write_record({"metadata": metadata})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write_section(self, section):
+        """Flatten one structure node and append its records to the file, inside the node opened last if any."""
+        parent = self._containers[-1] if self._containers else None
+        for record in flatten_section(section, self.records, parent):
+            self._write_record(record)
+            self.records += 1
+        if parent is None:
+            self.count += 1
+
+    def begin_section(self, node, key="content"):
+        """Write a node whose `key` children follow through write_section() up to end_section()."""
+        parent = self._containers[-1] if self._containers else None
+        record = {"parent": parent}
+        record.update((name, value) for name, value in node.items() if name != key)
+        record["children"] = key
+        self._write_record(record)
+        self._containers.append(self.records)
+        self.records += 1
+        if parent is None:
+            self.count += 1
+
+    def end_section(self):
+        """Close the node opened by the last begin_section()."""
+        self._containers.pop()
+
+    def close(self):
+        """Finish the document and move it to its final path."""
+        if self._file is None:
+            return
+        self._finish()
+        self._file = None
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        """Discard the partially written document."""
+        if self._file is None:
+            return
+        self._finish()
+        self._file = None
+        os.remove(self._tmp_path)
+
+class NDJSONWriter(_FlatDocumentWriter):
+    """
+    Write a document as NDJSON: a {"metadata": ...} line, then one line per node.
+
+    Nodes are written in document order with flattened parent references, see
+    flatten_section(). Same interface as StructuredJSONWriter.
+
+    Args:
+        path (str): Final output path
+        metadata (dict): Document metadata, written first
+    """
+
+    def _open(self):
+        self._file = open(self._tmp_path, 'w', encoding='utf-8')
+
+    def _write_record(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+        self._file.write("\n")
+
+    def _finish(self):
+        self._file.close()
+
+class BinaryDocumentWriter(_FlatDocumentWriter):
+    """
+    Write a document as length-prefixed records in a single zstd stream.
+
+    After the BINARY_MAGIC header, every record (metadata first, then one per
+    node as in NDJSONWriter) is a 4-byte little-endian length followed by
+    that many bytes of compact UTF-8 JSON. Requires the zstandard package.
+
+    Args:
+        path (str): Final output path
+        metadata (dict): Document metadata, written first
+        level (int): zstd compression level
+    """
+
+    def __init__(self, path, metadata, level=10):
+        if zstandard is None:
+            raise RuntimeError("The binary output format requires the zstandard package (pip install zstandard)")
+        self.level = level
+        super().__init__(path, metadata)
+
+    def _open(self):
+        self._raw = open(self._tmp_path, 'wb')
+        self._raw.write(BINARY_MAGIC)
+        self._file = zstandard.ZstdCompressor(level=self.level).stream_writer(self._raw, closefd=False)
+
+    def _write_record(self, record):
+        payload = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+        self._file.write(struct.pack("<I", len(payload)))
+        self._file.write(payload)
+
+    def _finish(self):
+        self._file.close()
+        self._raw.close()
+
+def open_document_writer(json_path, metadata, output_format="json", indent=4):
+    """
+    Return a streaming writer for a document in the selected output format.
+
+    Args:
+        json_path (str): Path the document would have as JSON; the extension
+            is replaced to match the format
+        metadata (dict): Document metadata
+        output_format (str): "json", "ndjson" or "binary"
+        indent (int): JSON indentation, only used by the json format
+
+    Returns:
+        A writer with write_section(), begin_section(), end_section(), close() and abort()
+    """
+    path = document_path(json_path, output_format)
+    if output_format == "ndjson":
+        return NDJSONWriter(path, metadata)
+    if output_format == "binary":
+        return BinaryDocumentWriter(path, metadata)
+    return StructuredJSONWriter(path, metadata, indent=indent)
+
+def write_document(data, json_path, output_format="json", indent=4):
+    """Write a complete {"metadata", "structure"} document in the selected format. Returns its path."""
+    if output_format == "json":
+        # Unchanged from the scrapers' original json.dump output, written to a
+        # temporary file and moved into place like the streaming writers do
+        tmp_path = f"{json_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=indent)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, json_path)
+        return json_path
+
+    with open_document_writer(json_path, data["metadata"], output_format) as writer:
+        for section in data["structure"]:
+            writer.write_section(section)
+    return writer.path
+
+# Records are decoded in batches with one json.loads call per batch, which is
+# several times faster than decoding them one at a time
+RECORD_BATCH_SIZE = 2048
+
+def _decode_batch(payloads):
+    return json.loads(b"[" + b",".join(payloads) + b"]")
+
+def _iter_binary_records(path):
+    if zstandard is None:
+        raise RuntimeError("Reading binary documents requires the zstandard package (pip install zstandard)")
+    with open(path, 'rb') as raw:
+        if raw.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError(f"{path} is not a binary structured document")
+        pending = b""
+        for chunk in zstandard.ZstdDecompressor().read_to_iter(raw, read_size=1 << 20):
+            data = pending + chunk
+            batch = []
+            position = 0
+            while len(data) - position >= 4:
+                length, = struct.unpack_from("<I", data, position)
+                end = position + 4 + length
+                if end > len(data):
+                    break
+                batch.append(data[position + 4:end])
+                position = end
+            pending = data[position:]
+            if batch:
+                yield from _decode_batch(batch)
+        if pending:
+            raise ValueError(f"{path} ends in the middle of a record")
+
+def _iter_ndjson_records(path):
+    with open(path, 'rb') as f:
+        batch = []
+        for line in f:
+            line = line.rstrip(b"\r\n")
+            if line:
+                batch.append(line)
+            if len(batch) == RECORD_BATCH_SIZE:
+                yield from _decode_batch(batch)
+                batch = []
+        if batch:
+            yield from _decode_batch(batch)
+
+def iter_document_records(path):
+    """
+    Return (metadata, records) for a document in any output format.
+
+    records is an iterator over the flat node records described in
+    flatten_section(). NDJSON and binary documents are read lazily; a JSON
+    document is loaded and flattened.
+    """
+    output_format = document_format(path)
+    if output_format == "json":
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        def records():
+            index = 0
+            for section in data["structure"]:
+                for record in flatten_section(section, index):
+                    yield record
+                    index += 1
+        return data["metadata"], records()
+
+    reader = _iter_ndjson_records(path) if output_format == "ndjson" else _iter_binary_records(path)
+    header = next(reader, None)
+    if not header or "metadata" not in header:
+        raise ValueError(f"{path} does not start with a metadata record")
+    return header["metadata"], reader
+
+def load_document(path):
+    """Load a document in any output format as the usual {"metadata", "structure"} dict."""
+    metadata, records = iter_document_records(path)
+    return {"metadata": metadata, "structure": list(iter_sections(records))}
+
+def export_json(path, json_path=None, indent=4):
+    """
+    Convert an NDJSON or binary document back to pretty-printed JSON, one section at a time.
+
+    Args:
+        path (str): Source document
+        json_path (str, optional): Output path, defaults to the source path with a .json extension
+        indent (int): JSON indentation (4 for FSRA documents, 2 for Ontario laws)
+
+    Returns:
+        str: Path of the JSON file written
+    """
+    if json_path is None:
+        extension = OUTPUT_FORMATS[document_format(path)]
+        json_path = path[:-len(extension)] + ".json"
+    metadata, records = iter_document_records(path)
+    with StructuredJSONWriter(json_path, metadata, indent=indent) as writer:
+        for section in iter_sections(records):
+            writer.write_section(section)
+    return json_path
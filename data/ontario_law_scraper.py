@@ -1,472 +1,803 @@
 import time
 import re
-import json
 import os
 from datetime import datetime
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
+from io import BytesIO
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import etree
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from driver_pool import DriverPool, new_chrome_driver
+from scrape_manifest import ScrapeManifest, sha256_bytes, unique_urls
+from snapshot_cache import SnapshotCache
+from json_stream import open_document_writer, write_document
+from citation_manifest import update_citation_mappings
 
-def scrape_ontario_laws(url):
+ONTARIO_DOCS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Ontario_docs")
+
+# URLs of the Ontario laws to scrape
+ONTARIO_URLS = [
+    "https://www.ontario.ca/laws/statute/90i08",
+    "https://www.ontario.ca/laws/statute/90m41",
+    "https://www.ontario.ca/laws/statute/16f37",
+    "https://www.ontario.ca/laws/statute/03a09",
+    "https://www.ontario.ca/laws/regulation/900664",
+    "https://www.ontario.ca/laws/statute/90c25",
+    "https://www.ontario.ca/laws/regulation/r24383",
+    "https://www.ontario.ca/laws/regulation/930777",
+    "https://www.ontario.ca/laws/statute/90h08"
+]
+
+# Dictionary to map class names to element types. Lookups keep the original
+# substring semantics: the first key contained in the element's class string wins.
+ELEMENT_TYPE_MAP = {
+    # Standard elements
+    "paragraph": "paragraph",
+    "definition": "definition", 
+    "headnote": "headnote",
+    "section": "section",
+    "subsection": "subsection",
+    "title": "title",
+    "chapter": "chapter",
+    "part": "part",
+    "schedule": "schedule",
+    "form": "form",
+    # Elements with "-e" suffix (regulations)
+    "paragraph-e": "paragraph",
+    "definition-e": "definition",
+    "headnote-e": "headnote",
+    "section-e": "section",
+    "subsection-e": "subsection",
+    "title-e": "title",
+    "chapter-e": "chapter", 
+    "part-e": "part",
+    "schedule-e": "schedule",
+    "form-e": "form",
+    # Add more specific classes used in the Ontario Laws site
+    "sectionNum": "section_number",
+    "sectionTitle": "section_title",
+    "subsectionNum": "subsection_number",
+    "subsectionTitle": "subsection_title",
+    "partNum": "part_number",
+    "partTitle": "part_title",
+    "chapterNum": "chapter_number",
+    "chapterTitle": "chapter_title",
+    "scheduleNum": "schedule_number",
+    "scheduleTitle": "schedule_title"
+}
+
+# Use patterns to identify different types of elements
+section_number_pattern = re.compile(r'^(\d+\.(\d+)?)$')
+definition_pattern = re.compile(r'^"([^"]+)"\s+means\s+')
+paragraph_pattern = re.compile(r'^[(]([a-z])[)]\s+')
+roman_numeral_pattern = re.compile(r'^[(]([ivxlcdm]+)[)]\s+', re.IGNORECASE)
+part_pattern = re.compile(r'^PART\s+([IVXLCDM]+)', re.IGNORECASE)
+
+# All content patterns as one alternation, in the order they are checked.
+# The first alternative that matches names the candidate type in lastgroup.
+content_pattern = re.compile(r"""^(?:
+    (?P<section_number>\d+\.(?:\d+)?)$
+  | (?P<part>(?i:PART)\s+(?i:[IVXLCDM]+))
+  | (?P<paragraph>[(][a-z][)]\s+)
+  | (?P<subparagraph>[(](?i:[ivxlcdm]+)[)]\s+)
+)""", re.VERBOSE)
+
+def _resolve_class_type(class_str):
+    for class_name, type_name in ELEMENT_TYPE_MAP.items():
+        if class_name in class_str:
+            return type_name
+    return "unknown"
+
+# Exact-match dispatch table from an element's joined class string to its
+# type. Seeded with every known class name and filled in the first time a new
+# class combination is seen, so each distinct class string is resolved once.
+class_type_table = {class_name: _resolve_class_type(class_name) for class_name in ELEMENT_TYPE_MAP}
+
+def classify_element(text, class_attr, previous_type=None):
     """
-    Scrape text content from Ontario Laws website using Selenium with headless Chrome
-    and BeautifulSoup for more robust parsing.
+    Determine the element type of a paragraph or heading on an Ontario Laws page.
     
     Args:
-        url (str): URL to scrape
+        text (str): Stripped text of the element
+        class_attr (list): The element's CSS classes
+        previous_type (str): Type of the previous non-empty element
         
     Returns:
-        str: All text content from the webpage
+        str: The element type, e.g. "section", "paragraph" or "unknown"
     """
-    print(f"Starting to scrape: {url}")
+    # Try to identify by class
+    if class_attr:
+        class_str = ' '.join(class_attr)
+        elm_type = class_type_table.get(class_str)
+        if elm_type is None:
+            elm_type = class_type_table[class_str] = _resolve_class_type(class_str)
+        if elm_type != "unknown":
+            return elm_type
     
-    # Set up Chrome options
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # Run in headless mode
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--window-size=1920,1080")
-    chrome_options.add_argument("--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-    
-    # Initialize the Chrome driver
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
-        options=chrome_options
-    )
+    # Otherwise identify by content pattern
+    match = content_pattern.match(text)
+    candidate = match.lastgroup if match else None
     
-    try:
-        # Navigate to the URL
-        driver.get(url)
+    # Section numbers (e.g., "115.") and Part headings take precedence
+    if candidate == "section_number" or candidate == "part":
+        return candidate
+    if text.startswith("PART ") and ("I" in text or "V" in text or "X" in text):
+        return "part"
+    # Check for ALL CAPS text which often indicates part or section titles
+    if text.isupper() and len(text) > 3:
+        return "part_title" if "PART" in text else "section_title"
+    # Element right after a section number is usually a section title
+    if previous_type == "section_number":
+        return "section_title"
+    # Check for definitions
+    if text.startswith('"') and '"' in text[1:] and "means" in text:
+        return "definition"
+    # Paragraphs (a), (b), etc. and roman numerals (i), (ii), etc.
+    if candidate is not None:
+        return candidate
+    return "unknown"
+
+def build_raw_elements(elements):
+    """
+    Classify page elements and attach the identifiers the hierarchy builder needs.
+    
+    Args:
+        elements (iterable): (class_attr, text) pairs for every paragraph and
+            heading inside div.act-content, in document order
         
-        # Wait for the page to load (adjust timeout as needed)
-        wait = WebDriverWait(driver, 20)
+    Returns:
+        list: Raw element dicts with elm_type, text, position and identifiers
+    """
+    return list(iter_raw_elements(elements))
+
+def iter_raw_elements(elements):
+    """Classify page elements one at a time. Yields the raw element dicts of build_raw_elements()."""
+    current_section = None
+    current_part = None
+    previous_type = None
+    
+    for i, (class_attr, text) in enumerate(elements):
+        # Skip empty elements
+        if not text:
+            continue
         
-        # Wait for content to be loaded
-        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.act-content")))
+        # Determine element type
+        elm_type = classify_element(text, class_attr, previous_type)
+        previous_type = elm_type
         
-        # Give more time for JavaScript to render
-        time.sleep(5)
+        # Extract additional information based on element type
+        element_data = {
+            "elm_type": elm_type,
+            "text": text,
+            "position": i  # Store position to help with parent-child relationships later
+        }
         
-        # Get the page source after JavaScript has loaded
-        page_source = driver.page_source
+        # Extract numbers/identifiers for certain element types
+        if elm_type == "section_number":
+            section_match = section_number_pattern.match(text)
+            if section_match:
+                element_data["number"] = section_match.group(1).rstrip('.')
+                current_section = element_data["number"]
         
-        # Get the title and other metadata before we close the driver
-        try:
-            title_element = driver.find_element(By.CSS_SELECTOR, "div.act-content > h1")
-            title = title_element.text
-            print(f"Found title: {title}")
-            
-            # Try to extract citation information (R.S.O., etc.)
-            citation = ""
-            citation_element = driver.find_elements(By.CSS_SELECTOR, "div.act-name")
-            if citation_element:
-                citation = citation_element[0].text
+        elif elm_type == "part":
+            part_match = part_pattern.match(text)
+            if part_match:
+                element_data["number"] = part_match.group(1)
+                current_part = element_data["number"]
             else:
-                # Extract citation from title if possible
-                citation_match = re.search(r'([RS]\.[SO]\.[O]\.\s+\d{4},\s+c\.\s+\w+(\.\d+)?)', title)
-                if citation_match:
-                    citation = citation_match.group(1)
-                else:
-                    citation = title
-        except:
-            title = f"Ontario Law {url.split('/')[-1]}"
-            citation = title
-            print("Could not find title element")
-        
-        # Create BeautifulSoup object from the source
-        soup = BeautifulSoup(page_source, 'html.parser')
+                # Try to extract Roman numeral from the text
+                roman_match = re.search(r'PART\s+([IVXLCDM]+)', text, re.IGNORECASE)
+                if roman_match:
+                    element_data["number"] = roman_match.group(1)
+                    current_part = element_data["number"]
         
-        # Dictionary to map class names to element types
-        element_type_map = {
-            # Standard elements
-            "paragraph": "paragraph",
-            "definition": "definition", 
-            "headnote": "headnote",
-            "section": "section",
-            "subsection": "subsection",
-            "title": "title",
-            "chapter": "chapter",
-            "part": "part",
-            "schedule": "schedule",
-            "form": "form",
-            # Elements with "-e" suffix (regulations)
-            "paragraph-e": "paragraph",
-            "definition-e": "definition",
-            "headnote-e": "headnote",
-            "section-e": "section",
-            "subsection-e": "subsection",
-            "title-e": "title",
-            "chapter-e": "chapter", 
-            "part-e": "part",
-            "schedule-e": "schedule",
-            "form-e": "form",
-            # Add more specific classes used in the Ontario Laws site
-            "sectionNum": "section_number",
-            "sectionTitle": "section_title",
-            "subsectionNum": "subsection_number",
-            "subsectionTitle": "subsection_title",
-            "partNum": "part_number",
-            "partTitle": "part_title",
-            "chapterNum": "chapter_number",
-            "chapterTitle": "chapter_title",
-            "scheduleNum": "schedule_number",
-            "scheduleTitle": "schedule_title"
-        }
+        elif elm_type == "paragraph":
+            para_match = paragraph_pattern.match(text)
+            if para_match:
+                element_data["letter"] = para_match.group(1)
+        
+        elif elm_type == "definition":
+            def_match = definition_pattern.match(text)
+            if def_match:
+                element_data["term"] = def_match.group(1)
+        
+        # Add parent section or part if we know it
+        if current_section and elm_type not in ["section_number", "part"]:
+            element_data["parent_section"] = current_section
+        
+        if current_part:
+            element_data["parent_part"] = current_part
+        
+        # If this is the first time we've seen an "unknown" type, print details to help debug
+        if elm_type == "unknown" and not hasattr(build_raw_elements, 'reported_unknown'):
+            print(f"First unknown element:")
+            print(f"  Text: {text}")
+            print(f"  Classes: {class_attr}")
+            build_raw_elements.reported_unknown = True
+        
+        yield element_data
+
+# HTML parser backends for the act content:
+#   "lxml"        - lxml iterparse, streams only the div.act-content subtree
+#   "bs4"         - BeautifulSoup on lxml, restricted to div.act-content by a SoupStrainer
+#   "html.parser" - BeautifulSoup's pure-Python parser over the whole page
+HTML_PARSERS = ("lxml", "bs4", "html.parser")
+
+CONTENT_TAGS = ('p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+
+def _has_act_content_class(element):
+    return "act-content" in (element.get("class") or "").split()
+
+def _iter_act_elements_lxml(page_source):
+    """Stream (tag, class_attr, text) for div.act-content using lxml iterparse."""
+    source = BytesIO(page_source.encode('utf-8') if isinstance(page_source, str) else page_source)
+    act_content = None
+    # Elements are reported in document (start) order, even if one content
+    # tag ends up nested inside another
+    pending = []
+    open_count = 0
+    
+    for event, element in etree.iterparse(source, events=("start", "end"), html=True, encoding='utf-8'):
+        if act_content is None:
+            if event == "start" and element.tag == "div" and _has_act_content_class(element):
+                act_content = element
+            elif event == "end":
+                # Drop the site chrome as soon as it has been parsed
+                element.clear(keep_tail=True)
+            continue
+        
+        if element is act_content and event == "end":
+            break
+        if element.tag not in CONTENT_TAGS:
+            # Wrappers between content tags are no longer needed once closed
+            if event == "end" and open_count == 0:
+                element.clear(keep_tail=True)
+            continue
+        
+        if event == "start":
+            pending.append([element.tag, (element.get("class") or "").split(), None])
+            element.set("data-pending-index", str(len(pending) - 1))
+            open_count += 1
+            continue
         
-        # Find all relevant elements within act-content
-        act_content = soup.select_one("div.act-content")
+        index = int(element.get("data-pending-index"))
+        pending[index][2] = "".join(text.strip() for text in element.itertext())
+        open_count -= 1
+        if open_count == 0:
+            for tag, class_attr, text in pending:
+                yield tag, class_attr, text
+            pending = []
+            element.clear(keep_tail=True)
+
+def _iter_act_elements_soup(page_source, parser):
+    """Yield (tag, class_attr, text) for div.act-content using BeautifulSoup."""
+    if parser == "bs4":
+        soup = BeautifulSoup(page_source, 'lxml', parse_only=SoupStrainer("div", class_="act-content"))
+    else:
+        soup = BeautifulSoup(page_source, 'html.parser')
+    
+    act_content = soup.select_one("div.act-content")
+    if act_content is None:
+        return
+    for element in act_content.find_all(list(CONTENT_TAGS)):
+        yield element.name, element.get('class', []), element.get_text(strip=True)
+
+def iter_act_elements(page_source, parser="lxml"):
+    """
+    Yield every paragraph and heading inside div.act-content, in document order.
+    
+    Args:
+        page_source (str): Rendered HTML of an Ontario Laws page
+        parser (str): One of HTML_PARSERS
         
-        # Raw ordered list of all elements (will be processed into hierarchical structure later)
-        raw_elements = []
+    Yields:
+        tuple: (tag, class_attr, text) with text stripped as in get_text(strip=True)
+    """
+    if parser == "lxml":
+        return _iter_act_elements_lxml(page_source)
+    if parser in ("bs4", "html.parser"):
+        return _iter_act_elements_soup(page_source, parser)
+    raise ValueError(f"Unknown HTML parser {parser!r}, expected one of {HTML_PARSERS}")
+
+def iter_act_content(page_source, parser="lxml"):
+    """
+    Parse the act content of a rendered page, yielding classified raw elements as they are read.
+    
+    Args:
+        page_source (str): Rendered HTML of an Ontario Laws page
+        parser (str): One of HTML_PARSERS
         
-        if act_content:
+    Yields:
+        dict: Raw element dicts, see build_raw_elements()
+    """
+    debug_count = 0
+    
+    def elements():
+        nonlocal debug_count
+        for tag, class_attr, text in iter_act_elements(page_source, parser):
             # Print the HTML structure of a sample of elements to debug
-            debug_sample = act_content.find_all('p', limit=5)
-            for idx, elem in enumerate(debug_sample):
-                print(f"Debug - Element {idx}:")
-                print(f"  Tag: {elem.name}")
-                print(f"  Classes: {elem.get('class', [])}")
-                print(f"  Text: {elem.get_text(strip=True)}")
-            
-            # Find all paragraph elements
-            all_p_elements = act_content.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-            
-            # Use patterns to identify different types of elements
-            section_number_pattern = re.compile(r'^(\d+\.(\d+)?)$')
-            definition_pattern = re.compile(r'^"([^"]+)"\s+means\s+')
-            paragraph_pattern = re.compile(r'^[(]([a-z])[)]\s+')
-            roman_numeral_pattern = re.compile(r'^[(]([ivxlcdm]+)[)]\s+', re.IGNORECASE)
-            part_pattern = re.compile(r'^PART\s+([IVXLCDM]+)', re.IGNORECASE)
-            
-            current_section = None
-            current_part = None
-            
-            for i, p_element in enumerate(all_p_elements):
-                # Get the class attribute
-                class_attr = p_element.get('class', [])
-                text = p_element.get_text(strip=True)
-                
-                # Skip empty elements
-                if not text:
-                    continue
-                
-                # Determine element type
-                elm_type = "unknown"
-                
-                # Try to identify by class
-                if class_attr:
-                    class_str = ' '.join(class_attr)
-                    for class_name, type_name in element_type_map.items():
-                        if class_name in class_str:
-                            elm_type = type_name
-                            break
-                
-                # If still unknown, try to identify by content pattern
-                if elm_type == "unknown":
-                    # Check for section numbers (e.g., "115.", "116.")
-                    if section_number_pattern.match(text):
-                        elm_type = "section_number"
-                    # Check for Part headings
-                    elif part_pattern.match(text) or (text.startswith("PART ") and any(numeral in text for numeral in ["I", "V", "X"])):
-                        elm_type = "part"
-                    # Check for ALL CAPS text which often indicates part or section titles
-                    elif text.isupper() and len(text) > 3:
-                        elm_type = "part_title" if "PART" in text else "section_title"
-                    # Element right after a section number is usually a section title
-                    elif len(raw_elements) > 0 and raw_elements[-1]["elm_type"] == "section_number":
-                        elm_type = "section_title"
-                    # Check for definitions
-                    elif text.startswith('"') and '"' in text[1:] and "means" in text:
-                        elm_type = "definition"
-                    # Check for paragraphs (a), (b), etc.
-                    elif paragraph_pattern.match(text):
-                        elm_type = "paragraph"
-                    # Check for roman numerals (i), (ii), etc.
-                    elif roman_numeral_pattern.match(text):
-                        elm_type = "subparagraph"
-                
-                # Extract additional information based on element type
-                element_data = {
-                    "elm_type": elm_type,
-                    "text": text,
-                    "position": i  # Store position to help with parent-child relationships later
-                }
-                
-                # Extract numbers/identifiers for certain element types
-                if elm_type == "section_number":
-                    section_match = section_number_pattern.match(text)
-                    if section_match:
-                        element_data["number"] = section_match.group(1).rstrip('.')
-                        current_section = element_data["number"]
-                
-                elif elm_type == "part":
-                    part_match = part_pattern.match(text)
-                    if part_match:
-                        element_data["number"] = part_match.group(1)
-                        current_part = element_data["number"]
-                    else:
-                        # Try to extract Roman numeral from the text
-                        roman_match = re.search(r'PART\s+([IVXLCDM]+)', text, re.IGNORECASE)
-                        if roman_match:
-                            element_data["number"] = roman_match.group(1)
-                            current_part = element_data["number"]
-                
-                elif elm_type == "paragraph":
-                    para_match = paragraph_pattern.match(text)
-                    if para_match:
-                        element_data["letter"] = para_match.group(1)
-                
-                elif elm_type == "definition":
-                    def_match = definition_pattern.match(text)
-                    if def_match:
-                        element_data["term"] = def_match.group(1)
-                
-                # Add parent section or part if we know it
-                if current_section and elm_type not in ["section_number", "part"]:
-                    element_data["parent_section"] = current_section
-                
-                if current_part:
-                    element_data["parent_part"] = current_part
-                
-                # Add to raw elements list
-                raw_elements.append(element_data)
-                
-                # If this is the first time we've seen an "unknown" type, print details to help debug
-                if elm_type == "unknown" and not hasattr(scrape_ontario_laws, 'reported_unknown'):
-                    print(f"First unknown element:")
-                    print(f"  Text: {text}")
-                    print(f"  Classes: {class_attr}")
-                    scrape_ontario_laws.reported_unknown = True
-        
-        # Fallback: If we didn't find elements with our target patterns,
-        # get all paragraphs and headings to preserve some structure
-        if not raw_elements:
-            print("Using fallback content extraction method")
-            for i, element in enumerate(act_content.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])):
-                text = element.get_text(strip=True)
-                if text:
-                    # Determine a generic type based on the tag
-                    if element.name.startswith('h'):
-                        elm_type = "heading"
-                    else:
-                        elm_type = "paragraph"
-                    
-                    raw_elements.append({
-                        "elm_type": elm_type,
-                        "text": text,
-                        "position": i
-                    })
-        
-        # Process raw elements into structured hierarchy
-        structured_data = process_to_structured_format(raw_elements, title, citation, url)
-        
-        # Ensure data directory exists
-        data_dir = "data/Ontario_docs/"
-        os.makedirs(data_dir, exist_ok=True)
-        
-        # Create filename from title
-        json_filename = f"{title.replace(' ', '_').replace('/', '_').replace(',', '').replace(':', '')}.json"
-        json_file_path = os.path.join(data_dir, json_filename)
-        
-        # Save the structured data as JSON
-        with open(json_file_path, 'w', encoding='utf-8') as f:
-            json.dump(structured_data, f, indent=2, ensure_ascii=False)
-            
-        print(f"Structured data saved to {json_file_path}")
+            if tag == 'p' and debug_count < 5:
+                print(f"Debug - Element {debug_count}:")
+                print(f"  Tag: {tag}")
+                print(f"  Classes: {class_attr}")
+                print(f"  Text: {text}")
+                debug_count += 1
+            yield class_attr, text
+    
+    return iter_raw_elements(elements())
+
+def parse_act_content(page_source, parser="lxml"):
+    """
+    Parse the act content of a rendered page into classified raw elements.
+    
+    Args:
+        page_source (str): Rendered HTML of an Ontario Laws page
+        parser (str): One of HTML_PARSERS
+        
+    Returns:
+        list: Raw element dicts, see build_raw_elements()
+    """
+    raw_elements = list(iter_act_content(page_source, parser))
+    if not raw_elements:
+        print("No content elements found in div.act-content")
+    return raw_elements
+
+def structured_json_path(title):
+    """Return the Ontario_docs JSON path for a law, named after its title."""
+    # Ensure data directory exists
+    os.makedirs(ONTARIO_DOCS_DIR, exist_ok=True)
+    
+    # Create filename from title
+    json_filename = f"{title.replace(' ', '_').replace('/', '_').replace(',', '').replace(':', '')}.json"
+    return os.path.join(ONTARIO_DOCS_DIR, json_filename)
+
+def save_structured_json(structured_data, title, output_format="json"):
+    """Save a structured Ontario law document to Ontario_docs, named after its title (JSON by default)."""
+    path = write_document(structured_data, structured_json_path(title), output_format, indent=2)
+    update_citation_mappings(path, structured_data["metadata"])
+    return path
+
+def stream_structured_document(raw_elements, title, citation, url, output_format="json"):
+    """
+    Build and save a structured Ontario law document while its elements are read.
+    
+    Sections are written as soon as they are complete, so the document is
+    never held in memory as a whole. The output matches
+    save_structured_json(process_to_structured_format(...), title, output_format).
+    
+    Args:
+        raw_elements (iterable): Raw element dicts, e.g. from iter_act_content()
+        title (str): Title of the law
+        citation (str): Citation of the law
+        url (str): Source URL
+        output_format (str): "json", "ndjson" or "binary" (see json_stream.OUTPUT_FORMATS)
+        
+    Returns:
+        str: Path of the document file written
+    """
+    metadata = structured_metadata(title, citation, url)
+    with open_document_writer(structured_json_path(title), metadata, output_format, indent=2) as writer:
+        StructureBuilder(writer).build(raw_elements)
+    update_citation_mappings(writer.path, metadata)
+    return writer.path
+
+def render_act_page(driver, url):
+    """
+    Load an Ontario Laws page in the browser and wait for the act to render.
+    
+    Args:
+        driver (WebDriver): Browser to load the page in
+        url (str): URL of the page
+        
+    Returns:
+        tuple: (page_source, title, citation) of the rendered page
+    """
+    # Navigate to the URL
+    driver.get(url)
+    
+    # Wait for the page to load (adjust timeout as needed)
+    wait = WebDriverWait(driver, 20)
+    
+    # Wait for content to be loaded
+    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.act-content")))
+    
+    # Give more time for JavaScript to render
+    time.sleep(5)
+    
+    # Get the page source after JavaScript has loaded
+    page_source = driver.page_source
+    
+    # Get the title and other metadata while the page is loaded
+    try:
+        title_element = driver.find_element(By.CSS_SELECTOR, "div.act-content > h1")
+        title = title_element.text
+        print(f"Found title: {title}")
+        
+        # Try to extract citation information (R.S.O., etc.)
+        citation = ""
+        citation_element = driver.find_elements(By.CSS_SELECTOR, "div.act-name")
+        if citation_element:
+            citation = citation_element[0].text
+        else:
+            # Extract citation from title if possible
+            citation_match = re.search(r'([RS]\.[SO]\.[O]\.\s+\d{4},\s+c\.\s+\w+(\.\d+)?)', title)
+            if citation_match:
+                citation = citation_match.group(1)
+            else:
+                citation = title
+    except:
+        title = f"Ontario Law {url.split('/')[-1]}"
+        citation = title
+        print("Could not find title element")
+    
+    return page_source, title, citation
+
+def save_act_page(page_source, title, citation, url, parser="lxml", output_format="json", summarize=True):
+    """
+    Parse a rendered Ontario Laws page and save its structured document.
+    
+    This is the CPU-bound half of a scrape; it needs no browser, so it can
+    run in another thread or process while the next page is fetched. The
+    page's elements stream straight into the document file.
+    
+    Args:
+        summarize (bool): Also return a text summary of the page's elements
+        
+    Returns:
+        tuple: (path of the document written, text summary or None)
+    """
+    summary = [] if summarize else None
+    count = 0
+    
+    def elements():
+        nonlocal count
+        # Classify the paragraphs and headings inside div.act-content
+        for element in iter_act_content(page_source, parser):
+            count += 1
+            if summary is not None:
+                summary.append(f"{element['elm_type'].upper()}: {element['text']}")
+            yield element
+    
+    # Build the structured hierarchy and save it section by section
+    path = stream_structured_document(elements(), title, citation, url, output_format)
+    if not count:
+        print("No content elements found in div.act-content")
+    
+    # Join all content with line breaks
+    return path, "\n\n".join(summary) if summary is not None else None
+
+def scrape_ontario_laws(url, driver=None, manifest=None, parser="lxml", cache=None, output_format="json"):
+    """
+    Scrape text content from Ontario Laws website using Selenium with headless Chrome
+    and BeautifulSoup for more robust parsing.
+    
+    Args:
+        url (str): URL to scrape
+        driver (WebDriver, optional): A pooled driver to reuse. If omitted, a
+            one-off headless browser is started and quit afterwards.
+        manifest (ScrapeManifest, optional): If given, the page is first checked
+            with a conditional request and skipped when it has not changed.
+        parser (str): HTML parser backend, one of HTML_PARSERS
+        cache (SnapshotCache, optional): Raw snapshot cache for the page source
+        output_format (str): "json", "ndjson" or "binary" (see json_stream.OUTPUT_FORMATS)
+        
+    Returns:
+        str: All text content from the webpage, or None if scraping failed or
+            the page was unchanged
+    """
+    print(f"Starting to scrape: {url}")
+    
+    response = None
+    if manifest is not None:
+        try:
+            response = manifest.conditional_get(url)
+            if response is None:
+                print(f"Not modified, skipping {url}")
+                return None
+        except Exception as e:
+            print(f"Conditional request failed for {url}: {e}")
+    
+    # Reuse the caller's driver, or start a one-off headless browser
+    owns_driver = driver is None
+    if owns_driver:
+        driver = new_chrome_driver()
+    
+    try:
+        page_source, title, citation = render_act_page(driver, url)
         
-        # Create a text summary
-        content_parts = []
-        for item in raw_elements:
-            content_parts.append(f"{item['elm_type'].upper()}: {item['text']}")
+        # Skip parsing when the rendered page is identical to the last run
+        page_sha256 = sha256_bytes(page_source)
+        if manifest is not None and manifest.is_unchanged(url, page_sha256):
+            output_path = manifest.entry(url)["output_path"]
+            manifest.record(url, page_sha256, output_path, response)
+            print(f"Content unchanged for {url}, keeping {output_path}")
+            return None
         
-        # Join all content with line breaks
-        content = "\n\n".join(content_parts)
+        # Keep the rendered page so it can be parsed again offline
+        if cache is not None:
+            cache.store_bytes(url, page_source, "html", sha256=page_sha256,
+                              title=title, citation=citation)
+        
+        json_file_path, content = save_act_page(page_source, title, citation, url, parser, output_format)
+        print(f"Structured data saved to {json_file_path}")
+        
+        if manifest is not None:
+            manifest.record(url, page_sha256, json_file_path, response)
         
         return content
         
     except Exception as e:
+        # Let the pool see browser failures so it can replace the driver
+        if not owns_driver and isinstance(e, WebDriverException):
+            raise
         print(f"An error occurred: {e}")
         import traceback
         traceback.print_exc()
         return None
     
     finally:
-        # Close the browser
-        driver.quit()
+        # Close the browser if we started it
+        if owns_driver:
+            driver.quit()
 
-def process_to_structured_format(raw_elements, title, citation, url):
+def scrape_ontario_laws_batch(urls, pool_size=3, recycle_after=20, manifest=None, parser="lxml", cache=None,
+                              output_format="json"):
     """
-    Process the raw elements into a structured hierarchical format.
+    Scrape several Ontario Laws pages concurrently on a pool of long-lived drivers.
+    
+    The chromedriver binary is resolved once, each driver is reused across pages
+    and recycled after `recycle_after` pages or after a browser crash. Repeated
+    URLs are scraped once, and pages the scrape manifest shows as unchanged
+    are skipped.
     
     Args:
-        raw_elements (list): List of raw elements extracted from the page
-        title (str): Title of the law
-        citation (str): Citation of the law
-        url (str): Source URL
+        urls (list): URLs to scrape
+        pool_size (int): Number of concurrent headless browsers
+        recycle_after (int): Pages each browser loads before it is restarted
+        manifest (ScrapeManifest, optional): Manifest to use; loaded from disk by default
+        parser (str): HTML parser backend, one of HTML_PARSERS
+        cache (SnapshotCache, optional): Raw snapshot cache; opened from disk by default
+        output_format (str): "json", "ndjson" or "binary" (see json_stream.OUTPUT_FORMATS)
         
     Returns:
-        dict: Structured data in the improved format
+        list: Text content for each de-duplicated URL, in input order
+            (None where scraping failed or the page was unchanged)
     """
-    # Create the metadata section
-    structured_data = {
-        "metadata": {
-            "title": title,
-            "citation": citation,
-            "jurisdiction": "Ontario",
-            "last_updated": datetime.now().strftime("%Y-%m-%d"),
-            "source_url": url
-        },
-        "structure": []
+    urls = unique_urls(urls)
+    if manifest is None:
+        manifest = ScrapeManifest()
+    if cache is None:
+        cache = SnapshotCache()
+    
+    def scrape_task(driver, slot, url):
+        return scrape_ontario_laws(url, driver=driver, manifest=manifest, parser=parser, cache=cache,
+                                   output_format=output_format)
+    
+    with DriverPool(size=min(pool_size, len(urls)) or 1, recycle_after=recycle_after) as pool:
+        return pool.map(scrape_task, urls)
+
+def structured_metadata(title, citation, url):
+    """Return the metadata block of a structured Ontario law document."""
+    return {
+        "title": title,
+        "citation": citation,
+        "jurisdiction": "Ontario",
+        "last_updated": datetime.now().strftime("%Y-%m-%d"),
+        "source_url": url
     }
+
+class StructureBuilder:
+    """
+    Build the Part/section hierarchy of an Ontario law in a single pass.
     
-    # Initialize tracking variables
-    current_part = None
-    current_section = None
-    current_subsection = None
-    current_definition = None
+    Elements are consumed from an iterator and only the open nodes are kept:
+    the Part being filled, the section being filled and the definition its
+    paragraphs belong to. A section goes to the writer as soon as the next
+    section starts, and each Part is opened and closed around its sections,
+    so memory depends on the largest section rather than the whole statute.
     
-    # Process elements to create the hierarchical structure
-    i = 0
-    while i < len(raw_elements):
-        element = raw_elements[i]
-        element_type = element["elm_type"]
-        
-        # Process PART elements
-        if element_type == "part":
-            part_number = element.get("number", "")
-            part_title = element["text"]
+    Args:
+        writer: Streaming document writer with write_section(),
+            begin_section() and end_section() (see json_stream)
+    """
+    
+    def __init__(self, writer):
+        self.writer = writer
+        # Part whose content list is open in the writer
+        self.open_part = None
+        # Parts started since the current section began. Text after a Part
+        # heading still belongs to the previous section, so a Part is only
+        # opened once that section is complete.
+        self.pending_parts = []
+        self.current_section = None
+        self.current_subsection = None
+        self.current_definition = None
+    
+    def build(self, raw_elements):
+        """Consume every raw element and finish the document."""
+        elements = iter(raw_elements)
+        element = next(elements, None)
+        while element is not None:
+            following = next(elements, None)
+            element_type = element["elm_type"]
             
-            # If the next element is a part title, use that instead
-            if i+1 < len(raw_elements) and raw_elements[i+1]["elm_type"] == "part_title":
-                part_title = raw_elements[i+1]["text"]
-                i += 1  # Skip the next element since we've used it
+            # Process PART elements
+            if element_type == "part":
+                part_title = element["text"]
+                
+                # If the next element is a part title, use that instead
+                if following is not None and following["elm_type"] == "part_title":
+                    part_title = following["text"]
+                    following = next(elements, None)  # Skip it since we've used it
+                
+                self.start_part(element.get("number", ""), part_title)
             
-            part_id = f"part_{part_number}"
+            # Process SECTION elements
+            elif element_type == "section_number":
+                section_title = ""
+                
+                # If the next element is a section title, use that
+                if following is not None and following["elm_type"] == "section_title":
+                    section_title = following["text"]
+                    following = next(elements, None)  # Skip it since we've used it
+                
+                self.start_section(element.get("number", ""), section_title)
             
-            part_obj = {
-                "id": part_id,
-                "type": "part",
-                "number": part_number,
-                "title": part_title,
-                "citation_path": f"Part {part_number}",
-                "content": []
-            }
+            # Process section text (not a title or number)
+            elif self.current_section and element_type not in ["section_title", "part_title"]:
+                self.add_content(element)
             
-            structured_data["structure"].append(part_obj)
-            current_part = part_obj
+            element = following
+        self.finish()
+    
+    def start_part(self, part_number, part_title):
+        """Start a Part; sections that follow are nested in it."""
+        self.pending_parts.append({
+            "id": f"part_{part_number}",
+            "type": "part",
+            "number": part_number,
+            "title": part_title,
+            "citation_path": f"Part {part_number}",
+            "content": []
+        })
+    
+    def start_section(self, section_number, section_title):
+        """Write out the current section and start the next one, inside the latest Part if any."""
+        self._write_section()
+        self._open_pending_parts()
         
-        # Process SECTION elements
-        elif element_type == "section_number":
-            section_number = element.get("number", "")
-            section_title = ""
-            
-            # If the next element is a section title, use that
-            if i+1 < len(raw_elements) and raw_elements[i+1]["elm_type"] == "section_title":
-                section_title = raw_elements[i+1]["text"]
-                i += 1  # Skip the next element since we've used it
-            
-            section_id = f"section_{section_number.replace('.', '_')}"
-            
-            section_obj = {
-                "id": section_id,
-                "type": "section",
-                "number": section_number,
-                "title": section_title,
-                "citation_path": f"s. {section_number}",
-                "content": []
+        self.current_section = {
+            "id": f"section_{section_number.replace('.', '_')}",
+            "type": "section",
+            "number": section_number,
+            "title": section_title,
+            "citation_path": f"s. {section_number}",
+            "content": []
+        }
+        self.current_subsection = None
+        # Definitions are scoped to their section
+        self.current_definition = None
+    
+    def add_content(self, element):
+        """Add a definition, paragraph or other text element to the current section."""
+        current_section = self.current_section
+        element_type = element["elm_type"]
+        
+        if element_type == "definition" and "term" in element:
+            # Process definition elements
+            term = element["term"]
+            definition_obj = {
+                "id": f"{current_section['id']}_def_{term.replace(' ', '_')}",
+                "type": "definition",
+                "term": term,
+                "text": element["text"],
+                "citation_path": f"{current_section['citation_path']}, \"{term}\""
             }
             
-            # Add section to appropriate parent or to the main structure
-            if current_part:
-                current_part["content"].append(section_obj)
-            else:
-                structured_data["structure"].append(section_obj)
-            
-            current_section = section_obj
-            current_subsection = None
-        
-        # Process section text (not a title or number)
-        elif current_section and element_type not in ["section_number", "section_title", "part", "part_title"]:
-            if element_type == "definition" and "term" in element:
-                # Process definition elements
-                term = element["term"]
-                definition_id = f"{current_section['id']}_def_{term.replace(' ', '_')}"
-                
-                definition_obj = {
-                    "id": definition_id,
-                    "type": "definition",
-                    "term": term,
-                    "text": element["text"],
-                    "citation_path": f"{current_section['citation_path']}, \"{term}\""
-                }
-                
-                current_section["content"].append(definition_obj)
-                current_definition = definition_obj
-            
-            elif element_type == "paragraph" and "letter" in element:
-                # Process paragraph elements
-                letter = element["letter"]
-                paragraph_id = f"{current_section['id']}_para_{letter}"
-                
-                paragraph_obj = {
-                    "id": paragraph_id,
-                    "type": "paragraph",
-                    "letter": letter,
-                    "text": element["text"],
-                    "citation_path": f"{current_section['citation_path']}, para. ({letter})"
-                }
-                
-                # Add paragraph to appropriate parent
-                if current_definition:
-                    if "paragraphs" not in current_definition:
-                        current_definition["paragraphs"] = []
-                    current_definition["paragraphs"].append(paragraph_obj)
-                elif current_subsection:
-                    if "content" not in current_subsection:
-                        current_subsection["content"] = []
-                    current_subsection["content"].append(paragraph_obj)
-                else:
-                    current_section["content"].append(paragraph_obj)
+            current_section["content"].append(definition_obj)
+            self.current_definition = definition_obj
+        
+        elif element_type == "paragraph" and "letter" in element:
+            # Process paragraph elements
+            letter = element["letter"]
+            paragraph_obj = {
+                "id": f"{current_section['id']}_para_{letter}",
+                "type": "paragraph",
+                "letter": letter,
+                "text": element["text"],
+                "citation_path": f"{current_section['citation_path']}, para. ({letter})"
+            }
             
+            # Add paragraph to appropriate parent
+            if self.current_definition:
+                self.current_definition.setdefault("paragraphs", []).append(paragraph_obj)
+            elif self.current_subsection:
+                self.current_subsection.setdefault("content", []).append(paragraph_obj)
             else:
-                # Process other section content elements
-                content_id = f"{current_section['id']}_text_{len(current_section['content'])}"
-                
-                content_obj = {
-                    "id": content_id,
-                    "type": element_type,
-                    "text": element["text"],
-                    "citation_path": current_section["citation_path"]
-                }
-                
-                current_section["content"].append(content_obj)
+                current_section["content"].append(paragraph_obj)
         
-        i += 1
+        else:
+            # Process other section content elements
+            current_section["content"].append({
+                "id": f"{current_section['id']}_text_{len(current_section['content'])}",
+                "type": element_type,
+                "text": element["text"],
+                "citation_path": current_section["citation_path"]
+            })
+    
+    def finish(self):
+        """Write out the last section and close any open Part."""
+        self._write_section()
+        self._open_pending_parts()
+        if self.open_part is not None:
+            self.writer.end_section()
+            self.open_part = None
+    
+    def _write_section(self):
+        if self.current_section is not None:
+            self.writer.write_section(self.current_section)
+            self.current_section = None
+            self.current_subsection = None
+            self.current_definition = None
+    
+    def _open_pending_parts(self):
+        """Close the open Part and open the latest pending one; Parts in between had no sections."""
+        if not self.pending_parts:
+            return
+        if self.open_part is not None:
+            self.writer.end_section()
+        for part in self.pending_parts[:-1]:
+            self.writer.write_section(part)
+        self.open_part = self.pending_parts[-1]
+        self.writer.begin_section(self.open_part, "content")
+        self.pending_parts = []
+
+class _StructureCollector:
+    """In-memory stand-in for a document writer that collects the structure list."""
+    
+    def __init__(self):
+        self.structure = []
+        self._containers = []
+    
+    def _target(self):
+        return self._containers[-1] if self._containers else self.structure
+    
+    def write_section(self, section):
+        self._target().append(section)
+    
+    def begin_section(self, node, key="content"):
+        node = dict(node, **{key: []})
+        self._target().append(node)
+        self._containers.append(node[key])
+    
+    def end_section(self):
+        self._containers.pop()
+
+def process_to_structured_format(raw_elements, title, citation, url):
+    """
+    Process the raw elements into a structured hierarchical format.
+    
+    Use stream_structured_document() to write the document without holding
+    it in memory.
     
-    return structured_data
+    Args:
+        raw_elements (iterable): Raw elements extracted from the page
+        title (str): Title of the law
+        citation (str): Citation of the law
+        url (str): Source URL
+        
+    Returns:
+        dict: Structured data in the improved format
+    """
+    collector = _StructureCollector()
+    StructureBuilder(collector).build(raw_elements)
+    return {
+        "metadata": structured_metadata(title, citation, url),
+        "structure": collector.structure
+    }
 
 if __name__ == "__main__":
-    # URL of the Ontario law to scrape
-    ontario_urls = [
-        "https://www.ontario.ca/laws/statute/90i08",
-        "https://www.ontario.ca/laws/statute/90m41",
-        "https://www.ontario.ca/laws/statute/16f37",
-        "https://www.ontario.ca/laws/statute/03a09",
-        "https://www.ontario.ca/laws/regulation/900664",
-        "https://www.ontario.ca/laws/statute/90c25",
-        "https://www.ontario.ca/laws/regulation/r24383",
-        "https://www.ontario.ca/laws/regulation/930777",
-        "https://www.ontario.ca/laws/statute/90h08"
-    ]
-    
-    # Scrape the content
-    for url in ontario_urls:
-        text_content = scrape_ontario_laws(url)
-    
-    
\ No newline at end of file
+    # Scrape the content on a shared pool of browsers
+    results = scrape_ontario_laws_batch(ONTARIO_URLS)
@@ -0,0 +1,360 @@
+"""
+Upload the scraped documents to the assistant and publish a file-ID manifest.
+
+The assistant cites documents by the file ID the upload API assigned, so the
+front end used to ask the proxy for every cited file's name before it could
+look up a display name. The publish step uploads each document of the corpus,
+records the file ID it was given in published_files.json, and writes a
+static manifest mapping every file ID to the document's display name,
+source URL and top-level citation paths:
+
+    {"files": {"file-abc123": {"filename": ..., "display_name": ...,
+                               "source_url": ..., "citation_paths": ["s. 1", "Part I", ...]}}}
+
+index.html renders citations from this manifest without any extra request.
+
+A document is uploaded again only when its file contents changed. The IDs
+it had before stay in the manifest (answers in older threads still cite
+them) unless --delete-replaced removes the old uploads.
+
+With --changesets, only the documents named by the changesets from
+changeset.py that were not published yet are looked at, instead of hashing
+every file of the corpus. A document the changesets remove is dropped from
+the records, and with --delete-replaced its uploads are deleted too. The
+records remember the sequence of the last changeset applied.
+
+LocalUploader is a stand-in for the upload API: it copies documents into a
+local directory and hands out deterministic file IDs, so the whole step can
+run without an API key. Its records and manifest stay in that directory
+unless --output says otherwise.
+
+Usage:
+    python publish.py [--vector-store VECTOR_STORE_ID] [--delete-replaced]   # upload (needs OPENAI_API_KEY)
+    python publish.py --changesets changesets.ndjson [--local]              # upload what changed since
+    python publish.py --local [--output ../public/file_manifest.json]       # local stand-in
+    python publish.py --manifest-only                                       # rewrite the manifest only
+"""
+import os
+import json
+import shutil
+import argparse
+from datetime import datetime
+from corpus_store import DATA_DIR, iter_corpus_files
+from json_stream import iter_document_records, iter_sections
+from citation_index import document_key
+from citation_manifest import load_citation_mappings, index_aliases, alias_key
+from scrape_manifest import get_session, sha256_file
+from changeset import iter_changesets
+
+PUBLISHED_FILES_PATH = os.path.join(DATA_DIR, "published_files.json")
+FILE_MANIFEST_PATH = os.path.join(os.path.dirname(DATA_DIR), "public", "file_manifest.json")
+LOCAL_UPLOAD_DIR = os.path.join(DATA_DIR, "local_uploads")
+
+OPENAI_API_BASE = "https://api.openai.com/v1"
+
+class OpenAIUploader:
+    """
+    Uploads files through the OpenAI Files API.
+
+    Args:
+        api_key (str, optional): API key; OPENAI_API_KEY by default
+        vector_store_id (str, optional): Vector store each upload is added to,
+            so the assistant's file search picks it up
+        timeout (float): Request timeout in seconds
+    """
+
+    name = "openai"
+
+    def __init__(self, api_key=None, vector_store_id=None, timeout=120):
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("OPENAI_API_KEY is not set")
+        self.vector_store_id = vector_store_id
+        self.timeout = timeout
+        # Same headers as functions/openai-proxy.js
+        self.headers = {"Authorization": f"Bearer {self.api_key}", "OpenAI-Beta": "assistants=v2"}
+
+    def upload(self, path):
+        """Upload a file and return its file ID."""
+        with open(path, 'rb') as f:
+            response = get_session().post(f"{OPENAI_API_BASE}/files", headers=self.headers,
+                                          data={"purpose": "assistants"},
+                                          files={"file": (os.path.basename(path), f)}, timeout=self.timeout)
+        response.raise_for_status()
+        file_id = response.json()["id"]
+        if self.vector_store_id:
+            response = get_session().post(f"{OPENAI_API_BASE}/vector_stores/{self.vector_store_id}/files",
+                                          headers=self.headers, json={"file_id": file_id}, timeout=self.timeout)
+            response.raise_for_status()
+        return file_id
+
+    def retrieve(self, file_id):
+        """Return the API's description of an uploaded file (id, filename, bytes, ...)."""
+        response = get_session().get(f"{OPENAI_API_BASE}/files/{file_id}", headers=self.headers,
+                                     timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def delete(self, file_id):
+        """Delete an uploaded file (it also leaves any vector store)."""
+        response = get_session().delete(f"{OPENAI_API_BASE}/files/{file_id}", headers=self.headers,
+                                        timeout=self.timeout)
+        if response.status_code != 404:
+            response.raise_for_status()
+
+class LocalUploader:
+    """
+    Local stand-in for the upload API.
+
+    A file is copied to <directory>/<file ID>/<file name>. File IDs are
+    derived from the contents, so uploading the same bytes twice yields the
+    same ID, like a content-addressed store.
+
+    Args:
+        directory (str): Directory the "uploaded" files are kept in
+    """
+
+    name = "local"
+
+    def __init__(self, directory=LOCAL_UPLOAD_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def upload(self, path):
+        """Copy a file into the upload directory and return its file ID."""
+        file_id = f"file-local-{sha256_file(path)[:24]}"
+        target_dir = os.path.join(self.directory, file_id)
+        os.makedirs(target_dir, exist_ok=True)
+        shutil.copyfile(path, os.path.join(target_dir, os.path.basename(path)))
+        return file_id
+
+    def retrieve(self, file_id):
+        """Return the id, filename and size of an uploaded file, like the Files API."""
+        target_dir = os.path.join(self.directory, file_id)
+        if not os.path.isdir(target_dir):
+            raise KeyError(f"No such file: {file_id}")
+        filename = os.listdir(target_dir)[0]
+        return {"id": file_id, "object": "file", "filename": filename,
+                "bytes": os.path.getsize(os.path.join(target_dir, filename)), "purpose": "assistants"}
+
+    def delete(self, file_id):
+        """Remove an uploaded file."""
+        shutil.rmtree(os.path.join(self.directory, file_id), ignore_errors=True)
+
+class PublishedFiles:
+    """
+    File IDs assigned to each document, kept across runs.
+
+    Each entry, keyed by document key, holds the current file ID, the
+    uploaded file name and SHA-256, the uploader and upload time, and the
+    IDs of earlier uploads of the document. The records also hold the
+    sequence of the last changeset applied (see publish_changes()).
+
+    Args:
+        path (str): JSON file holding the records
+    """
+
+    def __init__(self, path=PUBLISHED_FILES_PATH):
+        self.path = path
+        self.documents = {}
+        self.changeset_sequence = 0
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+            self.documents = records["documents"]
+            self.changeset_sequence = records.get("changeset_sequence", 0)
+
+    def save(self):
+        """Write the records atomically."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"changeset_sequence": self.changeset_sequence, "documents": dict(sorted(self.documents.items()))},
+                      f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def is_current(self, doc_key, sha256, uploader):
+        """Return True if the document was already uploaded with these contents by this uploader."""
+        entry = self.documents.get(doc_key)
+        return entry is not None and entry["sha256"] == sha256 and entry["uploader"] == uploader.name
+
+    def record(self, doc_key, path, sha256, file_id, uploader):
+        """Store a new upload of a document. Returns the file IDs it replaces."""
+        previous = self.documents.get(doc_key)
+        replaced = []
+        if previous is not None and previous["file_id"] != file_id:
+            replaced = [previous["file_id"]] + previous.get("previous_file_ids", [])
+        self.documents[doc_key] = {
+            "file_id": file_id,
+            "filename": os.path.basename(path),
+            "sha256": sha256,
+            "uploader": uploader.name,
+            "uploaded_at": datetime.now().isoformat(timespec="seconds"),
+            "previous_file_ids": [old for old in replaced if old != file_id]
+        }
+        return replaced
+
+    def forget_previous(self, doc_key):
+        """Drop the earlier file IDs of a document once their uploads are deleted."""
+        self.documents[doc_key]["previous_file_ids"] = []
+
+def publish_document(uploader, published, path, delete_replaced=False):
+    """
+    Upload one corpus document if its contents changed since its last upload.
+
+    Returns:
+        bool: True if the document was uploaded
+    """
+    doc_key = document_key({"filename": os.path.basename(path)})
+    sha256 = sha256_file(path)
+    if published.is_current(doc_key, sha256, uploader):
+        return False
+
+    file_id = uploader.upload(path)
+    replaced = published.record(doc_key, path, sha256, file_id, uploader)
+    if delete_replaced and replaced:
+        for old_id in replaced:
+            uploader.delete(old_id)
+        published.forget_previous(doc_key)
+    published.save()
+    print(f"Uploaded {os.path.basename(path)} as {file_id}")
+    return True
+
+def publish_documents(uploader, published, data_dir=DATA_DIR, delete_replaced=False):
+    """
+    Upload every corpus document whose contents changed since its last upload.
+
+    The records are saved after each upload, so an interrupted run keeps
+    the IDs it already obtained.
+
+    Args:
+        uploader (OpenAIUploader or LocalUploader): Where documents are uploaded
+        published (PublishedFiles): File ID records, updated in place
+        data_dir (str): Directory containing FSRAO_docs and Ontario_docs
+        delete_replaced (bool): Delete the earlier uploads of re-uploaded documents
+
+    Returns:
+        tuple: (uploaded, unchanged) document counts
+    """
+    uploaded = unchanged = 0
+    for _, path in iter_corpus_files(data_dir):
+        if publish_document(uploader, published, path, delete_replaced):
+            uploaded += 1
+        else:
+            unchanged += 1
+    return uploaded, unchanged
+
+def publish_changes(uploader, published, changesets, data_dir=DATA_DIR, delete_replaced=False):
+    """
+    Upload the documents named by changesets, without hashing the rest of the corpus.
+
+    Args:
+        uploader (OpenAIUploader or LocalUploader): Where documents are uploaded
+        published (PublishedFiles): File ID records, updated in place
+        changesets (iterable): Changesets from changeset.iter_changesets(), in order
+        data_dir (str): Directory containing FSRAO_docs and Ontario_docs
+        delete_replaced (bool): Delete the earlier uploads of re-uploaded or removed documents
+
+    Returns:
+        tuple: (uploaded, removed) document counts
+    """
+    paths = {document_key({"filename": os.path.basename(path)}): path for _, path in iter_corpus_files(data_dir)}
+    uploaded = removed = 0
+    for changeset in changesets:
+        doc_key = changeset["document"]
+        if doc_key in paths:
+            if publish_document(uploader, published, paths[doc_key], delete_replaced):
+                uploaded += 1
+        elif doc_key in published.documents:
+            # The document left the corpus
+            entry = published.documents.pop(doc_key)
+            if delete_replaced:
+                for file_id in [entry["file_id"]] + entry.get("previous_file_ids", []):
+                    uploader.delete(file_id)
+            removed += 1
+            print(f"Removed {entry['filename']}")
+        published.changeset_sequence = changeset.get("sequence", published.changeset_sequence)
+        published.save()
+    return uploaded, removed
+
+def top_level_citation_paths(path):
+    """Return the distinct citation paths of a document's top-level nodes, in order."""
+    _, records = iter_document_records(path)
+    paths = (section.get("citation_path", "") for section in iter_sections(records))
+    return [citation_path for citation_path in dict.fromkeys(paths) if citation_path]
+
+def build_file_manifest(published, data_dir=DATA_DIR):
+    """
+    Return the file-ID manifest for the published documents still in the corpus.
+
+    Display names and source URLs come from the citation manifest (see
+    citation_manifest.py), falling back to the document metadata.
+
+    Returns:
+        dict: {"files": file ID -> {filename, display_name, source_url, citation_paths}}
+    """
+    mappings = load_citation_mappings()
+    aliases = index_aliases(mappings)
+    files = {}
+    for _, path in iter_corpus_files(data_dir):
+        entry = published.documents.get(document_key({"filename": os.path.basename(path)}))
+        if entry is None:
+            continue
+        metadata, _ = iter_document_records(path)
+        index = aliases.get(alias_key(os.path.basename(path)))
+        mapping = mappings[index] if index is not None else {}
+        document = {
+            "filename": entry["filename"],
+            "display_name": mapping.get("display_name") or metadata.get("title", ""),
+            "source_url": mapping.get("source_url") or metadata.get("source_url", ""),
+            "citation_paths": top_level_citation_paths(path)
+        }
+        for file_id in [entry["file_id"]] + entry.get("previous_file_ids", []):
+            files[file_id] = document
+    return {"files": dict(sorted(files.items()))}
+
+def write_file_manifest(manifest, path=FILE_MANIFEST_PATH):
+    """Write the file-ID manifest atomically."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload the scraped documents and publish the file-ID manifest.")
+    parser.add_argument("--local", action="store_true", help="use the local upload stand-in instead of the API")
+    parser.add_argument("--vector-store", default=os.environ.get("OPENAI_VECTOR_STORE_ID"),
+                        help="vector store to add uploads to (default: OPENAI_VECTOR_STORE_ID)")
+    parser.add_argument("--delete-replaced", action="store_true", help="delete earlier uploads of changed documents")
+    parser.add_argument("--manifest-only", action="store_true", help="only rewrite the manifest from the records")
+    parser.add_argument("--changesets", help="only publish the documents named by the changesets in this NDJSON "
+                                             "file that were not applied yet")
+    parser.add_argument("--output", help="manifest file to write")
+    args = parser.parse_args()
+
+    if args.local:
+        os.makedirs(LOCAL_UPLOAD_DIR, exist_ok=True)
+        records_path = os.path.join(LOCAL_UPLOAD_DIR, "published_files.json")
+        output = args.output or os.path.join(LOCAL_UPLOAD_DIR, "file_manifest.json")
+    else:
+        records_path = PUBLISHED_FILES_PATH
+        output = args.output or FILE_MANIFEST_PATH
+
+    published = PublishedFiles(records_path)
+    if not args.manifest_only:
+        uploader = LocalUploader() if args.local else OpenAIUploader(vector_store_id=args.vector_store)
+        if args.changesets:
+            changesets = iter_changesets(args.changesets, after=published.changeset_sequence)
+            uploaded, removed = publish_changes(uploader, published, changesets, delete_replaced=args.delete_replaced)
+            print(f"{uploaded} documents uploaded, {removed} removed")
+        else:
+            uploaded, unchanged = publish_documents(uploader, published, delete_replaced=args.delete_replaced)
+            print(f"{uploaded} documents uploaded, {unchanged} unchanged")
+        published.save()
+
+    manifest = build_file_manifest(published)
+    write_file_manifest(manifest, output)
+    print(f"{len(manifest['files'])} file IDs written to {output}")
+
+if __name__ == "__main__":
+    main()
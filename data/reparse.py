@@ -0,0 +1,91 @@
+"""
+Rebuild data/FSRAO_docs and data/Ontario_docs from the raw snapshot cache.
+
+Every PDF and rendered page the scrapers fetched is kept in raw_cache/, so a
+change to the parsers can be applied to the whole corpus offline. Documents
+are parsed across a process pool, largest first, so the big statutes do not
+end up running alone at the end.
+
+Usage:
+    python reparse.py [--workers N] [--only fsrao|ontario] [--format json|ndjson|binary]
+"""
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from snapshot_cache import SnapshotCache
+from json_stream import OUTPUT_FORMATS
+
+def reparse_pdf(cache_dir, url, entry, output_format="json"):
+    """Rebuild one FSRA document from its cached PDF. Returns the output path."""
+    from fsrao_pdf_scraper import stream_pdf_to_json_file
+
+    cache = SnapshotCache(cache_dir)
+    # Page extraction stays serial: the documents already run in parallel
+    return stream_pdf_to_json_file(cache.object_path(entry["sha256"]), url, workers=1,
+                                   output_format=output_format)
+
+def reparse_html(cache_dir, url, entry, output_format="json"):
+    """Rebuild one Ontario law document from its cached page source. Returns the output path."""
+    from ontario_law_scraper import iter_act_content, stream_structured_document
+
+    cache = SnapshotCache(cache_dir)
+    page_source = cache.load(entry["sha256"]).decode('utf-8')
+    return stream_structured_document(iter_act_content(page_source), entry["title"], entry["citation"], url,
+                                      output_format)
+
+REPARSERS = {
+    "pdf": reparse_pdf,
+    "html": reparse_html
+}
+
+def reparse_all(cache_dir=None, workers=None, kinds=("pdf", "html"), output_format="json"):
+    """
+    Rebuild every cached document.
+
+    Args:
+        cache_dir (str, optional): Snapshot cache directory
+        workers (int, optional): Process count, defaults to the CPU count
+        kinds (tuple): Snapshot kinds to rebuild ("pdf" for FSRA, "html" for Ontario Laws)
+        output_format (str): "json", "ndjson" or "binary" (see json_stream.OUTPUT_FORMATS)
+
+    Returns:
+        dict: Output path for each source URL (None where parsing failed)
+    """
+    cache = SnapshotCache(cache_dir) if cache_dir else SnapshotCache()
+    jobs = [(url, entry) for url, entry in cache.entries() if entry["kind"] in kinds]
+
+    # Largest documents first keeps the pool busy until the very end
+    jobs.sort(key=lambda job: job[1]["size"], reverse=True)
+
+    results = {}
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(REPARSERS[entry["kind"]], cache.cache_dir, url, entry, output_format): url
+            for url, entry in jobs
+        }
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                results[url] = future.result()
+                print(f"Rebuilt {results[url]} from {url}")
+            except Exception as e:
+                results[url] = None
+                print(f"Failed to rebuild {url}: {e}")
+
+    print(f"Rebuilt {sum(1 for path in results.values() if path)} of {len(jobs)} documents "
+          f"in {time.perf_counter() - started:.1f}s")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the structured JSON documents from the raw snapshot cache.")
+    parser.add_argument("--workers", type=int, default=None, help="number of parser processes")
+    parser.add_argument("--only", choices=["fsrao", "ontario"], help="rebuild only one document set")
+    parser.add_argument("--format", choices=list(OUTPUT_FORMATS), default="json", help="output document format")
+    args = parser.parse_args()
+
+    kinds = {"fsrao": ("pdf",), "ontario": ("html",)}.get(args.only, ("pdf", "html"))
+    reparse_all(workers=args.workers, kinds=kinds, output_format=args.format)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Local HTTP retrieval service over the scraped corpus.
+
+The corpus, the search index and the citation index are loaded once at
+startup and kept in memory, so a request never reads a document file. The
+service answers the lookups the chat front end otherwise routes through the
+assistant, and can stand in for it as the retrieval backend:
+
+    GET /search?q=liability+limits&k=10      BM25 search hits, near-duplicates folded
+    GET /citation?c=s.+263(a)&document=...   nodes a citation names
+    GET /section?citation=s.+263&document=.. the nodes with their subtrees
+    GET /section?node=1234                   one node with its subtree
+    GET /health                              corpus size and cache statistics
+
+Responses are JSON. Search results and sections are kept in size-bounded
+LRU caches, so repeated questions and popular sections are answered without
+recomputing them. Requests are handled on one thread each.
+
+benchmarks/bench_retrieval.py measures latency and throughput under
+concurrent load.
+
+Usage:
+    python retrieval_server.py [--host 127.0.0.1] [--port 8765] [--cache-size 1024]
+"""
+import json
+import time
+import argparse
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from corpus_store import load_corpus
+from search_index import load_search_index
+from dedup import load_duplicate_index
+from citation_index import CitationIndex, normalize_citation
+
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE = 1024
+MAX_RESULTS = 100
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache holding at most max_size entries.
+
+    Args:
+        max_size (int): Number of entries kept; 0 disables caching
+    """
+
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, compute):
+        """
+        Return the cached value for a key, computing and storing it on a miss.
+
+        compute() runs outside the lock, so a slow miss does not block other
+        requests; two threads missing on the same key may both compute it.
+        """
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+
+        value = compute()
+        if self.max_size:
+            with self.lock:
+                self.entries[key] = value
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+        return value
+
+    def stats(self):
+        """Return the entry count, capacity, hits and misses."""
+        with self.lock:
+            return {"size": len(self.entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+class RetrievalService:
+    """
+    In-memory search, citation lookup and section fetch over the corpus.
+
+    Args:
+        store (CorpusStore, optional): Corpus; loaded with load_corpus() by default
+        cache_size (int): Entries in each of the search and section caches
+    """
+
+    def __init__(self, store=None, cache_size=DEFAULT_CACHE_SIZE):
+        self.store = store if store is not None else load_corpus()
+        self.search_index = load_search_index(store=self.store)
+        self.duplicates = load_duplicate_index(store=self.store)
+        self.citation_index = CitationIndex(self.store)
+        self.search_cache = LRUCache(cache_size)
+        self.section_cache = LRUCache(cache_size)
+        self.started = time.time()
+
+    def search(self, query, k=10):
+        """
+        Return the top-k search hits for a query (see SearchIndex.search).
+
+        Near-duplicate sections are folded into one hit whose "duplicates"
+        lists the other copies (see DuplicateIndex.collapse_hits).
+        """
+        k = max(1, min(k, MAX_RESULTS))
+        # Queries differing only in case or spacing share one cache entry
+        key = (" ".join(query.lower().split()), k)
+        return self.search_cache.get(key, lambda: self.duplicates.collapse_hits(self.search_index.search(query, k)))
+
+    def citation(self, citation, document=None):
+        """Return the nodes a citation names (see CitationIndex.resolve)."""
+        return self.citation_index.resolve(citation, document)
+
+    def node(self, node):
+        """Return one node rebuilt as its original JSON object, with its subtree and document title."""
+        return self.section_cache.get(node, lambda: self._node(node))
+
+    def _node(self, node):
+        store = self.store
+        document = store.document(node)
+        return {
+            "node": node,
+            "title": document["title"],
+            "citation": document.get("citation", ""),
+            "section": store.to_dict(node)
+        }
+
+    def section(self, citation, document=None):
+        """Return the nodes a citation names, each with its subtree."""
+        return [self.node(hit["node"]) for hit in self.citation(citation, document)]
+
+    def health(self):
+        """Return the corpus size, uptime and cache statistics."""
+        return {
+            "status": "ok",
+            "documents": len(self.store.documents),
+            "nodes": len(self.store),
+            "uptime": round(time.time() - self.started, 1),
+            "search_cache": self.search_cache.stats(),
+            "section_cache": self.section_cache.stats()
+        }
+
+class RetrievalHandler(BaseHTTPRequestHandler):
+    """Maps GET requests onto the RetrievalService of the server."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle's algorithm the
+    # body waits for the client's delayed ACK, adding ~40 ms to every response
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        route = self.server.routes.get(url.path.rstrip("/") or "/")
+        if route is None:
+            self.send_json(404, {"error": f"unknown path {url.path}"})
+            return
+        try:
+            status, body = route(self.server.service, params)
+        except ValueError as e:
+            status, body = 400, {"error": str(e)}
+        self.send_json(status, body)
+
+    def send_json(self, status, body):
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        # The front end is served from another origin during local development
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+def required(params, name):
+    """Return a query parameter, or raise ValueError when it is missing or blank."""
+    value = params.get(name, "").strip()
+    if not value:
+        raise ValueError(f"missing parameter {name!r}")
+    return value
+
+def document_param(params):
+    """Return the optional document parameter; digits select a document index."""
+    document = params.get("document", "").strip()
+    if not document:
+        return None
+    return int(document) if document.isdigit() else document
+
+def handle_search(service, params):
+    query = required(params, "q")
+    hits = service.search(query, int(params.get("k", 10)))
+    return 200, {"query": query, "hits": hits}
+
+def handle_citation(service, params):
+    citation = required(params, "c")
+    hits = service.citation(citation, document_param(params))
+    return (200 if hits else 404), {"citation": citation, "normalized": normalize_citation(citation), "hits": hits}
+
+def handle_section(service, params):
+    if "node" in params:
+        node = int(params["node"])
+        if not 0 <= node < len(service.store):
+            return 404, {"error": f"no node {node}"}
+        return 200, {"sections": [service.node(node)]}
+    citation = required(params, "citation")
+    sections = service.section(citation, document_param(params))
+    return (200 if sections else 404), {"citation": citation, "sections": sections}
+
+def handle_health(service, params):
+    return 200, service.health()
+
+ROUTES = {
+    "/search": handle_search,
+    "/citation": handle_citation,
+    "/section": handle_section,
+    "/health": handle_health
+}
+
+def make_server(service, host="127.0.0.1", port=DEFAULT_PORT, verbose=False):
+    """
+    Create (but do not start) the HTTP server for a service.
+
+    Args:
+        service (RetrievalService): Loaded service
+        host (str): Interface to bind
+        port (int): Port to bind; 0 picks a free one
+        verbose (bool): Log every request
+
+    Returns:
+        ThreadingHTTPServer: Call serve_forever() to run it
+    """
+    server = ThreadingHTTPServer((host, port), RetrievalHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.routes = ROUTES
+    server.verbose = verbose
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve search, citation lookup and sections of the corpus over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to bind")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE,
+                        help="entries in each of the search and section caches (0 disables them)")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    start = time.time()
+    service = RetrievalService(cache_size=args.cache_size)
+    print(f"Loaded {len(service.store.documents)} documents ({len(service.store)} nodes) "
+          f"in {time.time() - start:.2f}s")
+
+    server = make_server(service, args.host, args.port, args.verbose)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
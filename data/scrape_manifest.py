@@ -0,0 +1,150 @@
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime
+import requests
+from requests.adapters import HTTPAdapter
+from driver_pool import USER_AGENT
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_PATH = os.path.join(DATA_DIR, "scrape_manifest.json")
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """Return the shared HTTP session, with pooled keep-alive connections."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+            _session.headers["User-Agent"] = USER_AGENT
+    return _session
+
+def unique_urls(urls):
+    """Drop repeated URLs while keeping the original order."""
+    return list(dict.fromkeys(urls))
+
+def sha256_bytes(data):
+    """Return the hex SHA-256 digest of bytes (str is encoded as UTF-8)."""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+def sha256_file(path, chunk_size=1 << 20):
+    """Return the hex SHA-256 digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ScrapeManifest:
+    """
+    Persistent record of what was fetched from each source URL.
+
+    Each entry stores the ETag, Last-Modified, content SHA-256 and output
+    path of the last successful scrape, so later runs can send conditional
+    requests and skip sources that have not changed.
+
+    Args:
+        path (str): Location of the manifest JSON file
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get("sources", {})
+
+    def save(self):
+        """Write the manifest atomically."""
+        with self._lock:
+            data = {"sources": dict(sorted(self.entries.items()))}
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def entry(self, url):
+        """Return the stored entry for a URL, or an empty dict. output_path is returned as an absolute path."""
+        with self._lock:
+            entry = dict(self.entries.get(url, {}))
+        if entry.get("output_path"):
+            # Paths are stored relative to the data directory; older absolute ones join unchanged
+            entry["output_path"] = os.path.join(DATA_DIR, entry["output_path"])
+        return entry
+
+    def forget_validators(self, url):
+        """Drop the ETag and Last-Modified of a URL, e.g. when its content did not come from a direct response."""
+        with self._lock:
+            if url in self.entries:
+                self.entries[url]["etag"] = None
+                self.entries[url]["last_modified"] = None
+
+    def has_output(self, url):
+        """Return True if the URL's last output file still exists."""
+        output_path = self.entry(url).get("output_path")
+        return bool(output_path) and os.path.exists(output_path)
+
+    def conditional_get(self, url, timeout=30):
+        """
+        Fetch a URL, sending If-None-Match / If-Modified-Since when known.
+
+        Args:
+            url (str): Source URL
+            timeout (float): Request timeout in seconds
+
+        Returns:
+            requests.Response: The response, or None if the server answered
+            304 Not Modified and the previous output is still on disk
+        """
+        entry = self.entry(url)
+        headers = {}
+        if self.has_output(url):
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = get_session().get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        return response
+
+    def is_unchanged(self, url, sha256):
+        """Return True if the content hash matches and the output still exists."""
+        return self.entry(url).get("sha256") == sha256 and self.has_output(url)
+
+    def record(self, url, sha256, output_path, response=None):
+        """
+        Store the result of a successful scrape and save the manifest.
+
+        Args:
+            url (str): Source URL
+            sha256 (str): Hash of the fetched content
+            output_path (str): Path of the structured JSON written for it, stored relative to the data directory
+            response (requests.Response, optional): Response whose validators to keep
+        """
+        entry = {
+            "sha256": sha256,
+            "output_path": os.path.relpath(output_path, DATA_DIR),
+            "checked_at": datetime.now().isoformat(timespec="seconds")
+        }
+        if response is not None:
+            entry["etag"] = response.headers.get("ETag")
+            entry["last_modified"] = response.headers.get("Last-Modified")
+        else:
+            previous = self.entry(url)
+            entry["etag"] = previous.get("etag")
+            entry["last_modified"] = previous.get("last_modified")
+        with self._lock:
+            self.entries[url] = entry
+        self.save()
@@ -0,0 +1,402 @@
+"""
+Run the FSRA and Ontario Laws scrapes together on one asyncio event loop.
+
+Every source URL is a job. Jobs for different hosts run concurrently, and
+each host has its own limit on concurrent requests and on requests per
+second, so fsrao.ca and ontario.ca are both kept busy without hammering
+either. Failed fetches are retried with exponential backoff (honouring
+Retry-After), and requests that can never succeed, such as a 404, fail
+immediately.
+
+Fetching (HTTP, browser downloads and page rendering) runs in a thread
+pool. Parsing is CPU-bound and runs in a process pool, outside the host
+limit, so the next page is fetched while the previous one is parsed.
+
+Job state is written to scrape_jobs.json after every change. An
+interrupted run picks up where it stopped: finished jobs are skipped and
+the rest are tried again.
+
+Usage:
+    python scrape_orchestrator.py [--only fsrao|ontario] [--fresh] [--format json|ndjson|binary]
+"""
+import os
+import json
+import random
+import asyncio
+import argparse
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import requests
+from driver_pool import DriverPool
+from scrape_manifest import ScrapeManifest, sha256_bytes, sha256_file, unique_urls
+from snapshot_cache import SnapshotCache
+from fsrao_pdf_scraper import (FSRAO_URLS, download_chrome_options, download_pdf, fetch_pdf_direct,
+                               stream_pdf_to_json_file, worker_download_dir)
+from ontario_law_scraper import ONTARIO_URLS, render_act_page, save_act_page
+
+JOBS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scrape_jobs.json")
+
+# Concurrent requests and request rate allowed per host
+HOST_LIMITS = {
+    "www.fsrao.ca": {"concurrency": 4, "requests_per_second": 2.0},
+    "www.ontario.ca": {"concurrency": 2, "requests_per_second": 0.5},
+}
+DEFAULT_HOST_LIMIT = {"concurrency": 2, "requests_per_second": 1.0}
+
+# HTTP statuses worth retrying; any other HTTP error fails the job at once
+RETRY_STATUSES = (408, 425, 429, 500, 502, 503, 504)
+
+def job_kind(url):
+    """Return the scraper that handles a URL: "fsrao" or "ontario"."""
+    host = urlparse(url).hostname or ""
+    if host.endswith("fsrao.ca"):
+        return "fsrao"
+    if host.endswith("ontario.ca"):
+        return "ontario"
+    raise ValueError(f"No scraper for {url}")
+
+def is_retryable(error):
+    """Return True if a failed fetch may succeed when tried again."""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRY_STATUSES
+    return not isinstance(error, ValueError)
+
+def retry_after(error):
+    """Return the delay in seconds requested by a Retry-After header, or None."""
+    response = getattr(error, "response", None)
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """Return the delay before retry number `attempt` (1-based): exponential with jitter, at most cap."""
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+class HostLimiter:
+    """
+    Async context manager that bounds the concurrency and request rate of one host.
+
+    Args:
+        concurrency (int): Requests allowed in flight at once
+        requests_per_second (float): Maximum rate of request starts (0 for no limit)
+    """
+
+    def __init__(self, concurrency, requests_per_second):
+        self.concurrency = max(1, concurrency)
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        try:
+            # Reserve the next start slot, then wait for it outside the lock
+            async with self._lock:
+                now = asyncio.get_running_loop().time()
+                start = max(now, self._next_start)
+                self._next_start = start + self.interval
+            if start > now:
+                await asyncio.sleep(start - now)
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+
+class JobStore:
+    """
+    On-disk state of every scrape job, so an interrupted run can resume.
+
+    Each job records its kind, status ("pending", "done" or "failed"), the
+    number of attempts, the output path and the last error.
+
+    Args:
+        path (str): Location of the job state JSON file
+    """
+
+    def __init__(self, path=JOBS_PATH):
+        self.path = path
+        self.jobs = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.jobs = json.load(f).get("jobs", {})
+
+    def save(self):
+        """Write the job state atomically."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"jobs": self.jobs}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def add(self, url, kind, fresh=False):
+        """
+        Register a job. Finished jobs are kept unless fresh is set; failed ones get a new set of attempts.
+
+        Returns:
+            bool: True if the job still has to run
+        """
+        job = self.jobs.get(url)
+        if job is not None and job["status"] == "done" and not fresh:
+            return False
+        self.jobs[url] = {"kind": kind, "status": "pending", "attempts": 0, "output_path": None, "error": None}
+        return True
+
+    def update(self, url, **fields):
+        """Change fields of a job and save the state."""
+        self.jobs[url].update(fields, updated_at=datetime.now().isoformat(timespec="seconds"))
+        self.save()
+
+    def counts(self):
+        """Return the number of jobs in each status."""
+        counts = {}
+        for job in self.jobs.values():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return counts
+
+def _parse_act_page(page_source, title, citation, url, parser, output_format):
+    """Parse and save a rendered Ontario page in a worker process; returns the output path."""
+    return save_act_page(page_source, title, citation, url, parser, output_format, summarize=False)[0]
+
+def _download_pdf(driver, slot, url):
+    """Download a PDF in a worker's directory; on failure, remove whatever the attempt left there."""
+    download_dir = worker_download_dir(slot)
+    before = set(os.listdir(download_dir))
+    try:
+        return download_pdf(driver, url, download_dir)
+    except Exception:
+        # A partial or truncated file would be picked up by the next download in this directory
+        for name in set(os.listdir(download_dir)) - before:
+            os.remove(os.path.join(download_dir, name))
+        raise
+
+class ScrapeOrchestrator:
+    """
+    Concurrent, rate-limited and resumable scraping of FSRA PDFs and Ontario Laws pages.
+
+    Args:
+        jobs (JobStore, optional): Job state; loaded from JOBS_PATH by default
+        host_limits (dict, optional): Per-host {"concurrency", "requests_per_second"},
+            HOST_LIMITS by default
+        max_attempts (int): Fetch attempts per job before it is marked failed
+        backoff_base (float): Delay in seconds before the first retry
+        backoff_cap (float): Longest delay between retries
+        parse_workers (int, optional): Parsing processes, defaults to the CPU count
+        manifest (ScrapeManifest, optional): Manifest to use; loaded from disk by default
+        cache (SnapshotCache, optional): Raw snapshot cache; opened from disk by default
+        output_format (str): "json", "ndjson" or "binary" (see json_stream.OUTPUT_FORMATS)
+        parser (str): HTML parser backend for Ontario pages
+        recycle_after (int): Pages each browser loads before it is restarted
+    """
+
+    def __init__(self, jobs=None, host_limits=None, max_attempts=5, backoff_base=1.0, backoff_cap=60.0,
+                 parse_workers=None, manifest=None, cache=None, output_format="json", parser="lxml",
+                 recycle_after=20):
+        self.jobs = jobs if jobs is not None else JobStore()
+        self.host_limits = host_limits if host_limits is not None else HOST_LIMITS
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.parse_workers = parse_workers
+        self.manifest = manifest if manifest is not None else ScrapeManifest()
+        self.cache = cache if cache is not None else SnapshotCache()
+        self.output_format = output_format
+        self.parser = parser
+        self.recycle_after = recycle_after
+        self._limiters = {}
+        self._driver_pools = {}
+
+    def _limit(self, host):
+        return self.host_limits.get(host, DEFAULT_HOST_LIMIT)
+
+    def _limiter(self, url):
+        host = urlparse(url).hostname
+        if host not in self._limiters:
+            limit = self._limit(host)
+            self._limiters[host] = HostLimiter(limit["concurrency"], limit["requests_per_second"])
+        return self._limiters[host]
+
+    def _driver_pool(self, url):
+        """Return the browser pool of a URL's host, sized to its concurrency limit."""
+        host = urlparse(url).hostname
+        if host not in self._driver_pools:
+            options_factory = None
+            if job_kind(url) == "fsrao":
+                def options_factory(slot):
+                    return download_chrome_options(worker_download_dir(slot))
+            self._driver_pools[host] = DriverPool(size=self._limit(host)["concurrency"],
+                                                  recycle_after=self.recycle_after,
+                                                  options_factory=options_factory)
+        return self._driver_pools[host]
+
+    def _fetch_fsrao(self, url):
+        """
+        Fetch an FSRA PDF (blocking).
+
+        Returns:
+            tuple: ("unchanged", output_path) or ("parse", pdf_path, sha256, response)
+        """
+        status, pdf_path, response = fetch_pdf_direct(url, self.manifest)
+        if status == "unchanged":
+            return "unchanged", self.manifest.entry(url).get("output_path")
+        if status == "browser":
+            # The response is the HTML page, not the PDF, so its validators say nothing about the PDF
+            response = None
+            self.manifest.forget_validators(url)
+            pdf_path = self._driver_pool(url).run_task(_download_pdf, url)
+
+        try:
+            sha256 = sha256_file(pdf_path)
+            self.cache.store_file(url, pdf_path, "pdf", sha256=sha256)
+        except Exception:
+            os.remove(pdf_path)
+            raise
+        if self.manifest.is_unchanged(url, sha256):
+            os.remove(pdf_path)
+            output_path = self.manifest.entry(url)["output_path"]
+            self.manifest.record(url, sha256, output_path, response)
+            return "unchanged", output_path
+        return "parse", pdf_path, sha256, response
+
+    def _fetch_ontario(self, url):
+        """
+        Render an Ontario Laws page (blocking).
+
+        Returns:
+            tuple: ("unchanged", output_path) or ("parse", (page_source, title, citation), sha256, response)
+        """
+        response = None
+        try:
+            response = self.manifest.conditional_get(url)
+            if response is None:
+                return "unchanged", self.manifest.entry(url).get("output_path")
+        except Exception as e:
+            print(f"Conditional request failed for {url}: {e}")
+
+        page = self._driver_pool(url).run_task(lambda driver, slot, item: render_act_page(driver, item), url)
+        sha256 = sha256_bytes(page[0])
+        if self.manifest.is_unchanged(url, sha256):
+            output_path = self.manifest.entry(url)["output_path"]
+            self.manifest.record(url, sha256, output_path, response)
+            return "unchanged", output_path
+        self.cache.store_bytes(url, page[0], "html", sha256=sha256, title=page[1], citation=page[2])
+        return "parse", page, sha256, response
+
+    async def _fetch(self, url, kind, io_executor):
+        """Fetch a job's source within its host limit, retrying with backoff. Returns the fetch result."""
+        loop = asyncio.get_running_loop()
+        fetch = self._fetch_fsrao if kind == "fsrao" else self._fetch_ontario
+        attempts = self.jobs.jobs[url]["attempts"]
+        while True:
+            attempts += 1
+            self.jobs.update(url, attempts=attempts)
+            try:
+                async with self._limiter(url):
+                    return await loop.run_in_executor(io_executor, fetch, url)
+            except Exception as e:
+                if attempts >= self.max_attempts or not is_retryable(e):
+                    raise
+                delay = retry_after(e)
+                if delay is None:
+                    delay = backoff_delay(attempts, self.backoff_base, self.backoff_cap)
+                print(f"Fetch {attempts} of {url} failed ({e}), retrying in {delay:.1f}s")
+                self.jobs.update(url, error=str(e))
+                await asyncio.sleep(delay)
+
+    async def _parse(self, url, kind, fetched, parse_executor):
+        """Parse a fetched source in the parse executor and record it. Returns the output path."""
+        loop = asyncio.get_running_loop()
+        _, source, sha256, response = fetched
+        if kind == "fsrao":
+            try:
+                # Extraction stays serial inside the worker; the pool already spreads documents over processes
+                output_path = await loop.run_in_executor(
+                    parse_executor, stream_pdf_to_json_file, source, url, 1, self.output_format)
+            finally:
+                os.remove(source)
+        else:
+            page_source, title, citation = source
+            output_path = await loop.run_in_executor(
+                parse_executor, _parse_act_page, page_source, title, citation, url, self.parser, self.output_format)
+        self.manifest.record(url, sha256, output_path, response)
+        return output_path
+
+    async def _run_job(self, url, io_executor, parse_executor):
+        kind = self.jobs.jobs[url]["kind"]
+        try:
+            fetched = await self._fetch(url, kind, io_executor)
+            if fetched[0] == "unchanged":
+                print(f"Not modified, keeping {fetched[1]} for {url}")
+                output_path = fetched[1]
+            else:
+                output_path = await self._parse(url, kind, fetched, parse_executor)
+                print(f"Data for {url} saved to {output_path}")
+        except Exception as e:
+            print(f"Job for {url} failed: {e}")
+            self.jobs.update(url, status="failed", error=str(e))
+            return None
+        self.jobs.update(url, status="done", output_path=output_path, error=None)
+        return output_path
+
+    async def run(self, urls, fresh=False):
+        """
+        Scrape URLs concurrently, skipping jobs a previous run already finished.
+
+        Args:
+            urls (list): FSRA PDF and Ontario Laws URLs (duplicates are scraped once)
+            fresh (bool): Run every job again, even finished ones
+
+        Returns:
+            dict: Output path of every URL (None where the job failed)
+        """
+        urls = unique_urls(urls)
+        pending = [url for url in urls if self.jobs.add(url, job_kind(url), fresh)]
+        self.jobs.save()
+        print(f"{len(pending)} of {len(urls)} jobs to run")
+
+        hosts = {urlparse(url).hostname for url in pending}
+        io_workers = sum(self._limit(host)["concurrency"] for host in hosts) or 1
+        io_executor = ThreadPoolExecutor(max_workers=io_workers)
+        parse_executor = ProcessPoolExecutor(max_workers=self.parse_workers)
+        try:
+            await asyncio.gather(*(self._run_job(url, io_executor, parse_executor) for url in pending))
+        finally:
+            io_executor.shutdown(wait=False, cancel_futures=True)
+            parse_executor.shutdown(wait=False, cancel_futures=True)
+            for pool in self._driver_pools.values():
+                pool.close()
+            self._driver_pools = {}
+
+        print(f"Jobs: {self.jobs.counts()}")
+        return {url: self.jobs.jobs[url]["output_path"] for url in urls}
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape FSRA and Ontario Laws documents concurrently.")
+    parser.add_argument("--only", choices=["fsrao", "ontario"], help="scrape only one source")
+    parser.add_argument("--fresh", action="store_true", help="ignore finished jobs from earlier runs")
+    parser.add_argument("--format", choices=["json", "ndjson", "binary"], default="json", help="output format")
+    parser.add_argument("--parse-workers", type=int, default=None, help="parsing processes")
+    args = parser.parse_args()
+
+    urls = []
+    if args.only != "ontario":
+        urls.extend(FSRAO_URLS)
+    if args.only != "fsrao":
+        urls.extend(ONTARIO_URLS)
+
+    orchestrator = ScrapeOrchestrator(parse_workers=args.parse_workers, output_format=args.format)
+    asyncio.run(orchestrator.run(urls, fresh=args.fresh))
+
+if __name__ == "__main__":
+    main()
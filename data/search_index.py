@@ -0,0 +1,265 @@
+"""
+BM25 full-text search over the structure nodes of the scraped corpus.
+
+Every node's text, title and defined term is tokenized into an inverted
+index. Postings are stored column-wise (CSR): one array of node numbers and
+one array of precomputed BM25 weights per posting, sliced by each term's
+offset. A query therefore adds a few weight arrays into a score vector and
+takes the top k with argpartition, without touching the documents.
+
+The index files are plain .npy arrays plus a term list, memory-mapped on
+load. Node numbers refer to the CorpusStore the index was built from, and
+the index is rebuilt automatically when the corpus changes. Near-duplicate
+sections found by dedup.py are left out, so each provision is indexed once;
+a changed duplicate set also triggers a rebuild.
+
+Usage:
+    python search_index.py "minimum liability limits for automobile policies" [-k 10]
+"""
+import os
+import re
+import json
+import time
+import argparse
+from collections import Counter
+import numpy as np
+from corpus_store import DATA_DIR, load_corpus
+from dedup import dedup_exclusion
+
+SEARCH_INDEX_DIR = os.path.join(DATA_DIR, "search_index")
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)*")
+
+# Very common words carry no ranking signal and have the longest posting lists
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have if in into is it its of on or
+such that the their then there these this to was were which will with
+""".split())
+
+def tokenize(text):
+    """Lowercase text and split it into index terms, dropping stopwords."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+def node_search_text(store, node):
+    """Return the searchable text of a node: its title, defined term and text."""
+    parts = [store.title(node), store.text(node)]
+    if store.label_key(node) == "term":
+        parts.append(store.label(node))
+    return " ".join(part for part in parts if part)
+
+class SearchIndex:
+    """
+    BM25 inverted index over a CorpusStore.
+
+    Args:
+        store (CorpusStore): The corpus the node numbers refer to
+        terms (list): Index terms, sorted
+        offsets (ndarray): Start of each term's postings; offsets[-1] is the total count
+        postings (ndarray): Node numbers, grouped by term
+        weights (ndarray): BM25 weight of each posting
+    """
+
+    def __init__(self, store, terms, offsets, postings, weights, sources=None, dedup=None):
+        self.store = store
+        self.terms = terms
+        self.term_ids = {term: i for i, term in enumerate(terms)}
+        self.offsets = offsets
+        self.postings = postings
+        self.weights = weights
+        self.sources = sources if sources is not None else store.sources
+        # Signature of the near-duplicate set left out of the index, if any
+        self.dedup = dedup
+
+    @classmethod
+    def build(cls, store, k1=1.2, b=0.75, exclude=None, dedup=None):
+        """
+        Index every node of the store that has text, a title or a term.
+
+        Args:
+            store (CorpusStore): Corpus to index
+            k1 (float): BM25 term frequency saturation
+            b (float): BM25 length normalization
+            exclude (set, optional): Nodes to leave out, e.g. the near-duplicates
+                from dedup.DuplicateIndex.duplicate_nodes()
+            dedup (str, optional): Signature of the excluded duplicate set,
+                saved with the index
+
+        Returns:
+            SearchIndex: The built index
+        """
+        term_ids = {}
+        term_postings = []
+        lengths = np.zeros(len(store), dtype=np.float32)
+
+        for node in store.iter_nodes():
+            if exclude and node in exclude:
+                continue
+            tokens = tokenize(node_search_text(store, node))
+            if not tokens:
+                continue
+            lengths[node] = len(tokens)
+            for token, tf in Counter(tokens).items():
+                term_id = term_ids.get(token)
+                if term_id is None:
+                    term_id = term_ids[token] = len(term_postings)
+                    term_postings.append([])
+                term_postings[term_id].append((node, tf))
+
+        indexed = np.count_nonzero(lengths)
+        average_length = lengths.sum() / max(indexed, 1)
+        # Per-node BM25 length normalization, folded into every posting weight
+        norms = k1 * (1 - b + b * lengths / max(average_length, 1))
+
+        terms = sorted(term_ids)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        postings = np.empty(sum(len(p) for p in term_postings), dtype=np.int32)
+        weights = np.empty(len(postings), dtype=np.float32)
+        position = 0
+        for i, term in enumerate(terms):
+            entries = term_postings[term_ids[term]]
+            nodes = np.fromiter((node for node, _ in entries), dtype=np.int32, count=len(entries))
+            tfs = np.fromiter((tf for _, tf in entries), dtype=np.float32, count=len(entries))
+            idf = np.log(1 + (indexed - len(entries) + 0.5) / (len(entries) + 0.5))
+            end = position + len(entries)
+            postings[position:end] = nodes
+            weights[position:end] = idf * tfs * (k1 + 1) / (tfs + norms[nodes])
+            position = offsets[i + 1] = end
+
+        return cls(store, terms, offsets, postings, weights, dedup=dedup)
+
+    def save(self, index_dir=SEARCH_INDEX_DIR):
+        """Write the index to index_dir as .npy arrays and a term list."""
+        os.makedirs(index_dir, exist_ok=True)
+        np.save(os.path.join(index_dir, "offsets.npy"), self.offsets)
+        np.save(os.path.join(index_dir, "postings.npy"), self.postings)
+        np.save(os.path.join(index_dir, "weights.npy"), self.weights)
+        with open(os.path.join(index_dir, "terms.txt"), 'w', encoding='utf-8') as f:
+            f.write("\n".join(self.terms))
+        with open(os.path.join(index_dir, "index.json"), 'w', encoding='utf-8') as f:
+            json.dump({"sources": self.sources, "dedup": self.dedup}, f)
+
+    @classmethod
+    def load(cls, store, index_dir=SEARCH_INDEX_DIR):
+        """Load an index written by save(), memory-mapping its arrays."""
+        with open(os.path.join(index_dir, "terms.txt"), 'r', encoding='utf-8') as f:
+            text = f.read()
+        terms = text.split("\n") if text else []
+        with open(os.path.join(index_dir, "index.json"), 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        return cls(
+            store, terms,
+            np.load(os.path.join(index_dir, "offsets.npy"), mmap_mode='r'),
+            np.load(os.path.join(index_dir, "postings.npy"), mmap_mode='r'),
+            np.load(os.path.join(index_dir, "weights.npy"), mmap_mode='r'),
+            info["sources"],
+            info["dedup"]
+        )
+
+    def query_terms(self, query):
+        """Return (term id, count) pairs for the query tokens present in the index."""
+        return [
+            (self.term_ids[token], count) for token, count in Counter(tokenize(query)).items()
+            if token in self.term_ids
+        ]
+
+    def scores(self, query):
+        """Return the BM25 score of every node for a query (zero where no term matches)."""
+        return self._scores(self.query_terms(query))
+
+    def _scores(self, query_terms):
+        scores = np.zeros(len(self.store), dtype=np.float32)
+        for term_id, count in query_terms:
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            # Node numbers are unique within one posting list, so plain
+            # fancy-index addition is safe
+            scores[self.postings[start:end]] += count * self.weights[start:end]
+        return scores
+
+    def search(self, query, k=10):
+        """
+        Return the top-k nodes for a query.
+
+        Args:
+            query (str): Free-text query
+            k (int): Number of hits
+
+        Returns:
+            list: Hits as dicts with node, id, citation_path, title (the
+                document title), type and score, best first
+        """
+        query_terms = self.query_terms(query)
+        if not query_terms:
+            return []
+
+        # Partition on the negated scores: with k at the front, the many
+        # zero scores do not slow down the selection
+        negated = -self._scores(query_terms)
+        if k < len(negated):
+            top = np.argpartition(negated, k)[:k]
+        else:
+            top = np.arange(len(negated))
+        top = top[np.argsort(negated[top], kind='stable')]
+        scores = -negated
+
+        store = self.store
+        hits = []
+        for node in top.tolist():
+            if scores[node] <= 0:
+                break
+            hits.append({
+                "node": node,
+                "id": store.node_id(node),
+                "citation_path": store.citation_path(node),
+                "title": store.document(node)["title"],
+                "type": store.node_type(node),
+                "score": float(scores[node])
+            })
+        return hits
+
+def load_search_index(index_dir=SEARCH_INDEX_DIR, store=None, dedup=True):
+    """
+    Return the search index, rebuilding it when it is missing or out of date.
+
+    The index is out of date when the corpus or the near-duplicate set it
+    was built without has changed.
+
+    Args:
+        index_dir (str): Directory holding the index files
+        store (CorpusStore, optional): Corpus to search; loaded with load_corpus() by default
+        dedup (bool): Leave out near-duplicate sections (see dedup.py)
+
+    Returns:
+        SearchIndex: The index
+    """
+    if store is None:
+        store = load_corpus()
+    exclude, signature = dedup_exclusion(store, dedup)
+    if os.path.exists(os.path.join(index_dir, "index.json")):
+        index = SearchIndex.load(store, index_dir)
+        if index.sources == store.sources and index.dedup == signature:
+            return index
+
+    print("Building search index...")
+    index = SearchIndex.build(store, exclude=exclude, dedup=signature)
+    index.save(index_dir)
+    return index
+
+def main():
+    parser = argparse.ArgumentParser(description="Search the scraped FSRA and Ontario Laws documents.")
+    parser.add_argument("query", help="search terms")
+    parser.add_argument("-k", type=int, default=10, help="number of results")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = load_search_index()
+    loaded = time.perf_counter()
+    hits = index.search(args.query, args.k)
+    searched = time.perf_counter()
+
+    for hit in hits:
+        print(f"{hit['score']:7.3f}  {hit['citation_path']:<28} {hit['id']:<32} {hit['title']}")
+    print(f"\n{len(hits)} results in {(searched - loaded) * 1000:.2f}ms "
+          f"(index loaded in {(loaded - started) * 1000:.1f}ms)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+"""
+Point-in-time history of every section in the corpus.
+
+The scrapers only keep the latest copy of a document. SectionHistory records
+each scrape of a document against a date and keeps, per section (keyed as
+in the chunker, by node id), the list of versions with the date range each
+one was in force. Only the first version of a section is stored whole; a
+later version is stored as a line delta against the one before it, over the
+section's flattened node records (one compact JSON line per node), so an
+amendment to one paragraph costs one line. Every KEYFRAME_INTERVAL-th
+version is stored whole again, which bounds how many deltas a lookup has to
+replay.
+
+The Part layout and the metadata are versioned the same way, so a whole
+document can be rebuilt as it stood on a date. Validity ranges of all
+versions of a document are kept as NumPy arrays (an interval index): the
+versions in force on a date, or changed within a period, are found with one
+vectorized comparison.
+
+History is kept in section_history/<document key>.json.
+
+Usage:
+    python section_history.py --record [--as-of 2024-09-01]       # record the current corpus
+    python section_history.py DOCUMENT "s. 263" --as-of 2024-09-01  # a section as of a date
+    python section_history.py DOCUMENT --as-of 2024-09-01 --whole   # the whole document
+"""
+import os
+import json
+import difflib
+import argparse
+from bisect import bisect_right
+from datetime import date
+import numpy as np
+from corpus_store import DATA_DIR, iter_corpus_files
+from json_stream import flatten_section, iter_document_records, iter_sections
+from citation_index import document_key, normalize_citation
+from chunker import CONTAINER_TYPES, iter_keyed_sections, section_hash
+
+SECTION_HISTORY_DIR = os.path.join(DATA_DIR, "section_history")
+
+# Every this many versions of a section, one is stored whole instead of as a delta
+KEYFRAME_INTERVAL = 8
+
+# Days since the epoch for the open end of the current version's range
+OPEN_END = np.iinfo(np.int64).max
+
+def section_lines(section):
+    """Return a section's flattened node records as compact JSON lines."""
+    return [json.dumps(record, ensure_ascii=False, separators=(",", ":")) for record in flatten_section(section)]
+
+def section_from_lines(lines):
+    """Rebuild a section from the lines of section_lines()."""
+    return next(iter_sections(json.loads(line) for line in lines))
+
+def line_delta(old, new):
+    """
+    Return the edits that turn the old lines into the new ones.
+
+    Returns:
+        list: [start, end, lines] replacements of old[start:end], in order
+    """
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    return [[i1, i2, new[j1:j2]] for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"]
+
+def apply_delta(old, delta):
+    """Apply the edits of line_delta() to the old lines."""
+    lines = []
+    position = 0
+    for start, end, replacement in delta:
+        lines.extend(old[position:start])
+        lines.extend(replacement)
+        position = end
+    lines.extend(old[position:])
+    return lines
+
+def to_day(value):
+    """Return a date (or ISO date string) as days since the epoch."""
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    return int(np.datetime64(value, 'D').astype(np.int64))
+
+def _outline_of(node, ordinal):
+    """Return the layout of a top-level node: a section ordinal, or a container with its children."""
+    if node.get("type") in CONTAINER_TYPES and not node.get("text"):
+        header = {key: value for key, value in node.items() if key != "content"}
+        return {"node": header, "content": [_outline_of(child, ordinal) for child in node.get("content") or []]}
+    ordinal[0] += 1
+    return ordinal[0] - 1
+
+def _resolve_outline(outline, keys):
+    return [keys[item] if isinstance(item, int) else {"node": item["node"], "content": _resolve_outline(item["content"], keys)}
+            for item in outline]
+
+class SectionHistory:
+    """
+    Versioned store of the corpus' sections.
+
+    Args:
+        history_dir (str): Directory holding one history file per document
+    """
+
+    def __init__(self, history_dir=SECTION_HISTORY_DIR):
+        self.history_dir = history_dir
+        self._documents = {}
+        self._indexes = {}
+        self._dirty = set()
+
+    def _path(self, doc_key):
+        return os.path.join(self.history_dir, f"{doc_key}.json")
+
+    def document(self, doc_key):
+        """Return the stored history of a document, or None if it was never recorded."""
+        if doc_key not in self._documents:
+            path = self._path(doc_key)
+            if not os.path.exists(path):
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                self._documents[doc_key] = json.load(f)
+        return self._documents[doc_key]
+
+    def documents(self):
+        """Return the keys of every recorded document."""
+        if not os.path.isdir(self.history_dir):
+            return sorted(self._documents)
+        stored = {name[:-len(".json")] for name in os.listdir(self.history_dir) if name.endswith(".json")}
+        return sorted(stored | set(self._documents))
+
+    def save(self):
+        """Write the histories changed since the last save."""
+        os.makedirs(self.history_dir, exist_ok=True)
+        for doc_key in sorted(self._dirty):
+            path = self._path(doc_key)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._documents[doc_key], f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        self._dirty = set()
+
+    def _lines(self, versions, number):
+        """Rebuild the lines of one version by replaying deltas from the keyframe before it."""
+        start = number
+        while "lines" not in versions[start]:
+            start -= 1
+        lines = versions[start]["lines"]
+        for version in versions[start + 1:number + 1]:
+            lines = apply_delta(lines, version["delta"])
+        return lines
+
+    def record(self, doc_key, sections, metadata, as_of=None):
+        """
+        Record the current version of a document.
+
+        Sections whose content hash is unchanged keep their open version; a
+        changed section closes its version on as_of and gets a new one, and a
+        section that is gone is closed.
+
+        Args:
+            doc_key (str): Stable document key (see citation_index.document_key)
+            sections (iterable): Top-level structure nodes
+            metadata (dict): Document metadata
+            as_of (str, optional): ISO date the version is in force from;
+                metadata["last_updated"] (the scrape date) by default
+
+        Returns:
+            dict: Number of added, changed, removed and unchanged sections
+        """
+        as_of = (as_of or metadata.get("last_updated") or date.today().isoformat())[:10]
+        history = self.document(doc_key)
+        if history is None:
+            history = self._documents[doc_key] = {"document": doc_key, "recorded": None, "metadata": [],
+                                                  "outlines": [], "sections": {}}
+        recorded = history["recorded"]
+        if recorded and as_of < recorded:
+            raise ValueError(f"{doc_key} already has a version from {recorded}, cannot record one from {as_of}")
+
+        outline = []
+        ordinal = [0]
+
+        def top_level():
+            for node in sections:
+                outline.append(_outline_of(node, ordinal))
+                yield node
+
+        counts = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0}
+        keys = []
+        for section_key, _, section in iter_keyed_sections(top_level(), doc_key):
+            keys.append(section_key)
+            content_hash = section_hash(section)
+            versions = history["sections"].setdefault(section_key, [])
+            current = versions[-1] if versions and versions[-1]["to"] is None else None
+            if current is not None and current["hash"] == content_hash:
+                counts["unchanged"] += 1
+                continue
+
+            counts["changed" if current is not None else "added"] += 1
+            self._close(versions, as_of)
+            lines = section_lines(section)
+            version = {"from": as_of, "to": None, "hash": content_hash,
+                       "citation_path": section.get("citation_path", "")}
+            if versions and len(versions) % KEYFRAME_INTERVAL:
+                version["delta"] = line_delta(self._lines(versions, len(versions) - 1), lines)
+            else:
+                version["lines"] = lines
+            versions.append(version)
+
+        seen = set(keys)
+        for section_key, versions in list(history["sections"].items()):
+            if section_key not in seen and versions[-1]["to"] is None:
+                self._close(versions, as_of)
+                counts["removed"] += 1
+                if not versions:
+                    del history["sections"][section_key]
+
+        self._append_version(history["outlines"], "outline", _resolve_outline(outline, keys), as_of)
+        self._append_version(history["metadata"], "metadata", metadata, as_of,
+                             same=lambda old, new: {**old, "last_updated": None} == {**new, "last_updated": None})
+        history["recorded"] = as_of
+        self._dirty.add(doc_key)
+        self._indexes.pop(doc_key, None)
+        return counts
+
+    @staticmethod
+    def _close(versions, as_of):
+        """End the open version of a section on as_of; a version replaced on its first day is dropped."""
+        if not versions or versions[-1]["to"] is not None:
+            return
+        if versions[-1]["from"] == as_of:
+            versions.pop()
+        else:
+            versions[-1]["to"] = as_of
+
+    @staticmethod
+    def _append_version(entries, key, value, as_of, same=None):
+        """Append a dated value to a list of {"from", key} entries unless it equals the latest one."""
+        if entries:
+            latest = entries[-1][key]
+            if (same(latest, value) if same else latest == value):
+                return
+            if entries[-1]["from"] == as_of:
+                entries.pop()
+        entries.append({"from": as_of, key: value})
+
+    def record_file(self, path, as_of=None):
+        """Record a saved document file (any output format). Returns the counts of record()."""
+        metadata, records = iter_document_records(path)
+        return self.record(document_key({"filename": os.path.basename(path)}), iter_sections(records), metadata, as_of)
+
+    def interval_index(self, doc_key):
+        """
+        Return the validity ranges of every section version of a document.
+
+        Returns:
+            tuple: (keys, versions, starts, ends) arrays, one entry per version;
+                starts and ends are days since the epoch, ends is OPEN_END for
+                versions still in force
+        """
+        if doc_key not in self._indexes:
+            history = self.document(doc_key)
+            keys, numbers, starts, ends = [], [], [], []
+            for section_key, versions in (history or {"sections": {}})["sections"].items():
+                for number, version in enumerate(versions):
+                    keys.append(section_key)
+                    numbers.append(number)
+                    starts.append(to_day(version["from"]))
+                    ends.append(to_day(version["to"]) if version["to"] else OPEN_END)
+            self._indexes[doc_key] = (np.array(keys, dtype=object), np.array(numbers, dtype=np.int64),
+                                      np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64))
+        return self._indexes[doc_key]
+
+    def versions_at(self, doc_key, as_of):
+        """Return {section_key: version number} of the versions in force on a date."""
+        keys, numbers, starts, ends = self.interval_index(doc_key)
+        day = to_day(as_of)
+        valid = (starts <= day) & (day < ends)
+        return dict(zip(keys[valid].tolist(), numbers[valid].tolist()))
+
+    def changed_between(self, doc_key, start, end):
+        """Return the keys of the sections with a version starting or ending in (start, end]."""
+        keys, _, starts, ends = self.interval_index(doc_key)
+        first, last = to_day(start), to_day(end)
+        changed = ((starts > first) & (starts <= last)) | ((ends > first) & (ends <= last))
+        return sorted(set(keys[changed].tolist()))
+
+    def resolve(self, doc_key, section):
+        """Return the section key for a section key or a citation path ("s. 263") of a document."""
+        history = self.document(doc_key)
+        if history is None:
+            return None
+        if section in history["sections"]:
+            return section
+        wanted = normalize_citation(section)
+        for section_key, versions in history["sections"].items():
+            if normalize_citation(versions[-1]["citation_path"]) == wanted:
+                return section_key
+        return None
+
+    def section_as_of(self, doc_key, section, as_of):
+        """
+        Return a section as it stood on a date.
+
+        Args:
+            doc_key (str): Document key
+            section (str): Section key or citation path
+            as_of (str): ISO date
+
+        Returns:
+            dict: The section node with its subtree, or None if it was not in force
+        """
+        section_key = self.resolve(doc_key, section)
+        if section_key is None:
+            return None
+        versions = self.document(doc_key)["sections"][section_key]
+        starts = [version["from"] for version in versions]
+        number = bisect_right(starts, as_of[:10]) - 1
+        if number < 0 or (versions[number]["to"] is not None and versions[number]["to"] <= as_of[:10]):
+            return None
+        return section_from_lines(self._lines(versions, number))
+
+    def document_as_of(self, doc_key, as_of):
+        """
+        Rebuild a whole document as it stood on a date.
+
+        Returns:
+            dict: {"metadata", "structure"}, or None if the document had not been recorded by then
+        """
+        history = self.document(doc_key)
+        if history is None:
+            return None
+        as_of = as_of[:10]
+
+        def entry_at(entries):
+            number = bisect_right([entry["from"] for entry in entries], as_of) - 1
+            return entries[number] if number >= 0 else None
+
+        outline = entry_at(history["outlines"])
+        if outline is None:
+            return None
+        in_force = self.versions_at(doc_key, as_of)
+
+        def build(items):
+            nodes = []
+            for item in items:
+                if isinstance(item, str):
+                    if item in in_force:
+                        nodes.append(section_from_lines(self._lines(history["sections"][item], in_force[item])))
+                else:
+                    nodes.append(dict(item["node"], content=build(item["content"])))
+            return nodes
+
+        return {"metadata": entry_at(history["metadata"])["metadata"], "structure": build(outline["outline"])}
+
+def main():
+    parser = argparse.ArgumentParser(description="Record the corpus' section history or look a section up as of a date.")
+    parser.add_argument("document", nargs="?", help="document key (file name without extension)")
+    parser.add_argument("section", nargs="?", help='section key or citation, e.g. "s. 263"')
+    parser.add_argument("--as-of", help="ISO date; defaults to today for lookups and the scrape date for --record")
+    parser.add_argument("--record", action="store_true", help="record the current corpus")
+    parser.add_argument("--whole", action="store_true", help="print the whole document")
+    args = parser.parse_args()
+
+    history = SectionHistory()
+    if args.record:
+        totals = {}
+        for _, path in iter_corpus_files():
+            for kind, count in history.record_file(path, args.as_of).items():
+                totals[kind] = totals.get(kind, 0) + count
+        history.save()
+        print(f"Recorded {len(history.documents())} documents: {totals}")
+        return
+
+    if not args.document:
+        parser.error("give a document, or --record")
+    as_of = args.as_of or date.today().isoformat()
+    if args.whole or not args.section:
+        result = history.document_as_of(args.document, as_of)
+    else:
+        result = history.section_as_of(args.document, args.section, as_of)
+    if result is None:
+        print(f"Nothing in force on {as_of}")
+    else:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
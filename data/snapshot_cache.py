@@ -0,0 +1,101 @@
+import os
+import json
+import shutil
+import threading
+from datetime import datetime
+from scrape_manifest import sha256_bytes, sha256_file
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "raw_cache")
+
+class SnapshotCache:
+    """
+    Content-addressed store for the raw artifacts the scrapers fetch.
+
+    Every PDF and rendered HTML page is stored once under objects/ by its
+    SHA-256, and index.json points each source URL at its latest snapshot
+    together with what is needed to parse it again (kind, title, citation).
+    Identical content fetched twice is stored once.
+
+    Args:
+        cache_dir (str): Root directory of the cache
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self._lock = threading.Lock()
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+
+    def object_path(self, sha256):
+        """Return the path where the object with this hash is stored."""
+        return os.path.join(self.cache_dir, "objects", sha256[:2], sha256)
+
+    def _save_index(self):
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(sorted(self.index.items())), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def _add(self, url, sha256, size, kind, extra):
+        entry = {
+            "sha256": sha256,
+            "kind": kind,
+            "size": size,
+            "fetched_at": datetime.now().isoformat(timespec="seconds")
+        }
+        entry.update(extra)
+        with self._lock:
+            self.index[url] = entry
+            self._save_index()
+        return sha256
+
+    def store_bytes(self, url, data, kind, sha256=None, **extra):
+        """
+        Store raw content fetched from a URL.
+
+        Args:
+            url (str): Source URL
+            data (bytes or str): Raw content (str is stored as UTF-8)
+            kind (str): "pdf" or "html"
+            sha256 (str, optional): Precomputed hash of data
+            **extra: Additional fields kept in the index entry
+
+        Returns:
+            str: The content hash
+        """
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        sha256 = sha256 or sha256_bytes(data)
+        path = self.object_path(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return self._add(url, sha256, len(data), kind, extra)
+
+    def store_file(self, url, file_path, kind, sha256=None, **extra):
+        """Copy a downloaded file into the cache. See store_bytes()."""
+        sha256 = sha256 or sha256_file(file_path)
+        path = self.object_path(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            shutil.copyfile(file_path, tmp_path)
+            os.replace(tmp_path, path)
+        return self._add(url, sha256, os.path.getsize(path), kind, extra)
+
+    def load(self, sha256):
+        """Return the raw bytes of a stored object."""
+        with open(self.object_path(sha256), 'rb') as f:
+            return f.read()
+
+    def entries(self, kind=None):
+        """Return (url, entry) pairs, optionally only for one kind."""
+        with self._lock:
+            items = list(self.index.items())
+        return [(url, entry) for url, entry in items if kind is None or entry["kind"] == kind]
@@ -0,0 +1,341 @@
+"""
+Offline vector retrieval over the structure nodes of the corpus, with NumPy only.
+
+Each node's text, title and defined term become a TF-IDF vector over hashed
+word and word-pair features. The whole corpus is vectorized in one batch:
+tokens are hashed into flat (row, feature) arrays, and term counts, document
+frequencies and norms are computed with array operations over all of them.
+A randomized truncated SVD then reduces the sparse matrix to a dense one
+with a few hundred dimensions (latent semantic indexing). Without the SVD,
+nodes are stored directly as their hashed feature vectors.
+
+The matrix and projection are saved as .npy files and memory-mapped on
+load. A query is projected the same way and scored with one matrix-vector
+product; argpartition picks the top k.
+
+Usage:
+    python vector_index.py "can an insurer refuse to renew a policy" [-k 10] [--rebuild] [--no-svd]
+"""
+import os
+import json
+import time
+import zlib
+import hashlib
+import argparse
+import numpy as np
+from corpus_store import DATA_DIR, load_corpus
+from search_index import tokenize, node_search_text
+from dedup import dedup_exclusion
+
+VECTOR_INDEX_DIR = os.path.join(DATA_DIR, "vector_index")
+
+# Without SVD every node stores its full hashed vector; 28.7k nodes x 1024
+# float32 features is ~118 MB, while the SVD default of 2^15 would be ~3.7 GB
+MAX_DENSE_FEATURES = 1 << 10
+
+def resolve_build_options(n_features=1 << 15, rank=256, use_svd=True):
+    """
+    Return the options a build with these arguments actually uses.
+
+    Without SVD, n_features is capped at MAX_DENSE_FEATURES and rank does not apply.
+    """
+    if not use_svd:
+        return {"n_features": min(n_features, MAX_DENSE_FEATURES), "rank": None, "use_svd": False}
+    return {"n_features": n_features, "rank": rank, "use_svd": True}
+
+def hashed_features(tokens, n_features, cache):
+    """Return the feature number of every word and adjacent word pair in tokens."""
+    features = []
+    for i, token in enumerate(tokens):
+        grams = (token, f"{tokens[i - 1]} {token}") if i else (token,)
+        for gram in grams:
+            feature = cache.get(gram)
+            if feature is None:
+                feature = cache[gram] = zlib.crc32(gram.encode('utf-8')) % n_features
+            features.append(feature)
+    return features
+
+def _sparse_dot(rows, cols, values, n_rows, dense, chunk_size=1 << 16):
+    """
+    Multiply a sparse matrix given as (rows, cols, values), sorted by row, by a dense matrix.
+
+    The product is accumulated in chunks of entries so memory stays bounded.
+    """
+    result = np.zeros((n_rows, dense.shape[1]), dtype=np.float32)
+    for start in range(0, len(rows), chunk_size):
+        end = min(start + chunk_size, len(rows))
+        chunk_rows = rows[start:end]
+        products = values[start:end, None] * dense[cols[start:end]]
+        # Entries are grouped by row, so each row's products are one run
+        boundaries = np.flatnonzero(np.diff(chunk_rows)) + 1
+        run_starts = np.concatenate(([0], boundaries))
+        result[chunk_rows[run_starts]] += np.add.reduceat(products, run_starts, axis=0)
+    return result
+
+def randomized_svd(rows, cols, values, shape, rank, oversample=10, iterations=1, seed=0):
+    """
+    Truncated SVD of a sparse matrix (Halko et al. randomized range finder).
+
+    Args:
+        rows, cols, values (ndarray): Entries of the matrix, sorted by row
+        shape (tuple): (rows, columns)
+        rank (int): Number of singular vectors kept
+        oversample (int): Extra random directions for accuracy
+        iterations (int): Power iterations, which sharpen the spectrum
+
+    Returns:
+        tuple: (U * S, Vt), the reduced rows and the projection for new vectors
+    """
+    n_rows, n_cols = shape
+    rank = min(rank, n_rows, n_cols)
+    width = min(rank + oversample, n_rows, n_cols)
+    rng = np.random.default_rng(seed)
+
+    by_col = np.argsort(cols, kind='stable')
+    t_rows, t_cols, t_values = cols[by_col], rows[by_col], values[by_col]
+
+    def times(dense):
+        return _sparse_dot(rows, cols, values, n_rows, dense)
+
+    def transpose_times(dense):
+        return _sparse_dot(t_rows, t_cols, t_values, n_cols, dense)
+
+    basis = times(rng.standard_normal((n_cols, width), dtype=np.float32))
+    for _ in range(iterations):
+        basis, _ = np.linalg.qr(basis)
+        basis, _ = np.linalg.qr(transpose_times(basis))
+        basis = times(basis)
+    basis, _ = np.linalg.qr(basis)
+
+    # B = Q^T X is small (width x columns), so it is decomposed exactly
+    small = transpose_times(basis).T
+    u_small, singular_values, vt = np.linalg.svd(small, full_matrices=False)
+    reduced = basis @ (u_small[:, :rank] * singular_values[:rank])
+    return reduced.astype(np.float32), vt[:rank].astype(np.float32)
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+class VectorIndex:
+    """
+    Dense node vectors for cosine-similarity retrieval.
+
+    Args:
+        store (CorpusStore): Corpus the node numbers refer to
+        matrix (ndarray): One unit-length row per node
+        idf (ndarray): Inverse document frequency of every hashed feature
+        components (ndarray or None): SVD projection (rank x features), or
+            None when rows are the hashed features themselves
+        n_features (int): Number of hashed features
+    """
+
+    def __init__(self, store, matrix, idf, components, n_features, sources=None, dedup=None, options=None):
+        self.store = store
+        self.matrix = matrix
+        self.idf = idf
+        self.components = components
+        self.n_features = n_features
+        self.sources = sources if sources is not None else store.sources
+        # Signature of the near-duplicate set left out of the index, if any
+        self.dedup = dedup
+        # Effective build options (see resolve_build_options), saved to detect stale indexes
+        self.options = options
+        self._feature_cache = {}
+
+    @classmethod
+    def build(cls, store, n_features=1 << 15, rank=256, use_svd=True, exclude=None):
+        """
+        Vectorize every node of the store in one batch.
+
+        Args:
+            store (CorpusStore): Corpus to index
+            n_features (int): Hashed feature space size (without SVD, the vector
+                size, capped at MAX_DENSE_FEATURES)
+            rank (int): SVD dimensions kept
+            use_svd (bool): Reduce the TF-IDF matrix with truncated SVD
+            exclude (set, optional): Nodes left with a zero vector, e.g. the
+                near-duplicates from dedup.DuplicateIndex.duplicate_nodes()
+
+        Returns:
+            VectorIndex: The built index
+        """
+        options = resolve_build_options(n_features, rank, use_svd)
+        n_features = options["n_features"]
+        n_rows = len(store)
+        cache = {}
+        lengths = np.zeros(n_rows, dtype=np.int64)
+        features = []
+        for node in store.iter_nodes():
+            if exclude and node in exclude:
+                continue
+            node_features = hashed_features(tokenize(node_search_text(store, node)), n_features, cache)
+            lengths[node] = len(node_features)
+            features.extend(node_features)
+
+        # Flat (row, feature) pairs for the whole corpus; unique pairs give term counts
+        rows = np.repeat(np.arange(n_rows, dtype=np.int64), lengths)
+        keys, counts = np.unique(rows * n_features + np.asarray(features, dtype=np.int64), return_counts=True)
+        rows, cols = keys // n_features, keys % n_features
+
+        document_frequency = np.bincount(cols, minlength=n_features)
+        idf = (np.log((1 + n_rows) / (1 + document_frequency)) + 1).astype(np.float32)
+        values = ((1 + np.log(counts)) * idf[cols]).astype(np.float32)
+        norms = np.sqrt(np.bincount(rows, weights=values.astype(np.float64) ** 2, minlength=n_rows))
+        norms[norms == 0] = 1
+        values /= norms[rows].astype(np.float32)
+
+        if use_svd:
+            reduced, components = randomized_svd(rows, cols, values, (n_rows, n_features), rank)
+            matrix = _normalize_rows(reduced)
+        else:
+            matrix = np.zeros((n_rows, n_features), dtype=np.float32)
+            matrix[rows, cols] = values
+            components = None
+        return cls(store, matrix.astype(np.float32), idf, components, n_features, options=options)
+
+    def save(self, index_dir=VECTOR_INDEX_DIR):
+        """Write the matrix, IDF weights and projection to index_dir as .npy files."""
+        os.makedirs(index_dir, exist_ok=True)
+        np.save(os.path.join(index_dir, "matrix.npy"), self.matrix)
+        np.save(os.path.join(index_dir, "idf.npy"), self.idf)
+        components_path = os.path.join(index_dir, "components.npy")
+        if self.components is not None:
+            np.save(components_path, self.components)
+        elif os.path.exists(components_path):
+            os.remove(components_path)
+        with open(os.path.join(index_dir, "index.json"), 'w', encoding='utf-8') as f:
+            json.dump({"n_features": self.n_features, "options": self.options,
+                       "sources": self.sources, "dedup": self.dedup}, f)
+
+    @classmethod
+    def load(cls, store, index_dir=VECTOR_INDEX_DIR):
+        """Load an index written by save(), memory-mapping the arrays."""
+        with open(os.path.join(index_dir, "index.json"), 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        components_path = os.path.join(index_dir, "components.npy")
+        return cls(
+            store,
+            np.load(os.path.join(index_dir, "matrix.npy"), mmap_mode='r'),
+            np.load(os.path.join(index_dir, "idf.npy"), mmap_mode='r'),
+            np.load(components_path, mmap_mode='r') if os.path.exists(components_path) else None,
+            info["n_features"],
+            info["sources"],
+            info.get("dedup"),
+            info.get("options")
+        )
+
+    def query_vector(self, query):
+        """Return the unit-length vector of a query in the index's space."""
+        features = hashed_features(tokenize(query), self.n_features, self._feature_cache)
+        if not features:
+            return None
+        cols, counts = np.unique(np.asarray(features, dtype=np.int64), return_counts=True)
+        values = (1 + np.log(counts)) * self.idf[cols]
+        if self.components is None:
+            vector = np.zeros(self.n_features, dtype=np.float32)
+            vector[cols] = values
+        else:
+            vector = self.components[:, cols] @ values.astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def search(self, query, k=10):
+        """
+        Return the k nodes most similar to a query.
+
+        Nodes with a score of zero or less (excluded nodes, nodes without text,
+        or no similarity at all) are never returned, so there may be fewer than k hits.
+
+        Returns:
+            list: Hits as dicts with node, id, citation_path, title (the
+                document title), type and score (cosine similarity), best first
+        """
+        vector = self.query_vector(query)
+        if vector is None:
+            return []
+        scores = self.matrix @ vector
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        top = top[scores[top] > 0]
+
+        store = self.store
+        return [{
+            "node": node,
+            "id": store.node_id(node),
+            "citation_path": store.citation_path(node),
+            "title": store.document(node)["title"],
+            "type": store.node_type(node),
+            "score": float(scores[node])
+        } for node in top.tolist()]
+
+def load_vector_index(index_dir=VECTOR_INDEX_DIR, store=None, dedup=True, exclude=None, **build_options):
+    """
+    Return the vector index, rebuilding it when it is missing or out of date.
+
+    The index is out of date when the corpus, the set of excluded nodes or
+    the build options have changed.
+
+    Args:
+        index_dir (str): Directory holding the index files
+        store (CorpusStore, optional): Corpus; loaded with load_corpus() by default
+        dedup (bool): Leave out near-duplicate sections (see dedup.py)
+        exclude (set, optional): Further nodes to leave out
+        **build_options: n_features, rank and use_svd for VectorIndex.build()
+
+    Returns:
+        VectorIndex: The index
+    """
+    if store is None:
+        store = load_corpus()
+    excluded, signature = dedup_exclusion(store, dedup)
+    if exclude:
+        excluded = (excluded or set()) | set(exclude)
+        digest = hashlib.sha256(",".join(map(str, sorted(exclude))).encode('utf-8')).hexdigest()[:16]
+        signature = f"{signature}+{digest}"
+    options = resolve_build_options(**build_options)
+    if os.path.exists(os.path.join(index_dir, "index.json")):
+        index = VectorIndex.load(store, index_dir)
+        if index.sources == store.sources and index.dedup == signature and index.options == options:
+            return index
+
+    print("Building vector index...")
+    started = time.perf_counter()
+    index = VectorIndex.build(store, exclude=excluded, **options)
+    index.dedup = signature
+    index.save(index_dir)
+    print(f"Vectorized {index.matrix.shape[0]} nodes into {index.matrix.shape[1]} dimensions "
+          f"in {time.perf_counter() - started:.1f}s")
+    return index
+
+def main():
+    parser = argparse.ArgumentParser(description="Similarity search over the scraped documents.")
+    parser.add_argument("query", help="question or search terms")
+    parser.add_argument("-k", type=int, default=10, help="number of results")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the index first")
+    parser.add_argument("--no-svd", action="store_true", help="store hashed TF-IDF vectors without SVD reduction")
+    parser.add_argument("--features", type=int, default=None, help="hashed feature space size")
+    args = parser.parse_args()
+
+    build_options = {"use_svd": not args.no_svd}
+    if args.features:
+        build_options["n_features"] = args.features
+
+    store = load_corpus()
+    if args.rebuild and os.path.exists(os.path.join(VECTOR_INDEX_DIR, "index.json")):
+        os.remove(os.path.join(VECTOR_INDEX_DIR, "index.json"))
+    started = time.perf_counter()
+    index = load_vector_index(store=store, **build_options)
+    loaded = time.perf_counter()
+    hits = index.search(args.query, args.k)
+    searched = time.perf_counter()
+
+    for hit in hits:
+        print(f"{hit['score']:6.3f}  {hit['citation_path']:<28} {hit['id']:<32} {hit['title'][:60]}")
+    print(f"\n{len(hits)} results in {(searched - loaded) * 1000:.2f}ms "
+          f"(index ready in {(loaded - started) * 1000:.1f}ms)")
+
+if __name__ == "__main__":
+    main()
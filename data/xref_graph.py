@@ -0,0 +1,339 @@
+"""
+Cross-reference graph between the sections of the scraped Acts, regulations and guidance.
+
+Titles and text cite other provisions all the time: "Direct Compensation-
+Property Damage (Section 263 of the Act)", "subsections 256 (1), (2) and
+(3)", "sections 237 and 238 of the Insurance Act", "Sections 410 to 417 of
+the Act". Each document's titles and text are joined into one string and
+scanned with a single compiled pattern; every reference is resolved through
+the citation index to the narrowest provision it names that exists as a
+node (paragraph, then subsection, then section), in the same document, in
+the named Act, or for "the Act" in the Act a regulation or guideline is made
+under. References to laws outside the corpus are dropped.
+
+Edges are stored as CSR arrays in both directions, so "what does this
+cite" and "what cites this" are two array slices, and multi-hop traversal is
+a breadth-first walk over them.
+
+Usage:
+    python xref_graph.py "s. 263" --document "R.S.O. 1990, c. I.8" [--hops 2]
+"""
+import os
+import re
+import json
+import argparse
+from bisect import bisect_right
+from collections import deque
+import numpy as np
+from corpus_store import DATA_DIR, load_corpus
+from citation_index import CitationIndex
+
+XREF_GRAPH_DIR = os.path.join(DATA_DIR, "xref_graph")
+# Bumped when reference resolution changes, so saved graphs are rebuilt
+XREF_GRAPH_VERSION = 3
+
+# "the Act" in a regulation or FSRA guideline means the Act it is made under.
+# Keys and values are document title prefixes.
+ENABLING_ACTS = {
+    "R.R.O. 1990, Reg. 664": "Insurance Act",
+    "O. Reg. 383/24": "Insurance Act",
+    "O. Reg. 777/93": "Insurance Act",
+}
+# FSRA automobile guidance refers to the Insurance Act as "the Act"
+GUIDANCE_ACT = "Insurance Act"
+
+SECTION_NUMBER = r"\d+(?:\.\d+)*"
+REFERENCE_PATTERN = re.compile(rf"""
+    \b(?i:sub)?(?i:sections?)\s+
+    (?P<number>{SECTION_NUMBER})
+    (?:\s*\(\s*(?P<subsection>\d+(?:\.\d+)?)\s*\))?
+    (?:\s*\(\s*(?P<paragraph>[a-z]{{1,4}})\s*\))?
+    # Further sections or subsections in a list or range: "237 and 238",
+    # "410 to 417", "(1), (2) and (3)"
+    (?P<more>(?:\s*(?:,|\band\b|\bor\b|\bto\b)\s*(?:{SECTION_NUMBER}|\(\s*\d+(?:\.\d+)?\s*\)))*)
+    (?:\s+of\s+
+        (?:(?P<this>this\s+(?:Act|Regulation))
+        |(?P<schedule>Schedule\b)
+        # Scraped text often runs the Act's name into the next word ("theInsurance Actapplies")
+        |the\s*(?P<act>Act\b|Regulation\b|[A-Z][\w'’\-]*(?:\s+[\w'’\-]+){{0,8}}?\s+Act)
+        )
+    )?
+""", re.VERBOSE)
+# A list item is a whole section number: not the tail of a longer number and
+# not a parenthesized subsection, so "(12)" does not yield a section "1"
+LIST_ITEM = re.compile(rf"(\bto\b)?\s*(?<![\d(])({SECTION_NUMBER})(?![\d.]|\s*\))")
+
+# Ranges such as "sections 1 to 400" are only expanded up to this length
+MAX_RANGE = 50
+
+class XrefGraph:
+    """
+    Cross-references between corpus nodes as CSR adjacency arrays.
+
+    Args:
+        store (CorpusStore): Corpus the node numbers refer to
+        sources (ndarray): Citing node of every edge
+        targets (ndarray): Cited node of every edge
+    """
+
+    def __init__(self, store, sources, targets, corpus_sources=None, version=XREF_GRAPH_VERSION):
+        self.store = store
+        self.version = version
+        self.corpus_sources = corpus_sources if corpus_sources is not None else store.sources
+        count = len(store)
+        order = np.lexsort((targets, sources))
+        self.cites_targets = np.asarray(targets, dtype=np.int32)[order]
+        self.cites_offsets = np.concatenate(([0], np.cumsum(np.bincount(sources, minlength=count)))).astype(np.int64)
+        order = np.lexsort((sources, targets))
+        self.cited_by_sources = np.asarray(sources, dtype=np.int32)[order]
+        self.cited_by_offsets = np.concatenate(([0], np.cumsum(np.bincount(targets, minlength=count)))).astype(np.int64)
+
+    def __len__(self):
+        return len(self.cites_targets)
+
+    @classmethod
+    def build(cls, store, citations=None):
+        """
+        Extract and resolve the cross-references of every document.
+
+        Args:
+            store (CorpusStore): Corpus to scan
+            citations (CitationIndex, optional): Resolver; built from store by default
+
+        Returns:
+            XrefGraph: The graph
+        """
+        citations = citations or CitationIndex(store)
+        edges = set()
+        for doc_index in range(len(store.documents)):
+            for source, target in document_references(store, citations, doc_index):
+                if source != target:
+                    edges.add((source, target))
+
+        edges = sorted(edges)
+        sources = np.array([source for source, _ in edges], dtype=np.int64)
+        targets = np.array([target for _, target in edges], dtype=np.int64)
+        return cls(store, sources, targets)
+
+    def save(self, graph_dir=XREF_GRAPH_DIR):
+        """Write the edge list to graph_dir."""
+        os.makedirs(graph_dir, exist_ok=True)
+        sources = np.repeat(np.arange(len(self.store), dtype=np.int32), np.diff(self.cites_offsets))
+        np.save(os.path.join(graph_dir, "sources.npy"), sources)
+        np.save(os.path.join(graph_dir, "targets.npy"), self.cites_targets)
+        with open(os.path.join(graph_dir, "corpus_sources.json"), 'w', encoding='utf-8') as f:
+            json.dump({"version": self.version, "sources": self.corpus_sources}, f)
+
+    @classmethod
+    def load(cls, store, graph_dir=XREF_GRAPH_DIR):
+        """Load a graph written by save()."""
+        with open(os.path.join(graph_dir, "corpus_sources.json"), 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        # Graphs saved before versioning hold the bare sources mapping
+        if "version" not in saved:
+            saved = {"version": 1, "sources": saved}
+        return cls(
+            store,
+            np.load(os.path.join(graph_dir, "sources.npy")).astype(np.int64),
+            np.load(os.path.join(graph_dir, "targets.npy")).astype(np.int64),
+            saved["sources"],
+            saved["version"]
+        )
+
+    def _nodes(self, node, include_subtree):
+        return self.store.subtree(node) if include_subtree else (node,)
+
+    def cites(self, node, include_subtree=False):
+        """
+        Return the nodes a node refers to.
+
+        Args:
+            node (int): Citing node
+            include_subtree (bool): Also include references made in its descendants
+
+        Returns:
+            list: Cited nodes, sorted
+        """
+        found = set()
+        for source in self._nodes(node, include_subtree):
+            found.update(self.cites_targets[self.cites_offsets[source]:self.cites_offsets[source + 1]].tolist())
+        return sorted(found)
+
+    def cited_by(self, node, include_subtree=False):
+        """Return the nodes that refer to a node (or, optionally, to any of its descendants), sorted."""
+        found = set()
+        for target in self._nodes(node, include_subtree):
+            found.update(self.cited_by_sources[self.cited_by_offsets[target]:self.cited_by_offsets[target + 1]].tolist())
+        return sorted(found)
+
+    def traverse(self, node, hops=2, direction="cites", limit=None):
+        """
+        Walk references breadth-first from a node.
+
+        Args:
+            node (int): Start node
+            hops (int): Maximum number of references to follow
+            direction (str): "cites" to follow references, "cited_by" to follow them backwards
+            limit (int, optional): Stop after this many nodes have been reached
+
+        Returns:
+            dict: Distance in hops of every node reached (the start node excluded)
+        """
+        if direction == "cites":
+            offsets, neighbours = self.cites_offsets, self.cites_targets
+        elif direction == "cited_by":
+            offsets, neighbours = self.cited_by_offsets, self.cited_by_sources
+        else:
+            raise ValueError(f"direction must be 'cites' or 'cited_by', not {direction!r}")
+
+        distances = {node: 0}
+        queue = deque([node])
+        while queue:
+            current = queue.popleft()
+            if distances[current] == hops:
+                continue
+            for neighbour in neighbours[offsets[current]:offsets[current + 1]].tolist():
+                if neighbour in distances:
+                    continue
+                distances[neighbour] = distances[current] + 1
+                if limit is not None and len(distances) > limit:
+                    del distances[node]
+                    return distances
+                queue.append(neighbour)
+        del distances[node]
+        return distances
+
+def _reference_numbers(match):
+    """Return the section numbers a reference names, expanding short ranges."""
+    numbers = [match.group("number")]
+    for to, number in LIST_ITEM.findall(match.group("more") or ""):
+        if to and numbers[-1].isdigit() and number.isdigit():
+            start, end = int(numbers[-1]), int(number)
+            if 0 < end - start <= MAX_RANGE:
+                numbers.extend(str(n) for n in range(start + 1, end + 1))
+                continue
+        numbers.append(number)
+    return numbers
+
+def reference_keys(number, subsection=None, paragraph=None):
+    """
+    Return the citation keys a reference may resolve to, most precise first.
+
+    "s. 12(3)(a)" tries the paragraph, then the subsection, then the section,
+    so the edge points at the narrowest provision that exists as a node.
+    """
+    section = f"s{number}"
+    if subsection:
+        keys = [f"{section}({subsection})"]
+        if paragraph:
+            keys.insert(0, f"{section}({subsection})({paragraph})")
+    else:
+        keys = [f"{section}({paragraph})"] if paragraph else []
+    return keys + [section]
+
+def _find_document(store, title_prefix):
+    for doc_index, document in enumerate(store.documents):
+        if document["title"].lower().startswith(title_prefix.lower()):
+            return doc_index
+    return None
+
+def target_document(store, doc_index, match):
+    """Return the document a reference points into, or None if it is outside the corpus."""
+    if match.group("schedule"):
+        return None
+    act = match.group("act")
+    if not act or match.group("this"):
+        return doc_index
+    if act in ("Act", "Regulation"):
+        if act == "Regulation":
+            return doc_index
+        document = store.documents[doc_index]
+        for prefix, enabling_act in ENABLING_ACTS.items():
+            if document["title"].startswith(prefix):
+                return _find_document(store, enabling_act)
+        if document["collection"] == "FSRAO_docs":
+            return _find_document(store, GUIDANCE_ACT)
+        return doc_index
+    return _find_document(store, " ".join(act.split()))
+
+def document_references(store, citations, doc_index):
+    """
+    Yield (citing node, cited node) for every resolvable reference in a document.
+
+    The titles and texts of the document's nodes are scanned as one string,
+    and match positions are mapped back to nodes.
+    """
+    nodes = list(store.iter_nodes(doc_index))
+    parts = []
+    starts = []
+    position = 0
+    for node in nodes:
+        text = f"{store.title(node)}\n{store.text(node)}\n"
+        starts.append(position)
+        parts.append(text)
+        position += len(text)
+    text = "".join(parts)
+
+    for match in REFERENCE_PATTERN.finditer(text):
+        target_doc = target_document(store, doc_index, match)
+        if target_doc is None:
+            continue
+        source = nodes[bisect_right(starts, match.start()) - 1]
+        numbers = _reference_numbers(match)
+        single = len(numbers) == 1
+        for number in numbers:
+            for key in reference_keys(number, match.group("subsection") if single else None,
+                                      match.group("paragraph") if single else None):
+                target = citations.by_document.get((target_doc, key))
+                if target is not None:
+                    yield source, target
+                    break
+
+def load_xref_graph(graph_dir=XREF_GRAPH_DIR, store=None):
+    """
+    Return the cross-reference graph, rebuilding it when it is missing, the corpus has changed or it was built by an older version.
+
+    Args:
+        graph_dir (str): Directory holding the graph files
+        store (CorpusStore, optional): Corpus; loaded with load_corpus() by default
+
+    Returns:
+        XrefGraph: The graph
+    """
+    if store is None:
+        store = load_corpus()
+    if os.path.exists(os.path.join(graph_dir, "corpus_sources.json")):
+        graph = XrefGraph.load(store, graph_dir)
+        if graph.corpus_sources == store.sources and graph.version == XREF_GRAPH_VERSION:
+            return graph
+
+    print("Building cross-reference graph...")
+    graph = XrefGraph.build(store)
+    graph.save(graph_dir)
+    return graph
+
+def main():
+    parser = argparse.ArgumentParser(description="Show what a section cites and what cites it.")
+    parser.add_argument("citation", help='section, e.g. "s. 263"')
+    parser.add_argument("--document", help="file name, title or citation of the section's document")
+    parser.add_argument("--hops", type=int, default=1, help="number of references to follow")
+    args = parser.parse_args()
+
+    store = load_corpus()
+    graph = load_xref_graph(store=store)
+    print(f"{len(graph)} cross-references")
+
+    def describe(node):
+        return f"{store.citation_path(node):<20} {store.document(node)['title'][:60]}"
+
+    for hit in CitationIndex(store).resolve(args.citation, args.document):
+        node = hit["node"]
+        print(f"\n{describe(node)}")
+        for direction in ("cites", "cited_by"):
+            reached = graph.traverse(node, hops=args.hops, direction=direction)
+            print(f"  {direction} ({len(reached)}):")
+            for other, distance in sorted(reached.items(), key=lambda item: (item[1], item[0])):
+                print(f"    {distance}  {describe(other)}")
+
+if __name__ == "__main__":
+    main()